@@ -1,56 +1,18 @@
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from preprocessing.timeframe import convert_timeframe
+from Charts.decimation import visible_slice, decimate_candles, decimate_line
 
-def interactive_candle_chart(data, show_fig=True, show_indicators = True):
+@lru_cache(maxsize=None)
+def _static_layout(webgl=False):
     """
-    Create an interactive candlestick chart with Plotly that includes drawing tools, zoom slider,
-    crosshair cursor, gridlines, indicators, and time interval selection.
-
-    Parameters:
-    - data: DataFrame containing 'Open', 'High', 'Low', 'Close', 'Date', and optional indicator columns.
+    Layout shared by every chart (axes, crosshair, rangebreaks, drawing buttons), built
+    and validated once and reused as a plain dict.
     """
-    # Check if 'Buy/Sell' column is present
-    buy_sell_exists = 'Position' in data.columns
-
-    # Ensure 'Date' column is in datetime format and set as index
-    if not isinstance(data.index, pd.DatetimeIndex):
-        data['Date'] = pd.to_datetime(data['Date'])
-        data.set_index('Date', inplace=True)
-
-    # Collect indicator columns from the data
-    indicator_columns = [col for col in data.columns if col not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Position']]
-
-    # Create the initial candlestick chart
-    fig = go.Figure(data=[go.Candlestick(x=data.index,
-                                         open=data['Open'],
-                                         high=data['High'],
-                                         low=data['Low'],
-                                         close=data['Close'],
-                                         name="Candlestick")])
-
-    # Add buy and sell markers from the 'Buy/Sell' column if it exists
-    if buy_sell_exists:
-        buy_signals = data[data['Position'] == 1]
-        sell_signals = data[data['Position'] == -1]
-
-        fig.add_trace(go.Scatter(x=buy_signals.index, y=buy_signals['Close'], mode='markers',
-                                 marker=dict(symbol="triangle-up", color="green", size=10),
-                                 name="Buy Signal"))
-
-        fig.add_trace(go.Scatter(x=sell_signals.index, y=sell_signals['Close'], mode='markers',
-                                 marker=dict(symbol="triangle-down", color="red", size=10),
-                                 name="Sell Signal"))
-
-    # Add indicators as line charts; plot RSI on a secondary y-axis if it exists
-    if show_indicators:
-        for indicator in indicator_columns:
-            if indicator == 'RSI':
-                fig.add_trace(go.Scatter(x=data.index, y=data[indicator], mode='lines', name=indicator,
-                                        yaxis='y2'))
-            else:
-                fig.add_trace(go.Scatter(x=data.index, y=data[indicator], mode='lines', name=indicator))
-   
+    fig = go.Figure()
 
     # Customize layout to include crosshair, gridlines, and drawing tools
     fig.update_layout(
@@ -102,6 +64,96 @@ def interactive_candle_chart(data, show_fig=True, show_indicators = True):
         ]
     )
 
+    if webgl:
+        # Timestamps are sent as epoch milliseconds, so the axis type cannot be inferred
+        fig.update_xaxes(type='date')
+    return fig.layout.to_plotly_json()
+
+
+def _epoch_ms(index):
+    """Wall-clock timestamps as float64 epoch milliseconds, which a date axis plots as dates."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit('ns').asi8 / 1e6
+
+
+def interactive_candle_chart(data, show_fig=True, show_indicators = True, max_points=None, x_range=None,
+                             line_method='lttb', webgl=False):
+    """
+    Create an interactive candlestick chart with Plotly that includes drawing tools, zoom slider,
+    crosshair cursor, gridlines, indicators, and time interval selection.
+
+    Parameters:
+    - data: DataFrame containing 'Open', 'High', 'Low', 'Close', 'Date', and optional indicator columns.
+    - max_points: Upper bound on the candles and on the points of each indicator line. Longer data
+                  is decimated (candles merged, lines downsampled) so the figure stays the same size
+                  whatever the length of the data. None (default) plots every row.
+    - x_range: Optional (start, end) pair; only rows in this range are plotted, at the finest
+               resolution max_points allows. Used to re-render a zoomed-in view.
+    - line_method: Downsampling of indicator lines, 'lttb' (default) or 'minmax'.
+    - webgl: Draw indicators and markers with WebGL (Scattergl) and send prices as float32
+             typed arrays and timestamps as epoch milliseconds. Much faster to build, send and
+             pan for long ranges; prices are rounded to float32 precision.
+    """
+    # Check if 'Buy/Sell' column is present
+    buy_sell_exists = 'Position' in data.columns
+
+    # Ensure 'Date' column is in datetime format and set as index
+    if not isinstance(data.index, pd.DatetimeIndex):
+        data['Date'] = pd.to_datetime(data['Date'])
+        data.set_index('Date', inplace=True)
+
+    full_data = visible_slice(data, x_range)
+    data = decimate_candles(full_data, max_points)
+
+    # Collect indicator columns from the data
+    indicator_columns = [col for col in data.columns if col not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Position']]
+
+    # The WebGL path draws lines and markers on the GPU and sends typed arrays,
+    # which plotly serializes as base64 instead of JSON lists of numbers and date strings
+    if webgl:
+        scatter = go.Scattergl
+        x_values = _epoch_ms
+        y_values = lambda series: series.to_numpy(dtype=np.float32)
+    else:
+        scatter = go.Scatter
+        x_values = lambda index: index
+        y_values = lambda series: series
+
+    # Create the initial candlestick chart
+    traces = [go.Candlestick(x=x_values(data.index),
+                             open=y_values(data['Open']),
+                             high=y_values(data['High']),
+                             low=y_values(data['Low']),
+                             close=y_values(data['Close']),
+                             name="Candlestick")]
+
+    # Add buy and sell markers from the 'Buy/Sell' column if it exists
+    if buy_sell_exists:
+        buy_signals = data[data['Position'] == 1]
+        sell_signals = data[data['Position'] == -1]
+
+        traces.append(scatter(x=x_values(buy_signals.index), y=y_values(buy_signals['Close']), mode='markers',
+                              marker=dict(symbol="triangle-up", color="green", size=10),
+                              name="Buy Signal"))
+
+        traces.append(scatter(x=x_values(sell_signals.index), y=y_values(sell_signals['Close']), mode='markers',
+                              marker=dict(symbol="triangle-down", color="red", size=10),
+                              name="Sell Signal"))
+
+    # Add indicators as line charts; plot RSI on a secondary y-axis if it exists
+    # Lines are downsampled from the undecimated rows so their peaks and troughs survive
+    if show_indicators:
+        for indicator in indicator_columns:
+            line = decimate_line(full_data[indicator], max_points, line_method)
+            if indicator == 'RSI':
+                traces.append(scatter(x=x_values(line.index), y=y_values(line), mode='lines', name=indicator,
+                                      yaxis='y2'))
+            else:
+                traces.append(scatter(x=x_values(line.index), y=y_values(line), mode='lines', name=indicator))
+
+    fig = go.Figure(data=traces, layout=_static_layout(webgl))
+
     if show_fig:
         fig.show()
 
@@ -0,0 +1,61 @@
+import dash
+from dash import dcc, html, Input, Output
+
+from Charts.candle_chart import interactive_candle_chart
+
+
+def zoom_range(relayout_data):
+    """
+    Visible x range from a Plotly relayout event.
+
+    Returns:
+    - (start, end) after a zoom or pan, None after an autoscale/reset, or False when
+      the event did not touch the x axis.
+    """
+    if not relayout_data:
+        return False
+    if relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return False
+
+
+def chart_app(data, max_points=4000, **chart_options):
+    """
+    Dash app showing a decimated candle chart that is re-rendered at a finer resolution
+    for the visible range every time the user zooms or pans.
+
+    Parameters:
+    - data: DataFrame with 'Open', 'High', 'Low', 'Close' and a datetime index.
+    - max_points: Candles and indicator points sent to the browser per view.
+    - chart_options: Extra keyword arguments for interactive_candle_chart.
+    """
+    app = dash.Dash(__name__)
+
+    def render(x_range):
+        fig = interactive_candle_chart(data, show_fig=False, max_points=max_points, x_range=x_range,
+                                       **chart_options)
+        # Keep the user's zoom when the data behind the view is swapped
+        fig.update_layout(uirevision='chart')
+        return fig
+
+    app.layout = html.Div([
+        dcc.Graph(id='chart', figure=render(None), style={'height': '90vh'}),
+    ])
+
+    @app.callback(Output('chart', 'figure'), Input('chart', 'relayoutData'), prevent_initial_call=True)
+    def rerender(relayout_data):
+        x_range = zoom_range(relayout_data)
+        if x_range is False:
+            raise dash.exceptions.PreventUpdate
+        return render(x_range)
+
+    return app
+
+
+def serve_chart(data, max_points=4000, port=8050, debug=False, **chart_options):
+    """Serve chart_app(data) locally (http://127.0.0.1:<port>)."""
+    chart_app(data, max_points=max_points, **chart_options).run(port=port, debug=debug)
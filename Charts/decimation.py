@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+
+def visible_slice(data, x_range=None):
+    """
+    Rows of data whose index falls inside x_range, found by binary search on the sorted index.
+
+    Parameters:
+    - data: DataFrame with a sorted datetime index.
+    - x_range: (start, end) pair of timestamps or strings; either end may be None. None returns data.
+    """
+    if x_range is None:
+        return data
+    start, end = x_range
+    lo = 0 if start is None else data.index.searchsorted(_as_index_time(data.index, start), 'left')
+    hi = len(data) if end is None else data.index.searchsorted(_as_index_time(data.index, end), 'right')
+    return data.iloc[lo:hi]
+
+
+def _as_index_time(index, value):
+    value = pd.Timestamp(value)
+    if index.tz is not None and value.tz is None:
+        value = value.tz_localize(index.tz)
+    return value
+
+
+def decimate_candles(data, max_candles):
+    """
+    Merge runs of consecutive candles so that at most max_candles remain.
+
+    Every bucket holds the same number of rows and keeps the timestamp of its first row,
+    the first Open, highest High, lowest Low and last Close. Volume is summed and any
+    other column (Position, indicators) keeps its last value in the bucket.
+
+    Parameters:
+    - data: DataFrame with 'Open', 'High', 'Low', 'Close' and a datetime index.
+    - max_candles: Maximum number of candles to return.
+
+    Returns:
+    - data itself if it is already small enough, otherwise the merged DataFrame.
+    """
+    n = len(data)
+    if max_candles is None or n <= max_candles:
+        return data
+    size = -(-n // max_candles)
+    starts = np.arange(0, n, size)
+    ends = np.r_[starts[1:], n] - 1
+
+    columns = {}
+    for col in data.columns:
+        values = data[col].to_numpy()
+        if col == 'Open':
+            columns[col] = values[starts]
+        elif col == 'High':
+            columns[col] = np.maximum.reduceat(values, starts)
+        elif col == 'Low':
+            columns[col] = np.minimum.reduceat(values, starts)
+        elif col == 'Volume':
+            columns[col] = np.add.reduceat(values, starts)
+        else:
+            columns[col] = values[ends]
+    return pd.DataFrame(columns, index=data.index[starts])
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line.
+
+    Keeps the first and last points and, from each of threshold - 2 equal buckets in
+    between, the point forming the largest triangle with the point kept from the
+    previous bucket and the average of the next bucket. NaN points are skipped.
+
+    Parameters:
+    - x, y: Numeric arrays of the same length (x sorted, e.g. timestamps as int64).
+    - threshold: Number of points to keep.
+
+    Returns:
+    - Sorted array of the positions of the points to keep.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(y))
+    if threshold is None or len(valid) <= threshold or threshold < 3:
+        return valid
+    x = np.asarray(x, dtype=np.float64)[valid]
+    x = x - x[0]
+    y = y[valid]
+    n = len(valid)
+
+    # Bucket i spans edges[i]:edges[i + 1]; the last point is a bucket of its own
+    edges = np.r_[np.linspace(1, n - 1, threshold - 1).astype(np.int64), n]
+    # Averages of every next bucket at once, from running sums
+    sum_x = np.r_[0.0, np.cumsum(x)]
+    sum_y = np.r_[0.0, np.cumsum(y)]
+    counts = edges[2:] - edges[1:-1]
+    avg_x = (sum_x[edges[2:]] - sum_x[edges[1:-1]]) / counts
+    avg_y = (sum_y[edges[2:]] - sum_y[edges[1:-1]]) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        px, py = x[previous], y[previous]
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs((px - avg_x[i]) * (y[lo:hi] - py) - (px - x[lo:hi]) * (avg_y[i] - py))
+        previous = lo + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return valid[np.unique(selected)]
+
+
+def minmax_indices(y, threshold):
+    """
+    Min/max downsampling of a line: the lowest and highest point of each of threshold // 2 buckets.
+
+    Cheaper than LTTB and never hides a spike. NaN points are skipped.
+
+    Returns:
+    - Sorted array of the positions of the points to keep.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(y))
+    if threshold is None or len(valid) <= threshold:
+        return valid
+    buckets = max(threshold // 2, 1)
+    size = -(-len(valid) // buckets)
+    values = np.full(buckets * size, np.nan)
+    values[:len(valid)] = y[valid]
+    values = values.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(values), np.inf, values), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(values), -np.inf, values), axis=1)
+    keep = np.unique(np.r_[lows, highs])
+    return valid[keep[keep < len(valid)]]
+
+
+line_downsamplers = {
+    'lttb': lambda x, y, threshold: lttb_indices(x, y, threshold),
+    'minmax': lambda x, y, threshold: minmax_indices(y, threshold),
+}
+
+
+def decimate_line(series, max_points, method='lttb'):
+    """
+    Downsample an indicator Series to at most max_points points for plotting.
+
+    Parameters:
+    - series: Series with a datetime index.
+    - max_points: Maximum number of points to keep (None keeps every point).
+    - method: 'lttb' (default, keeps the shape of the line) or 'minmax' (keeps every extreme).
+
+    Returns:
+    - The downsampled Series.
+    """
+    if max_points is None or len(series) <= max_points:
+        return series
+    if method not in line_downsamplers:
+        raise ValueError(f"Invalid downsampling method. Choose from {', '.join(line_downsamplers)}")
+    x = series.index.as_unit('ns').asi8
+    keep = line_downsamplers[method](x, series.to_numpy(), max_points)
+    return series.iloc[keep]
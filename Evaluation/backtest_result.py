@@ -0,0 +1,96 @@
+class BacktestResult(tuple):
+    """
+    Result of a backtest.
+
+    Unpacks like the plain (final_capital, profit_loss_percentage, points_captured)
+    tuple returned before, and also keeps the strategy frame and the trade ledger
+    so reports and charts can be produced on demand after the run.
+
+    When signals (a (position, diagnostics) pair from strategy_signals) are given, data
+    is the input frame and the strategy frame is only joined on first access of .data.
+    """
+
+    def __new__(cls, final_capital, profit_loss_percentage, points_captured, data=None, trades=None,
+                strategy=None, initial_capital=None, signals=None):
+        result = super().__new__(cls, (final_capital, profit_loss_percentage, points_captured))
+        result._frame = data
+        result._signals = signals
+        result.trades = trades
+        result.strategy = strategy
+        result.initial_capital = initial_capital
+        return result
+
+    def __reduce__(self):
+        return (BacktestResult, tuple(self) + (self._frame, self.trades, self.strategy, self.initial_capital,
+                                               self._signals))
+
+    @property
+    def data(self):
+        """The strategy frame: the data with the strategy's columns and 'Position'."""
+        if self._signals is not None:
+            from Strategy.signals import join_signals
+            self._frame = join_signals(self._frame, *self._signals)
+            self._signals = None
+        return self._frame
+
+    @property
+    def position(self):
+        """The Position column as an array, without building the strategy frame."""
+        if self._signals is not None:
+            return self._signals[0]
+        return None if self._frame is None else self._frame['Position'].to_numpy()
+
+    @property
+    def final_capital(self):
+        return self[0]
+
+    @property
+    def profit_loss_percentage(self):
+        return self[1]
+
+    @property
+    def points_captured(self):
+        return self[2]
+
+    def report(self, tail=50):
+        """
+        Text report of the run: the last rows of the strategy frame, the trades and the summary.
+
+        Parameters:
+        - tail: Number of trailing rows of the strategy frame to include (0 to leave them out).
+        """
+        lines = []
+        if self.strategy is not None:
+            lines.append(f"Strategy: {self.strategy}")
+        if tail and self.data is not None:
+            lines.append(self.data.tail(tail).to_string())
+        if self.trades is not None:
+            lines.append(f"Trades: {len(self.trades)}")
+            if len(self.trades):
+                lines.append(self.trades.to_string())
+        lines.append(f"Close Capital: {self.final_capital}")
+        lines.append(f"Points Captured: {self.points_captured}")
+        lines.append(f"Profit/Loss: {self.profit_loss_percentage}")
+        return '\n'.join(lines)
+
+    def metrics(self, **options):
+        """
+        Sharpe, Sortino, drawdown, win rate and the other statistics of
+        Evaluation.metrics.performance_metrics, from the mark-to-market equity curve.
+        """
+        from Evaluation.metrics import backtest_metrics
+        initial_capital = self.initial_capital if self.initial_capital is not None else 10000
+        return backtest_metrics(self._frame, initial_capital, position=self.position, **options)
+
+    def figure(self, show_fig=False, max_points=None, **chart_options):
+        """
+        Candlestick chart of the strategy frame with its buy/sell markers.
+
+        Parameters:
+        - show_fig: Open the chart in the browser (default is False).
+        - max_points: Decimate the chart to at most this many candles (default is None, every row
+                      is plotted; e.g. 5000 keeps long backtests responsive).
+        - chart_options: Extra keyword arguments for interactive_candle_chart.
+        """
+        from Charts.candle_chart import interactive_candle_chart
+        return interactive_candle_chart(self.data, show_fig=show_fig, max_points=max_points, **chart_options)
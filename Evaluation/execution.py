@@ -0,0 +1,295 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from Evaluation.backtest_result import BacktestResult
+from Evaluation.strategy_performance import run_strategy
+from Profiling.instrument import stage
+from Strategy.position_engine import njit, HAVE_NUMBA
+
+MARKET = 0
+LIMIT = 1
+STOP = 2
+ORDER_TYPES = {'market': MARKET, 'limit': LIMIT, 'stop': STOP}
+
+# Why a trade was closed
+EXIT_SIGNAL = 0
+EXIT_STOP = 1
+EXIT_TARGET = 2
+EXIT_END = 3
+EXIT_REASONS = ['signal', 'stop', 'target', 'end']
+
+EXECUTION_COLUMNS = ['entry_time', 'exit_time', 'side', 'qty', 'entry_price', 'exit_price', 'pnl', 'fees',
+                     'exit_reason']
+
+
+@njit(cache=True)
+def _execution_kernel(open_, high, low, close, target, order_type, order_price, stop_loss, take_profit,
+                      initial_capital, allocation, lot_size, slippage, fee_rate, fee_fixed,
+                      equity, held, trade_entry_bar, trade_exit_bar, trade_side, trade_qty,
+                      trade_entry_price, trade_exit_price, trade_pnl, trade_fees, trade_reason):
+    """
+    Event loop over bars. Works on flat arrays (or lists) of numbers only, so it can be
+    compiled by numba and allocates nothing per bar.
+
+    An order is placed at the Close of every bar where the target position changes and
+    is worked from the next bar on: a market order fills at the Open, a limit or stop
+    order once the bar's range reaches its price (at the Open if the bar gaps through
+    it). Open positions are closed intrabar when Low/High reach their stop or target;
+    if both are reached in the same bar the stop is assumed to come first.
+    """
+    n = len(close)
+    cash = initial_capital
+    shares = 0.0
+    side = 0
+    entry_price = 0.0
+    entry_bar = 0
+    entry_fees = 0.0
+    stop_level = math.nan
+    target_level = math.nan
+    points = 0.0
+    trades = 0
+
+    pending = False
+    pending_target = 0
+    pending_type = 0
+    pending_price = math.nan
+    previous_target = 0
+
+    for i in range(n):
+        # 1. Work the order placed at the previous Close
+        if pending:
+            buying = pending_target > side
+            fill = math.nan
+            if pending_type == 0:
+                fill = open_[i] * (1 + slippage) if buying else open_[i] * (1 - slippage)
+            elif pending_type == 1:
+                if buying and low[i] <= pending_price:
+                    fill = min(open_[i], pending_price)
+                elif not buying and high[i] >= pending_price:
+                    fill = max(open_[i], pending_price)
+            else:
+                if buying and high[i] >= pending_price:
+                    fill = max(open_[i], pending_price) * (1 + slippage)
+                elif not buying and low[i] <= pending_price:
+                    fill = min(open_[i], pending_price) * (1 - slippage)
+
+            if fill == fill:  # Filled (not NaN)
+                pending = False
+                if side != 0:
+                    fees = fee_fixed + fee_rate * abs(shares) * fill
+                    cash += shares * fill - fees
+                    pnl = (fill - entry_price) * shares - entry_fees - fees
+                    points += (fill - entry_price) * side
+                    trade_entry_bar[trades] = entry_bar
+                    trade_exit_bar[trades] = i
+                    trade_side[trades] = side
+                    trade_qty[trades] = abs(shares)
+                    trade_entry_price[trades] = entry_price
+                    trade_exit_price[trades] = fill
+                    trade_pnl[trades] = pnl
+                    trade_fees[trades] = entry_fees + fees
+                    trade_reason[trades] = 0
+                    trades += 1
+                    shares = 0.0
+                    side = 0
+
+                if pending_target != 0:
+                    qty = math.floor(cash * allocation / (fill * lot_size)) * lot_size
+                    if qty > 0:
+                        side = pending_target
+                        shares = qty * side
+                        entry_fees = fee_fixed + fee_rate * qty * fill
+                        cash -= shares * fill + entry_fees
+                        entry_price = fill
+                        entry_bar = i
+                        if side == 1:
+                            stop_level = fill * (1 - stop_loss)
+                            target_level = fill * (1 + take_profit)
+                        else:
+                            stop_level = fill * (1 + stop_loss)
+                            target_level = fill * (1 - take_profit)
+
+        # 2. Protective stop and target, checked against the bar's range
+        if side != 0:
+            exit_price = math.nan
+            reason = 0
+            if side == 1:
+                if low[i] <= stop_level:
+                    exit_price = min(open_[i], stop_level) * (1 - slippage)
+                    reason = 1
+                elif high[i] >= target_level:
+                    exit_price = max(open_[i], target_level)
+                    reason = 2
+            else:
+                if high[i] >= stop_level:
+                    exit_price = max(open_[i], stop_level) * (1 + slippage)
+                    reason = 1
+                elif low[i] <= target_level:
+                    exit_price = min(open_[i], target_level)
+                    reason = 2
+            if reason != 0:
+                fees = fee_fixed + fee_rate * abs(shares) * exit_price
+                cash += shares * exit_price - fees
+                points += (exit_price - entry_price) * side
+                trade_entry_bar[trades] = entry_bar
+                trade_exit_bar[trades] = i
+                trade_side[trades] = side
+                trade_qty[trades] = abs(shares)
+                trade_entry_price[trades] = entry_price
+                trade_exit_price[trades] = exit_price
+                trade_pnl[trades] = (exit_price - entry_price) * shares - entry_fees - fees
+                trade_fees[trades] = entry_fees + fees
+                trade_reason[trades] = reason
+                trades += 1
+                shares = 0.0
+                side = 0
+
+        # 3. Mark to market at the Close
+        equity[i] = cash + shares * close[i]
+        held[i] = side
+
+        # 4. A change of target places a new order (replacing any unfilled one)
+        if target[i] != previous_target:
+            previous_target = target[i]
+            pending = target[i] != side
+            pending_target = target[i]
+            pending_type = order_type[i]
+            pending_price = order_price[i]
+
+    # A position still open on the last bar is left open and valued at the last Close
+    if side != 0:
+        trade_entry_bar[trades] = entry_bar
+        trade_exit_bar[trades] = -1
+        trade_side[trades] = side
+        trade_qty[trades] = abs(shares)
+        trade_entry_price[trades] = entry_price
+        trade_exit_price[trades] = math.nan
+        trade_pnl[trades] = math.nan
+        trade_fees[trades] = entry_fees
+        trade_reason[trades] = 3
+        trades += 1
+
+    return trades, points
+
+
+def market_orders(data):
+    """
+    Default order callback: trade to the strategy's Position with market orders at the next Open.
+
+    Returns:
+    - (target, order_type, order_price) arrays, one entry per bar.
+    """
+    target = data['Position'].to_numpy()
+    return target, np.full(len(target), MARKET, dtype=np.int8), np.full(len(target), np.nan)
+
+
+def limit_orders(offset=0.001):
+    """
+    Order callback factory: enter at a limit price offset from the signal bar's Close
+    (below it to buy, above it to sell), e.g. to model passive entries.
+    """
+    def callback(data):
+        target = data['Position'].to_numpy()
+        close = data['Close'].to_numpy(dtype=np.float64)
+        buying = target > np.r_[0, target[:-1]]
+        price = np.where(buying, close * (1 - offset), close * (1 + offset))
+        return target, np.full(len(target), LIMIT, dtype=np.int8), price
+    return callback
+
+
+@stage()
+def execute_orders(data, target, order_type, order_price, initial_capital=10000, allocation=1.0, lot_size=1,
+                   stop_loss=None, take_profit=None, slippage=0.0, fee_rate=0.0, fee_fixed=0.0):
+    """
+    Simulate the execution of an order stream bar by bar.
+
+    Parameters:
+    - data: DataFrame with 'Open', 'High', 'Low', 'Close' and a datetime index.
+    - target: Position wanted after every bar (1 long, -1 short, 0 flat). A change places an order.
+    - order_type: Type of the order placed on every bar (MARKET, LIMIT or STOP).
+    - order_price: Limit or stop price of the order placed on every bar (ignored for market orders).
+    - initial_capital: The initial amount of money (default is 10,000).
+    - allocation: Fraction of the account used for every entry (default is 1.0).
+    - lot_size: Quantities are rounded down to whole lots of this size (default is 1 share).
+    - stop_loss, take_profit: Fractional distance of the protective stop and target from
+                              the entry fill (e.g. 0.01 for 1%), None to disable.
+    - slippage: Adverse price move applied to market and stop fills, as a fraction (e.g. 0.0005).
+    - fee_rate, fee_fixed: Brokerage per fill, as a fraction of the traded value plus a fixed amount.
+
+    Returns:
+    - trades: DataFrame with one row per trade (EXECUTION_COLUMNS).
+    - equity: Series with the account value at the Close of every bar.
+    - held: int8 array with the position actually held at the end of every bar.
+    - points_captured: Sum of the price moves captured by the closed trades.
+    """
+    prices = [data[col].to_numpy(dtype=np.float64) for col in ('Open', 'High', 'Low', 'Close')]
+    target = np.asarray(target, dtype=np.int8)
+    order_type = np.asarray(order_type, dtype=np.int8)
+    order_price = np.asarray(order_price, dtype=np.float64)
+    n = len(target)
+
+    # At most one trade per order, plus one left open at the end
+    capacity = int(np.count_nonzero(np.diff(target, prepend=np.int8(0)))) + 1
+    equity = np.empty(n)
+    held = np.empty(n, dtype=np.int8)
+    trade_bars = [np.empty(capacity, dtype=np.int64) for _ in range(2)]
+    trade_side = np.empty(capacity, dtype=np.int8)
+    trade_values = [np.empty(capacity) for _ in range(5)]
+    trade_reason = np.empty(capacity, dtype=np.int8)
+
+    inputs = prices + [target, order_type, order_price]
+    if not HAVE_NUMBA:
+        # The plain Python loop reads Python lists much faster than NumPy scalars
+        inputs = [values.tolist() for values in inputs]
+
+    trades, points = _execution_kernel(
+        *inputs,
+        np.nan if stop_loss is None else float(stop_loss), np.nan if take_profit is None else float(take_profit),
+        float(initial_capital), float(allocation), lot_size, float(slippage), float(fee_rate), float(fee_fixed),
+        equity, held, *trade_bars, trade_side, *trade_values, trade_reason)
+
+    index = data.index
+    entry_bar, exit_bar = trade_bars[0][:trades], trade_bars[1][:trades]
+    # A trade still open on the last bar has no exit
+    exit_time = index[np.maximum(exit_bar, 0)].where(exit_bar >= 0)
+    trades_df = pd.DataFrame({
+        'entry_time': index[entry_bar],
+        'exit_time': exit_time,
+        'side': trade_side[:trades],
+        'qty': trade_values[0][:trades],
+        'entry_price': trade_values[1][:trades],
+        'exit_price': trade_values[2][:trades],
+        'pnl': trade_values[3][:trades],
+        'fees': trade_values[4][:trades],
+        'exit_reason': pd.Categorical.from_codes(trade_reason[:trades], EXIT_REASONS),
+    }, columns=EXECUTION_COLUMNS)
+    return trades_df, pd.Series(equity, index=index, name='Equity'), held, points
+
+
+def execute_strategy(data, strategy, start_date=None, end_date=None, initial_capital=10000, orders=market_orders,
+                     allocation=1.0, lot_size=1, stop_loss=None, take_profit=None, slippage=0.0, fee_rate=0.0,
+                     fee_fixed=0.0, **strategy_params):
+    """
+    Backtest a strategy with the event-driven execution model instead of Close-to-Close fills.
+
+    Parameters:
+    - data, strategy, start_date, end_date, initial_capital, strategy_params: As in strategy_performance.
+    - orders: Callback turning the strategy frame into (target, order_type, order_price)
+              arrays (default is market_orders; see also limit_orders).
+    - allocation, lot_size, stop_loss, take_profit, slippage, fee_rate, fee_fixed: As in execute_orders.
+
+    Returns:
+    - BacktestResult with the strategy frame (plus 'Equity' and 'Held' columns) and the
+      executed trades.
+    """
+    data = run_strategy(data, strategy, start_date, end_date, **strategy_params)
+    target, order_type, order_price = orders(data)
+    trades, equity, held, points = execute_orders(data, target, order_type, order_price, initial_capital,
+                                                  allocation, lot_size, stop_loss, take_profit, slippage,
+                                                  fee_rate, fee_fixed)
+    data = data.assign(Equity=equity.to_numpy(), Held=held)
+    final_capital = equity.iloc[-1] if len(equity) else initial_capital
+    profit_loss_percentage = (final_capital - initial_capital) / initial_capital * 100
+    return BacktestResult(final_capital, profit_loss_percentage, points, data, trades, strategy, initial_capital)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from Evaluation.trade_ledger import equity_curve
+from Profiling.instrument import stage
+
+YEAR = pd.Timedelta(days=365.25)
+
+
+def periods_per_year(index):
+    """Number of bars per calendar year implied by a datetime index (e.g. ~94,000 for NSE minutes)."""
+    if len(index) < 2:
+        return np.nan
+    span = (index[-1] - index[0]) / YEAR
+    return (len(index) - 1) / span if span > 0 else np.nan
+
+
+def drawdowns(equity):
+    """
+    Drawdown of an equity curve on every bar.
+
+    Returns:
+    - drawdown: Fractional distance below the running peak (0 at a new high, negative below it).
+    - peak_bar: Position of the running peak each bar is measured from.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity)
+    bars = np.arange(len(equity))
+    peak_bar = np.maximum.accumulate(np.where(equity >= peak, bars, 0))
+    return equity / peak - 1, peak_bar
+
+
+def trade_returns(equity, position):
+    """
+    Profit and length of every trade, read off the equity curve.
+
+    A trade runs from the bar its position is entered (at the Close) to the next bar
+    where the position changes, or to the last bar if it is still open.
+
+    Returns:
+    - pnl: Change in equity over each trade.
+    - bars: Number of bars each trade was held.
+    - entry_bar: Position of each trade's entry bar.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    position = np.asarray(position)
+    changes = np.flatnonzero(position != np.r_[0, position[:-1]])
+    ends = np.r_[changes[1:], len(position) - 1]
+    held = position[changes] != 0
+    starts, ends = changes[held], ends[held]
+    return equity[ends] - equity[starts], ends - starts, starts
+
+
+def performance_metrics(equity, position=None, index=None, bars_per_year=None, risk_free=0.0):
+    """
+    Performance statistics of an equity curve, computed with whole-array operations.
+
+    Parameters:
+    - equity: Array or Series with the account value at every bar.
+    - position: Optional array of positions (1 long, -1 short, 0 flat) for the trade,
+                exposure, holding time and turnover statistics.
+    - index: Datetime index of the bars (default is the index of equity if it is a Series).
+    - bars_per_year: Bars in a year, for annualizing (default is inferred from the index).
+    - risk_free: Annual risk-free rate as a fraction (default is 0).
+
+    Returns:
+    - Dict with total_return_pct, annual_return_pct, sharpe, sortino, max_drawdown_pct,
+      max_drawdown_bars, max_drawdown_duration, calmar and, with positions, trades,
+      win_rate_pct, profit_factor, exposure_pct, avg_holding_bars, avg_holding_time
+      and turnover (value traded as a multiple of the average account value).
+    """
+    if index is None and isinstance(equity, pd.Series):
+        index = equity.index
+    equity = np.asarray(equity, dtype=np.float64)
+    if bars_per_year is None:
+        bars_per_year = periods_per_year(index) if index is not None else np.nan
+
+    returns = equity[1:] / equity[:-1] - 1
+    excess = returns - risk_free / bars_per_year if risk_free else returns
+    volatility = excess.std(ddof=1) if len(excess) > 1 else np.nan
+    downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2)) if len(excess) else np.nan
+    annualizer = np.sqrt(bars_per_year)
+
+    total_return = equity[-1] / equity[0] - 1 if len(equity) else np.nan
+    years = (len(equity) - 1) / bars_per_year if len(equity) > 1 else np.nan
+    annual_return = (1 + total_return) ** (1 / years) - 1 if years and years > 0 and total_return > -1 else np.nan
+
+    drawdown, peak_bar = drawdowns(equity)
+    under_water = np.arange(len(equity)) - peak_bar
+    worst = drawdown.min() if len(drawdown) else np.nan
+    longest = int(under_water.argmax()) if len(under_water) else 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'total_return_pct': total_return * 100,
+            'annual_return_pct': annual_return * 100,
+            'sharpe': excess.mean() / volatility * annualizer if volatility else np.nan,
+            'sortino': excess.mean() / downside * annualizer if downside else np.nan,
+            'max_drawdown_pct': worst * 100,
+            'max_drawdown_bars': int(under_water[longest]) if len(under_water) else 0,
+            'max_drawdown_duration': (index[longest] - index[peak_bar[longest]]
+                                      if index is not None and len(under_water) else pd.NaT),
+            'calmar': annual_return / -worst if worst < 0 else np.nan,
+        }
+
+    if position is not None:
+        position = np.asarray(position)
+        pnl, bars, entries = trade_returns(equity, position)
+        wins = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        traded = np.abs(np.diff(position, prepend=0)) * equity
+        metrics.update({
+            'trades': len(pnl),
+            'win_rate_pct': np.count_nonzero(pnl > 0) / len(pnl) * 100 if len(pnl) else np.nan,
+            'profit_factor': wins / losses if losses > 0 else (np.inf if wins > 0 else np.nan),
+            'exposure_pct': np.count_nonzero(position) / len(position) * 100 if len(position) else np.nan,
+            'avg_holding_bars': bars.mean() if len(bars) else np.nan,
+            'avg_holding_time': ((index[entries + bars] - index[entries]).mean()
+                                 if index is not None and len(bars) else pd.NaT),
+            'turnover': traded.sum() / equity.mean() if len(equity) else np.nan,
+        })
+    return metrics
+
+
+@stage()
+def backtest_metrics(data, initial_capital=10000, position=None, **options):
+    """
+    Performance statistics of a strategy frame (e.g. BacktestResult.data).
+
+    The equity curve is marked to market from the Close and Position columns with
+    trade_ledger.equity_curve.
+
+    Parameters:
+    - data: DataFrame with 'Close' and 'Position' columns and a datetime index.
+    - initial_capital: The initial amount of money (default is 10,000).
+    - position: Optional Position array to use instead of data's 'Position' column.
+    - options: Extra keyword arguments for performance_metrics.
+    """
+    if position is None:
+        position = data['Position'].to_numpy()
+    equity = equity_curve(data['Close'].to_numpy(), position, initial_capital)
+    return performance_metrics(equity, position, index=data.index, **options)
@@ -0,0 +1,92 @@
+import os
+import time
+from multiprocessing import Pool
+
+import pandas as pd
+
+from Evaluation.parameter_sweep import share_frame, attach_frame, SWEEP_METRICS
+from Evaluation.strategy_performance import strategy_performance
+from Profiling import instrument
+from preprocessing.indicator import ensure_indicators
+from Strategy.registry import strategy_names, get_spec
+
+# Statistics from Evaluation.metrics reported for every strategy, all from the mark-to-market equity curve
+COMPARISON_METRICS = SWEEP_METRICS + ['exposure_pct', 'avg_holding_bars', 'turnover']
+
+# Frame rebuilt from shared memory once per worker process
+_worker_data = None
+_worker_blocks = None
+
+
+def _evaluate_strategy(data, strategy, params, start_date, end_date, initial_capital):
+    """One strategy's row of the comparison table."""
+    start = time.perf_counter()
+    result = strategy_performance(data, strategy, start_date, end_date, initial_capital, mode='headless', **params)
+    metrics = result.metrics()
+    return dict(strategy=strategy, final_equity=initial_capital * (1 + metrics['total_return_pct'] / 100),
+                trades=int(metrics['trades']), **{name: float(metrics[name]) for name in COMPARISON_METRICS},
+                seconds=time.perf_counter() - start)
+
+
+def _init_worker(spec, instrumentation):
+    global _worker_data, _worker_blocks
+    instrument.worker_setup(*instrumentation)
+    _worker_blocks, _worker_data = attach_frame(spec)
+
+
+def _run_strategy(task):
+    # The worker's stage records travel back with its row (see instrument.collect)
+    return _evaluate_strategy(_worker_data, *task), instrument.collect()
+
+
+def compare_strategies(data, strategies=None, start_date=None, end_date=None, initial_capital=10000,
+                       processes=None, strategy_params=None, rank_by='total_return_pct'):
+    """
+    Backtest several strategies over the same data and compare them side by side.
+
+    The indicators every strategy needs are added once, then the frame is placed in
+    shared memory and the strategies run in parallel on read-only views of it, so the
+    total time is close to that of the slowest strategy rather than their sum.
+
+    Parameters:
+    - data: DataFrame with 'Close' price and a datetime index.
+    - strategies: Strategy names to compare (default is every registered strategy).
+    - start_date, end_date: Backtest range, as in strategy_performance.
+    - initial_capital: The initial amount of money for each backtest (default is 10,000).
+    - processes: Number of worker processes (default is one per strategy, up to the
+                 number of CPU cores; 1 runs in this process).
+    - strategy_params: Optional dict mapping strategy names to keyword arguments for that strategy.
+    - rank_by: Column used to order the strategies (default is 'total_return_pct'; any of
+               COMPARISON_METRICS such as 'sharpe' also works, None keeps the given order).
+
+    Returns:
+    - DataFrame indexed by strategy with the final equity, the number of trades (position
+      changes into a long or short), COMPARISON_METRICS and the seconds each backtest took.
+      Every figure comes from the mark-to-market equity curve.
+    """
+    strategies = list(strategies) if strategies is not None else strategy_names()
+    strategy_params = strategy_params or {}
+    indicators = list(dict.fromkeys(col for name in strategies for col in get_spec(name).indicators))
+    data = ensure_indicators(data, indicators)
+
+    tasks = [(name, strategy_params.get(name, {}), start_date, end_date, initial_capital) for name in strategies]
+    if processes is None:
+        processes = min(len(tasks), os.cpu_count() or 1)
+    if processes <= 1:
+        rows = [_evaluate_strategy(data, *task) for task in tasks]
+    else:
+        shm, spec = share_frame(data)
+        try:
+            with Pool(processes, initializer=_init_worker, initargs=(spec, instrument.settings())) as pool:
+                rows = []
+                for row, records in pool.map(_run_strategy, tasks):
+                    instrument.merge(records)
+                    rows.append(row)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame(rows).set_index('strategy')
+    if rank_by is not None and len(table):
+        table = table.sort_values(rank_by, ascending=False)
+    return table
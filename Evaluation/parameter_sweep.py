@@ -0,0 +1,167 @@
+import itertools
+import json
+import os
+from multiprocessing import Pool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from Evaluation.strategy_performance import strategy_performance
+from Profiling import instrument
+
+# Statistics from Evaluation.metrics reported for every combination (any of them can be rank_by).
+# They all come from the mark-to-market equity curve, unlike final_capital, pnl and points,
+# which are the trade ledger's summary (see trade_ledger)
+SWEEP_METRICS = ['total_return_pct', 'sharpe', 'sortino', 'max_drawdown_pct', 'calmar', 'win_rate_pct', 'profit_factor']
+
+# Frame rebuilt from shared memory once per worker process
+_worker_data = None
+_worker_blocks = None
+
+
+def share_frame(data):
+    """
+    Copy the numeric columns and the datetime index of a frame into one shared memory block.
+
+    Parameters:
+    - data: DataFrame with a datetime index and numeric columns.
+
+    Returns:
+    - shm: The SharedMemory block (the caller must close and unlink it).
+    - spec: Picklable description of the block used by attach_frame.
+    """
+    index = data.index.as_unit('ns')
+    arrays = [('__index__', index.asi8)] + [(col, data[col].to_numpy()) for col in data.columns]
+
+    # Lay the columns out back to back, each aligned to 8 bytes
+    layout = []
+    offset = 0
+    for name, values in arrays:
+        layout.append((name, values.dtype.str, offset))
+        offset += -(-values.nbytes // 8) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, start), (_, values) in zip(layout, arrays):
+        np.ndarray(len(values), dtype=dtype, buffer=shm.buf, offset=start)[:] = values
+
+    spec = {
+        'name': shm.name,
+        'length': len(data),
+        'layout': layout,
+        'tz': str(index.tz) if index.tz is not None else None,
+        'index_name': index.name,
+    }
+    return shm, spec
+
+
+def attach_frame(spec):
+    """
+    Rebuild a read-only DataFrame on top of a block created by share_frame, without copying.
+
+    Returns:
+    - shm: The attached SharedMemory block (keep a reference while the frame is in use).
+    - data: DataFrame whose columns are views into the shared block.
+    """
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    columns = {}
+    index = None
+    for name, dtype, start in spec['layout']:
+        values = np.ndarray(spec['length'], dtype=dtype, buffer=shm.buf, offset=start)
+        values.flags.writeable = False
+        if name == '__index__':
+            index = pd.DatetimeIndex(values.view('datetime64[ns]'), name=spec['index_name'])
+            if spec['tz'] is not None:
+                index = index.tz_localize('UTC').tz_convert(spec['tz'])
+        else:
+            columns[name] = values
+
+    data = pd.DataFrame({name: pd.Series(values, index=index, copy=False)
+                         for name, values in columns.items()}, copy=False)
+    return shm, data
+
+
+def _init_worker(spec, instrumentation):
+    global _worker_data, _worker_blocks
+    instrument.worker_setup(*instrumentation)
+    _worker_blocks, _worker_data = attach_frame(spec)
+
+
+def _run_combination(task):
+    strategy, params, start_date, end_date, initial_capital = task
+    # Strategies read views of the shared frame and leave it unmodified
+    result = strategy_performance(_worker_data, strategy, start_date, end_date, initial_capital, mode='headless',
+                                  **params)
+    metrics = result.metrics()
+    row = dict(params, final_capital=float(result.final_capital), pnl=float(result.profit_loss_percentage),
+               points=float(result.points_captured), trades=int(metrics['trades']),
+               **{name: float(metrics[name]) for name in SWEEP_METRICS})
+    # The worker's stage records travel back with the row (see instrument.collect)
+    return row, instrument.collect()
+
+
+def _param_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def parameter_grid(grid):
+    """Expand {'param': [values, ...]} into a list of parameter dicts (cartesian product)."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def parameter_sweep(data, strategy, grid, start_date=None, end_date=None, initial_capital=10000,
+                    processes=None, checkpoint=None, rank_by='total_return_pct'):
+    """
+    Backtest every combination of a parameter grid across a pool of worker processes.
+
+    The frame is placed in shared memory once, so workers read the same prices and
+    indicators instead of receiving a pickled copy per task.
+
+    Parameters:
+    - data: DataFrame with 'Close' price and strategy-specific columns.
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - grid: Dict mapping strategy parameter names to lists of values to try.
+    - start_date, end_date: Backtest range, as in strategy_performance.
+    - initial_capital: The initial amount of money for each backtest (default is 10,000).
+    - processes: Number of worker processes (default is one per CPU core).
+    - checkpoint: Optional CSV path. Finished combinations are appended as they complete
+                  and skipped when the sweep is started again.
+    - rank_by: Result column used to rank the combinations (default is 'total_return_pct',
+               the equity curve's return; any of SWEEP_METRICS such as 'sharpe' or
+               'calmar' also works).
+
+    Returns:
+    - DataFrame with one row per combination (parameters, final_capital, pnl, points,
+      trades and SWEEP_METRICS), best first. final_capital, pnl and points are the trade
+      ledger's accounting; trades and SWEEP_METRICS come from the equity curve.
+    """
+    combinations = parameter_grid(grid)
+
+    done = []
+    if checkpoint is not None and os.path.exists(checkpoint):
+        previous = pd.read_csv(checkpoint)
+        done = previous.to_dict('records')
+        finished = {_param_key({name: row[name] for name in grid}) for row in done}
+        combinations = [params for params in combinations if _param_key(params) not in finished]
+
+    results = list(done)
+    if combinations:
+        shm, spec = share_frame(data)
+        try:
+            tasks = [(strategy, params, start_date, end_date, initial_capital) for params in combinations]
+            with Pool(processes, initializer=_init_worker, initargs=(spec, instrument.settings())) as pool:
+                for row, records in pool.imap_unordered(_run_combination, tasks):
+                    instrument.merge(records)
+                    results.append(row)
+                    if checkpoint is not None:
+                        pd.DataFrame([row]).to_csv(checkpoint, mode='a', index=False,
+                                                   header=not os.path.exists(checkpoint))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(results)
+    if results.empty:
+        return results
+    return results.sort_values(rank_by, ascending=False, ignore_index=True)
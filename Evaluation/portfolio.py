@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.universe import field_panel, universe_frame
+from Strategy.registry import get_spec, get_panel_strategy
+
+SYMBOL_COLUMNS = ['trades', 'exposure_pct', 'contribution_pct']
+
+
+def portfolio_positions(universe, strategy, **strategy_params):
+    """
+    Run a strategy over every symbol of a universe at once.
+
+    Parameters:
+    - universe: Universe from preprocessing.universe.
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - strategy_params: Keyword arguments passed on to the strategy.
+
+    Returns:
+    - (time x symbol) int8 Position array; symbols are flat wherever they have no price yet.
+    """
+    spec = get_spec(strategy)
+    strategy_params = dict(spec.defaults, **strategy_params)
+    panel = {field: universe_frame(universe, field) for field in universe.fields}
+    position = np.asarray(get_panel_strategy(strategy)(panel, **strategy_params), dtype=np.int8)
+    position[np.isnan(field_panel(universe, 'Close'))] = 0
+    return position
+
+
+def portfolio_backtest(universe, strategy, start_date=None, end_date=None, initial_capital=10000,
+                       allocation='equal', **strategy_params):
+    """
+    Backtest a strategy across all symbols of a universe with one shared pool of capital.
+
+    The strategy runs once over the (time x symbol) prices, and the account is
+    evaluated for all symbols together. Positions change at the Close of the bar that
+    signals them, like strategy_performance. Capital is split between the symbols by
+    weight and rebalanced every bar (fractional shares), so returns compound at
+    portfolio level.
+
+    Parameters:
+    - universe: Universe from preprocessing.universe.
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - start_date: Start date of the backtest in 'yyyy-mm-dd'. Earlier rows only warm up the strategy.
+    - end_date: End date of the backtest in 'yyyy-mm-dd'. Default is the last date in the data.
+    - initial_capital: The initial amount of money for the whole portfolio (default is 10,000).
+    - allocation: 'equal' gives every symbol the same fixed weight; 'active' splits the
+                  capital equally between the symbols holding a position.
+    - strategy_params: Keyword arguments passed on to the strategy.
+
+    Returns:
+    - symbols: DataFrame with one row per symbol (trades, exposure_pct and
+               contribution_pct, the symbol's profit as a percentage of initial_capital).
+    - equity: Series with the portfolio value at the Close of every bar.
+    """
+    if allocation not in ('equal', 'active'):
+        raise ValueError("Invalid allocation. Choose from 'equal', 'active'")
+
+    position = portfolio_positions(universe, strategy, **strategy_params)
+    close = field_panel(universe, 'Close')
+
+    first = 0 if start_date is None else universe.index.searchsorted(pd.Timestamp(start_date), side='left')
+    last = len(universe.index) if end_date is None else universe.index.searchsorted(pd.Timestamp(end_date), side='right')
+    index = universe.index[first:last]
+    position = position[first:last]
+    close = close[first:last]
+
+    # Return of every symbol on every bar, earned by the position held at the previous Close
+    returns = np.zeros(close.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[1:] = close[1:] / close[:-1] - 1
+    returns[~np.isfinite(returns)] = 0
+    held = np.zeros(position.shape)
+    held[1:] = position[:-1]
+
+    if allocation == 'equal':
+        weights = np.full(held.shape, 1 / max(close.shape[1], 1))
+    else:
+        active = np.count_nonzero(held, axis=1)[:, None]
+        weights = np.where(held != 0, 1 / np.maximum(active, 1), 0)
+
+    # Each symbol's share of the portfolio return on every bar
+    contributions = weights * held * returns
+    equity = initial_capital * np.cumprod(1 + contributions.sum(axis=1))
+    previous_equity = np.r_[initial_capital, equity[:-1]]
+
+    entries = (position != 0) & (position != np.vstack([np.zeros((1, position.shape[1])), position[:-1]]))
+    symbols = pd.DataFrame({
+        'trades': np.count_nonzero(entries, axis=0),
+        'exposure_pct': np.count_nonzero(position, axis=0) / max(len(position), 1) * 100,
+        'contribution_pct': (previous_equity[:, None] * contributions).sum(axis=0) / initial_capital * 100,
+    }, index=pd.Index(universe.symbols, name='symbol'), columns=SYMBOL_COLUMNS)
+    return symbols, pd.Series(equity, index=index, name='equity')
@@ -1,27 +1,41 @@
-from Strategy.SMA_strategy import sma_strategy
-from Strategy.BB_strategy import bollinger_band_strategy
-from Charts.candle_chart import interactive_candle_chart
-from Strategy.Intraday_gap_strategy import intraday_gap_strategy
-from Strategy.RSI_strategy import rsi_strategy
-from Strategy.MACD_crossover_strategy import macd_strategy
-from Strategy.Mean_reversion_strategy import mean_reversion_strategy
-from Strategy.Trend_following_breakout_strategy import breakout_strategy
-from Strategy.multi_indicator_strategy import multi_indicator_strategy
-
-def strategy_performance(data, strategy, start_date=None, end_date=None, initial_capital=10000):
+import numpy as np
+import pandas as pd
+from Evaluation.backtest_result import BacktestResult
+from Evaluation.trade_ledger import trade_ledger
+from preprocessing.indicator import ensure_indicators
+from Profiling.instrument import measure
+from Strategy.registry import get_spec, get_strategy, get_signal_strategy
+from Strategy.signals import StrategyColumns, join_signals
+
+
+def strategy_signals(data, strategy, start_date=None, end_date=None, **strategy_params):
     """
-    Backtesting of a selected strategy over a specific date range with support for long and short positions.
+    Run a strategy by name over a specific date range without building its frame.
+
+    The strategy reads read-only views of the columns (see Strategy.signals), so the
+    caller's frame is neither copied nor modified, and any number of strategies can
+    run over the same frame. Strategies registered without a signals function run
+    through their DataFrame function instead.
 
     Parameters:
     - data: DataFrame with 'Close' price and strategy-specific columns.
     - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
-    - start_date: Start date of the backtest in 'yyyy-mm-dd'. Default is the first date in the data.
-    - end_date: End date of the backtest in 'yyyy-mm-dd'. Default is the last date in the data.
-    - initial_capital: The initial amount of money for backtesting (default is 10,000).
+    - start_date: Start date in 'yyyy-mm-dd'. Default is the first date in the data.
+    - end_date: End date in 'yyyy-mm-dd'. Default is the last date in the data.
+    - strategy_params: Keyword arguments passed on to the strategy function.
 
     Returns:
-    - Final capital, Profit/Loss percentage, and points captured by the strategy.
+    - data: The date range of the frame (a view), with any missing indicator columns added.
+    - position: int8 Position array for the date range.
+    - diagnostics: Dict of the extra columns the strategy computed (e.g. 'RSI'),
+                   joined onto the frame only when asked for (see join_signals).
     """
+    spec = get_spec(strategy)
+    strategy_params = dict(spec.defaults, **strategy_params)
+
+    # Add any indicator the strategy needs that the data does not have yet,
+    # before slicing so the lookback window is warmed up
+    data = ensure_indicators(data, spec.indicators)
 
     # Set default start and end dates if not provided
     if start_date is None:
@@ -29,67 +43,71 @@ def strategy_performance(data, strategy, start_date=None, end_date=None, initial
     if end_date is None:
         end_date = data.index.max()
 
-    # Filter data based on the selected date range
-    data = data[(data.index >= start_date) & (data.index <= end_date)]
-
-    # Apply the selected strategy
-    if strategy == 'sma':
-        data = sma_strategy(data)
-    elif strategy == 'bb':
-        data = bollinger_band_strategy(data)
-    elif strategy == 'rsi':
-        data = rsi_strategy(data)
-    elif strategy == 'macd':
-        data = macd_strategy(data)
-    elif strategy == 'idg':
-        data = intraday_gap_strategy(data)
-    elif strategy == 'tfb':
-        data = breakout_strategy(data)
-    elif strategy == 'mr':
-        data = mean_reversion_strategy(data)
-    elif strategy == 'mis':
-        data = multi_indicator_strategy(data)
-    else:
-        raise ValueError("Invalid strategy. Choose from 'sma', 'bb', 'rsi', 'macd', 'idg', 'tfb', 'mr','mis,")
+    # Filter data based on the selected date range (a positional slice, the index is sorted)
+    first = data.index.searchsorted(pd.Timestamp(start_date), side='left')
+    last = data.index.searchsorted(pd.Timestamp(end_date), side='right')
+    data = data.iloc[first:last]
+
+    # Apply the selected strategy, importing its module on first use
+    signals = get_signal_strategy(strategy)
+    with measure(f'strategy {strategy}', rows=len(data)):
+        if signals is not None:
+            position, diagnostics = signals(StrategyColumns(data), **strategy_params)
+        else:
+            frame = get_strategy(strategy)(data, **strategy_params)
+            position = frame['Position'].to_numpy(dtype=np.int8)
+            diagnostics = {col: frame[col].to_numpy() for col in frame.columns
+                           if col not in data.columns and col != 'Position'}
+    return data, position, diagnostics
+
+
+def run_strategy(data, strategy, start_date=None, end_date=None, **strategy_params):
+    """
+    Apply a strategy by name over a specific date range.
+
+    Parameters:
+    - data, strategy, start_date, end_date, strategy_params: As in strategy_signals.
+
+    Returns:
+    - New DataFrame for the date range with the strategy's diagnostic columns and its
+      'Position' column (data is not modified).
+    """
+    return join_signals(*strategy_signals(data, strategy, start_date, end_date, **strategy_params))
+
+
+def strategy_performance(data, strategy, start_date=None, end_date=None, initial_capital=10000, mode='interactive',
+                         **strategy_params):
+    """
+    Backtesting of a selected strategy over a specific date range with support for long and short positions.
+
+    Parameters:
+    - data: DataFrame with 'Close' price and strategy-specific columns.
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - start_date: Start date of the backtest in 'yyyy-mm-dd'. Default is the first date in the data.
+    - end_date: End date of the backtest in 'yyyy-mm-dd'. Default is the last date in the data.
+    - initial_capital: The initial amount of money for backtesting (default is 10,000).
+    - mode: 'interactive' prints the last rows and opens the chart in the browser,
+            'headless' only evaluates (for batch runs and sweeps).
+    - strategy_params: Keyword arguments passed on to the strategy function (e.g., lookback=30).
+
+    Returns:
+    - BacktestResult that unpacks to final capital, Profit/Loss percentage and points captured,
+      with the strategy frame, the trade ledger, report() and figure() available on demand.
+    """
+    if mode not in ('interactive', 'headless'):
+        raise ValueError("Invalid mode. Choose from 'interactive', 'headless'")
+
+    data, position, diagnostics = strategy_signals(data, strategy, start_date, end_date, **strategy_params)
+
+    # Evaluate performance trade by trade from the Position changes
+    trades, final_capital, profit_loss_percentage, points_captured = trade_ledger(data, initial_capital, position)
+    # The strategy frame is only joined when the result's data is used (report, figure)
+    result = BacktestResult(final_capital, profit_loss_percentage, points_captured, data, trades, strategy,
+                            initial_capital, signals=(position, diagnostics))
 
     # Display interactive chart
-    print(data.tail(50))
-    fig = interactive_candle_chart(data, show_fig=True)
-
-    # Initialize capital and position tracking
-    capital = initial_capital
-    position = 0  # Tracks the number of shares in long or short
-    entry_price = 0  # Tracks the price at which position was entered
-    points_captured = 0
-
-    # Evaluate performance based on Position changes
-    for i in range(1, len(data)):
-        # Check for position change
-        if data['Position'].iloc[i] != data['Position'].iloc[i - 1]:
-            # Closing an existing position (either long or short)
-            if position != 0:
-                exit_price = data['Close'].iloc[i]
-                if position > 0:  # Long position
-                    profit = (exit_price - entry_price) * position
-                elif position < 0:  # Short position
-                    profit = (entry_price - exit_price) * abs(position)
-                
-                capital += profit
-                points_captured += profit/position
-                position = 0  # Reset position after closing
-
-            # Entering a new position (long or short)
-            if data['Position'].iloc[i] == 1:  # Enter long position
-                entry_price = data['Close'].iloc[i]
-                position = capital // entry_price  # Buy as many shares as possible
-                capital -= position * entry_price  # Deduct cost of shares
-
-            elif data['Position'].iloc[i] == -1:  # Enter short position
-                entry_price = data['Close'].iloc[i]
-                position = - (capital // entry_price)  # Short as many shares as possible
-
-    # Final capital after closing any open positions at the last price
-    final_capital = capital + (position * data['Close'].iloc[-1])
-    profit_loss_percentage = ((final_capital - initial_capital) / initial_capital) * 100
-
-    return final_capital, profit_loss_percentage, points_captured
+    if mode == 'interactive':
+        print(result.data.tail(50))
+        result.figure(show_fig=True)
+
+    return result
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from Profiling.instrument import stage
+
+LEDGER_COLUMNS = ['entry_time', 'exit_time', 'side', 'qty', 'entry_price', 'exit_price', 'pnl']
+
+
+@stage()
+def trade_ledger(data, initial_capital=10000, position=None):
+    """
+    Evaluate a Position column trade by trade instead of bar by bar.
+
+    Capital only changes when the position changes, so only those bars are visited:
+    an open position is closed at the Close of the transition bar and the new
+    position (if any) is opened at the same price with as many shares as the
+    capital allows.
+
+    Parameters:
+    - data: DataFrame with 'Close' and 'Position' columns and a datetime index.
+    - initial_capital: The initial amount of money for backtesting (default is 10,000).
+    - position: Optional Position array to use instead of data's 'Position' column.
+
+    Returns:
+    - trades: DataFrame with one row per trade (entry_time, exit_time, side, qty,
+              entry_price, exit_price, pnl). A trade still open on the last bar has
+              no exit_time, exit_price or pnl.
+    - final_capital, profit_loss_percentage, points_captured: Same values as the
+      summary returned by strategy_performance.
+    """
+    position_values = data['Position'].to_numpy() if position is None else np.asarray(position)
+    # Accounting is done in float64 even when prices are stored as float32
+    close = data['Close'].to_numpy(dtype=np.float64)
+    index = data.index
+
+    # Bars where the position differs from the previous bar
+    transitions = np.flatnonzero(np.diff(position_values)) + 1
+
+    capital = initial_capital
+    position = 0  # Number of shares held, negative when short
+    entry_price = 0
+    entry_bar = 0
+    points_captured = 0
+    rows = []
+
+    for i in transitions:
+        # Closing an existing position (either long or short)
+        if position != 0:
+            exit_price = close[i]
+            if position > 0:  # Long position
+                profit = (exit_price - entry_price) * position
+            else:  # Short position
+                profit = (entry_price - exit_price) * abs(position)
+
+            capital += profit
+            points_captured += profit / position
+            rows.append((index[entry_bar], index[i], 1 if position > 0 else -1, abs(position),
+                         entry_price, exit_price, profit))
+            position = 0
+
+        # Entering a new position (long or short)
+        if position_values[i] == 1:
+            entry_price = close[i]
+            entry_bar = i
+            position = capital // entry_price  # Buy as many shares as possible
+            capital -= position * entry_price  # Deduct cost of shares
+        elif position_values[i] == -1:
+            entry_price = close[i]
+            entry_bar = i
+            position = -(capital // entry_price)  # Short as many shares as possible
+
+    # A position still open on the last bar is valued at the last Close
+    if position != 0:
+        rows.append((index[entry_bar], pd.NaT, 1 if position > 0 else -1, abs(position),
+                     entry_price, np.nan, np.nan))
+
+    final_capital = capital + (position * close[-1])
+    profit_loss_percentage = ((final_capital - initial_capital) / initial_capital) * 100
+
+    trades = pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+    return trades, final_capital, profit_loss_percentage, points_captured
+
+
+def equity_curve(close, position, initial_capital=10000):
+    """
+    Mark-to-market account value on every bar for a position series.
+
+    Whenever the position changes (including a position already held on the first
+    bar) the open shares are closed at that bar's Close and, if the new position is
+    not flat, as many whole shares as the account value allows are bought or sold
+    short at the same price. Short sale proceeds are credited to cash, so the value
+    of the account is always cash plus shares times Close.
+
+    Parameters:
+    - close: Array or Series of Close prices.
+    - position: Array or Series of positions (1 long, -1 short, 0 flat).
+    - initial_capital: The initial amount of money (default is 10,000).
+
+    Returns:
+    - float64 array with the account value at the Close of every bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = np.asarray(position)
+    if len(close) == 0:
+        return close
+
+    # Bars where the position differs from the previous bar (flat before the first)
+    changes = np.flatnonzero(position != np.r_[0, position[:-1]])
+
+    # Cash and shares after each change; entry 0 is the state before any trade
+    cash = np.empty(len(changes) + 1)
+    shares = np.empty(len(changes) + 1)
+    cash[0], shares[0] = initial_capital, 0.0
+    held_cash, held_shares = float(initial_capital), 0.0
+    for k, i in enumerate(changes, 1):
+        price = close[i]
+        held_cash += held_shares * price
+        held_shares = 0.0
+        if position[i] != 0:
+            held_shares = np.sign(position[i]) * max(held_cash // price, 0)
+            held_cash -= held_shares * price
+        cash[k], shares[k] = held_cash, held_shares
+
+    segment = np.searchsorted(changes, np.arange(len(close)), side='right')
+    return cash[segment] + shares[segment] * close
@@ -0,0 +1,173 @@
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from Evaluation.parameter_sweep import share_frame, attach_frame, parameter_grid
+from Evaluation.strategy_performance import strategy_signals
+from Evaluation.trade_ledger import equity_curve
+from preprocessing.indicator import ensure_indicators
+from Profiling import instrument
+from Strategy.registry import get_spec
+
+WINDOW_COLUMNS = ['window', 'train_start', 'test_start', 'test_end', 'bars', 'trades', 'return_pct',
+                  'max_drawdown_pct']
+
+# Frame rebuilt from shared memory once per worker process
+_worker_data = None
+_worker_blocks = None
+
+
+def walk_forward_windows(index, train, test, step=None):
+    """
+    Split a sorted datetime index into rolling train/test windows.
+
+    Windows start at the first timestamp and move forward by step. Each test window
+    directly follows its train window; the last one may be shorter than test.
+
+    Parameters:
+    - index: Sorted DatetimeIndex of the data.
+    - train, test, step: Window lengths as timedelta strings (e.g., '60D', '20D').
+                         step defaults to test, so the test windows do not overlap.
+
+    Returns:
+    - List of (train_lo, test_lo, test_hi) row positions; the train window is rows
+      train_lo:test_lo and the test window rows test_lo:test_hi.
+    """
+    train = pd.Timedelta(train)
+    test = pd.Timedelta(test)
+    step = test if step is None else pd.Timedelta(step)
+    if train <= pd.Timedelta(0) or test <= pd.Timedelta(0) or step <= pd.Timedelta(0):
+        raise ValueError("train, test and step must be positive durations")
+    if len(index) == 0:
+        return []
+
+    windows = []
+    start = index[0]
+    while True:
+        train_lo = index.searchsorted(start, 'left')
+        test_lo = index.searchsorted(start + train, 'left')
+        test_hi = index.searchsorted(start + train + test, 'left')
+        if test_lo >= len(index):
+            break
+        if test_hi > test_lo:
+            windows.append((int(train_lo), int(test_lo), int(test_hi)))
+        start += step
+    return windows
+
+
+def _best_params(data, strategy, grid, strategy_params, initial_capital):
+    """Parameters from the grid with the highest final equity on the train rows."""
+    best, best_value = None, -np.inf
+    for params in parameter_grid(grid):
+        params = dict(strategy_params, **params)
+        positions = strategy_signals(data, strategy, **params)[1]
+        value = equity_curve(data['Close'], positions, initial_capital)[-1]
+        if best is None or value > best_value:
+            best, best_value = params, value
+    return best
+
+
+def _evaluate_window(data, strategy, window, strategy_params, grid, initial_capital):
+    """
+    Run one window on views of the full frame.
+
+    The strategy runs over the train and test rows together, so its own lookbacks are
+    warmed up by the train rows, and only the test rows are evaluated.
+    """
+    train_lo, test_lo, test_hi = window
+    params = strategy_params
+    if grid:
+        params = _best_params(data.iloc[train_lo:test_lo], strategy, grid, strategy_params, initial_capital)
+
+    positions = strategy_signals(data.iloc[train_lo:test_hi], strategy, **params)[1]
+    positions = positions[test_lo - train_lo:]
+    equity = equity_curve(data['Close'].to_numpy()[test_lo:test_hi], positions, initial_capital)
+    return params, positions, equity
+
+
+def _init_worker(spec, instrumentation):
+    global _worker_data, _worker_blocks
+    instrument.worker_setup(*instrumentation)
+    _worker_blocks, _worker_data = attach_frame(spec)
+
+
+def _run_window(task):
+    strategy, window, strategy_params, grid, initial_capital = task
+    result = _evaluate_window(_worker_data, strategy, window, strategy_params, grid, initial_capital)
+    # The worker's stage records travel back with the result (see instrument.collect)
+    return result, instrument.collect()
+
+
+def walk_forward(data, strategy, train, test, step=None, grid=None, initial_capital=10000, processes=None,
+                 **strategy_params):
+    """
+    Walk-forward backtest: evaluate a strategy on rolling out-of-sample windows.
+
+    Indicators are added once over the whole frame, and every window works on views of
+    it. With a grid, the best parameters on each train window (by final equity) are
+    used on the following test window. Windows run in parallel across worker processes
+    that share the frame through shared memory.
+
+    Parameters:
+    - data: DataFrame with 'Close' price, a sorted datetime index and strategy-specific columns.
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - train, test, step: Window lengths as timedelta strings (see walk_forward_windows).
+    - grid: Optional dict mapping parameter names to lists of values to optimize on each train window.
+    - initial_capital: Capital at the start of every test window (default is 10,000).
+    - processes: Number of worker processes (default is one per CPU core, 1 runs in this process).
+    - strategy_params: Keyword arguments passed on to the strategy function.
+
+    Returns:
+    - windows: DataFrame with one row per window (dates, bars, trades, return and maximum
+               drawdown of the test window, and the parameters used).
+    - equity: Series of the account value over the test windows, compounded from one
+              window to the next (each window is cut where the next one starts).
+    """
+    spec = get_spec(strategy)
+    strategy_params = dict(spec.defaults, **strategy_params)
+    data = ensure_indicators(data, spec.indicators)
+    windows = walk_forward_windows(data.index, train, test, step)
+    if not windows:
+        return pd.DataFrame(columns=WINDOW_COLUMNS), pd.Series(dtype=np.float64)
+
+    tasks = [(strategy, window, strategy_params, grid, initial_capital) for window in windows]
+    if processes == 1:
+        results = [_evaluate_window(data, *task) for task in tasks]
+    else:
+        shm, shared = share_frame(data)
+        try:
+            with Pool(processes, initializer=_init_worker, initargs=(shared, instrument.settings())) as pool:
+                results = []
+                for result, records in pool.map(_run_window, tasks):
+                    instrument.merge(records)
+                    results.append(result)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    rows = []
+    pieces = []
+    scale = 1.0
+    for number, ((train_lo, test_lo, test_hi), (params, positions, equity)) in enumerate(zip(windows, results)):
+        peak = np.maximum.accumulate(equity)
+        rows.append(dict({
+            'window': number,
+            'train_start': data.index[train_lo],
+            'test_start': data.index[test_lo],
+            'test_end': data.index[test_hi - 1],
+            'bars': test_hi - test_lo,
+            'trades': int(np.count_nonzero((positions != np.r_[0, positions[:-1]]) & (positions != 0))),
+            'return_pct': (equity[-1] / initial_capital - 1) * 100,
+            'max_drawdown_pct': ((equity - peak) / peak).min() * 100,
+        }, **params))
+
+        # Stitch: keep this window up to where the next test window starts
+        end = windows[number + 1][1] if number + 1 < len(windows) else test_hi
+        kept = equity[:max(min(end, test_hi) - test_lo, 0)]
+        pieces.append(pd.Series(kept / initial_capital * scale, index=data.index[test_lo:test_lo + len(kept)]))
+        if len(kept):
+            scale *= kept[-1] / initial_capital
+
+    equity = pd.concat(pieces) * initial_capital
+    return pd.DataFrame(rows), equity
@@ -1,3 +1,5 @@
+import numpy as np
+
 def performance(after_practice_data):
     """
     Calculate the performance metrics (PnL, returns) from the buy/sell actions in the data.
@@ -9,16 +11,17 @@ def performance(after_practice_data):
     - results: Dictionary with total PnL, total returns, and number of trades.
     """
     buy_sell_data = after_practice_data.dropna(subset=['Buy/Sell'])
-    
+    signals = buy_sell_data['Buy/Sell'].to_numpy()
+    close = buy_sell_data['Close'].to_numpy()
+
+    # Every Buy directly followed by a Sell is one round trip
+    round_trips = (signals[:-1] == 1) & (signals[1:] == -1)
+    trades = int(np.count_nonzero(round_trips))
     pnl = 0
-    trades = 0
-    for i in range(1, len(buy_sell_data)):
-        current_signal = buy_sell_data['Buy/Sell'].iloc[i-1]
-        next_signal = buy_sell_data['Buy/Sell'].iloc[i]
-        if current_signal == 1 and next_signal == -1:  # Buy -> Sell
-            pnl += buy_sell_data['Close'].iloc[i] - buy_sell_data['Close'].iloc[i-1]
-            trades += 1
-    
+    if trades:
+        # Accumulated left to right, like a running total, so the sum matches it exactly
+        pnl = np.add.accumulate((close[1:] - close[:-1])[round_trips])[-1]
+
     total_returns = pnl / buy_sell_data['Close'].iloc[0] * 100  # Percentage returns
 
     results = {
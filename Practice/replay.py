@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from Evaluation.trade_ledger import LEDGER_COLUMNS
+from preprocessing.data_ingest import load_cleaned_data
+from preprocessing.streaming import (StreamingSMA, StreamingEMA, StreamingRSI, StreamingBollingerBands,
+                                     StreamingMACD, StreamingATR, StreamingGarmanKlass)
+from Strategy.registry import get_spec, get_stream_strategy
+
+# Fields of a bar as the sources below yield it (plus its 'Date' timestamp)
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Per-bar latencies kept for the statistics (the most recent ones)
+LATENCY_SAMPLES = 100000
+
+
+def streaming_indicators():
+    """
+    The indicator set of preprocessing.indicator with its default parameters, as
+    (columns, streaming indicator) pairs.
+    """
+    return [
+        (('SMA',), StreamingSMA()),
+        (('EMA',), StreamingEMA()),
+        (('RSI',), StreamingRSI()),
+        (('MiddleBand', 'UpperBand', 'LowerBand'), StreamingBollingerBands()),
+        (('MACD', 'Signal'), StreamingMACD()),
+        (('ATR',), StreamingATR()),
+        (('GK',), StreamingGarmanKlass()),
+    ]
+
+
+def frame_bars(data, delay=0.0):
+    """
+    Bars of a cleaned frame, one dict ('Date' plus BAR_COLUMNS) at a time.
+
+    Parameters:
+    - data: DataFrame with OHLC(V) columns and a datetime index.
+    - delay: Seconds between bars, to replay at a fixed pace (default is 0, as fast as possible).
+    """
+    columns = [col for col in BAR_COLUMNS if col in data.columns]
+    # Plain Python numbers are much faster to work with bar by bar than NumPy scalars
+    values = [data[col].to_numpy().tolist() for col in columns]
+    start = time.perf_counter()
+    for number, (date, *row) in enumerate(zip(data.index, *values), 1):
+        bar = dict(zip(columns, row))
+        bar['Date'] = date
+        yield bar
+        if delay:
+            # Paced against the start time, so the time spent on each bar does not add up
+            wait = start + number * delay - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+
+
+def csv_bars(data_path, start_date=None, end_date=None, delay=0.0):
+    """
+    Bars of a minute-data CSV, loaded through load_cleaned_data (see frame_bars).
+
+    Parameters:
+    - data_path: Path to the raw CSV file.
+    - start_date, end_date: Range of bars to replay (default is the whole file).
+    - delay: Seconds between bars (default is 0).
+    """
+    yield from frame_bars(load_cleaned_data(data_path, start_date=start_date, end_date=end_date), delay)
+
+
+def queue_bars(bar_queue):
+    """
+    Bars put on a queue.Queue by another thread, a stand-in for a live feed, until None is put.
+
+    Each bar is a dict with 'Date' and BAR_COLUMNS, like the ones frame_bars yields.
+    """
+    while True:
+        bar = bar_queue.get()
+        if bar is None:
+            return
+        yield bar
+
+
+def _update_indicators(bar, indicators):
+    """Update (columns, streaming indicator) pairs with a bar and add their values to it."""
+    for columns, indicator in indicators:
+        values = indicator.update(bar)
+        if len(columns) == 1:
+            bar[columns[0]] = values
+        else:
+            for column, value in zip(columns, values):
+                bar[column] = value
+
+
+class ReplayEngine:
+    """
+    Paper trading: streams bars into the indicators and a strategy's per-bar version.
+
+    Every bar first updates the indicators the strategy is registered to need (their
+    values are added to the bar, e.g. bar['SMA']), then the strategy's update(bar)
+    gives the position to hold, and only then are the other streaming indicators added
+    for display. The strategy therefore sees the same columns as in a backtest of the
+    raw frame: 'bb', for one, keeps its own 20-bar, 2 standard deviation bands rather
+    than trading the displayed ones. The account is traded like
+    trade_ledger.equity_curve does: on a change of position the open shares are closed
+    at the Close and as many whole shares as the account value allows are bought or
+    sold short at the same price. Replaying a frame therefore gives the positions and
+    equity of the vectorized backtest on it, up to crossovers decided by the float32
+    rounding of the batch indicators.
+
+    The same engine runs over a file (csv_bars, frame_bars) or a live feed
+    (queue_bars), in this thread (run) or in the background (start); snapshot() can be
+    read from another thread, e.g. by the Dash practice UI.
+
+    Parameters:
+    - strategy: Strategy name (e.g., 'sma', 'bb', 'rsi', 'macd', 'idg', etc.).
+    - initial_capital: The initial amount of money (default is 10,000).
+    - indicators: Stream the full indicator set (default is True). With False only the
+                  indicators the strategy needs are kept up to date.
+    - strategy_params: Keyword arguments for the strategy (default is its registered defaults).
+    """
+
+    def __init__(self, strategy, initial_capital=10000, indicators=True, **strategy_params):
+        spec = get_spec(strategy)
+        self.strategy = strategy
+        self.step = get_stream_strategy(strategy)(**dict(spec.defaults, **strategy_params))
+        self.strategy_indicators = []
+        self.display_indicators = []
+        for columns, indicator in streaming_indicators():
+            if set(columns) & set(spec.indicators):
+                self.strategy_indicators.append((columns, indicator))
+            elif indicators:
+                self.display_indicators.append((columns, indicator))
+        self.initial_capital = initial_capital
+
+        self.cash = float(initial_capital)
+        self.shares = 0.0
+        self.position = 0
+        self.entry_price = np.nan
+        self.entry_time = None
+        self.equity = float(initial_capital)
+        self.realized = 0.0
+        self.trades = []
+        self.bars = 0
+        self.last_bar = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Nanoseconds per bar
+
+        self._running = False
+        self._thread = None
+
+    def on_bar(self, bar):
+        """
+        Process one bar: update the indicators, the strategy, the account and the latency record.
+
+        Returns:
+        - The position held after the bar (1 long, -1 short, 0 flat).
+        """
+        start = time.perf_counter_ns()
+        _update_indicators(bar, self.strategy_indicators)
+        position = self.step.update(bar)
+        _update_indicators(bar, self.display_indicators)
+        close = float(bar['Close'])
+        if position != self.position:
+            self._change_position(position, close, bar.get('Date'))
+        self.equity = self.cash + self.shares * close
+        self.bars += 1
+        self.last_bar = bar
+        self.latencies.append(time.perf_counter_ns() - start)
+        return position
+
+    def _change_position(self, position, price, date):
+        if self.shares:
+            pnl = self.shares * (price - self.entry_price)
+            self.realized += pnl
+            self.trades.append((self.entry_time, date, self.position, abs(self.shares), self.entry_price, price,
+                                pnl))
+        self.cash += self.shares * price
+        self.shares = 0.0
+        if position != 0:
+            self.shares = position * max(self.cash // price, 0)
+            self.cash -= self.shares * price
+            self.entry_price = price
+            self.entry_time = date
+        self.position = position
+
+    def run(self, bars):
+        """Process bars (any iterable, e.g. csv_bars or queue_bars) until it ends or stop() is called."""
+        self._running = True
+        try:
+            for bar in bars:
+                if not self._running:
+                    break
+                self.on_bar(bar)
+        finally:
+            self._running = False
+        return self
+
+    def start(self, bars):
+        """Run over bars in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self.run, args=(bars,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop after the current bar (a source waiting on a queue stops once its next bar or None arrives)."""
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def unrealized(self):
+        """Profit of the open position at the last Close."""
+        if not self.shares or self.last_bar is None:
+            return 0.0
+        return self.shares * (float(self.last_bar['Close']) - self.entry_price)
+
+    def latency(self):
+        """
+        Per-bar processing time, in microseconds.
+
+        Returns:
+        - Dict with the last, median (p50), p99 and max latency of the recorded bars.
+        """
+        if not self.latencies:
+            return {'last_us': np.nan, 'p50_us': np.nan, 'p99_us': np.nan, 'max_us': np.nan}
+        values = np.array(self.latencies) / 1000
+        p50, p99 = np.percentile(values, [50, 99])
+        return {'last_us': values[-1], 'p50_us': p50, 'p99_us': p99, 'max_us': values.max()}
+
+    def trade_frame(self):
+        """
+        The trades so far, with the same columns as trade_ledger. A trade still open has
+        no exit_time, exit_price or pnl.
+        """
+        rows = list(self.trades)
+        if self.shares:
+            rows.append((self.entry_time, pd.NaT, self.position, abs(self.shares), self.entry_price, np.nan,
+                         np.nan))
+        return pd.DataFrame(rows, columns=LEDGER_COLUMNS)
+
+    def snapshot(self):
+        """Current state of the run as plain (JSON-friendly) values, for displays."""
+        bar = self.last_bar
+        return dict({
+            'strategy': self.strategy,
+            'time': str(bar['Date']) if bar is not None and 'Date' in bar else None,
+            'bars': self.bars,
+            'close': float(bar['Close']) if bar is not None else None,
+            'position': self.position,
+            'equity': self.equity,
+            'pnl_pct': (self.equity / self.initial_capital - 1) * 100,
+            'realized': self.realized,
+            'unrealized': self.unrealized,
+            'trades': len(self.trades),
+            'running': self._running,
+        }, **{name: float(value) for name, value in self.latency().items()})
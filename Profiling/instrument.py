@@ -0,0 +1,270 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+SUMMARY_COLUMNS = ['calls', 'wall_s', 'self_s', 'cpu_s', 'rows', 'rows_per_s', 'memory_mb']
+
+# Instrumentation is off by default; the wrappers then only check this flag
+_enabled = False
+_track_memory = False
+_records = []
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+def enable(memory=False):
+    """
+    Start recording the pipeline stages.
+
+    Parameters:
+    - memory: Also record the change in traced memory of every stage. This starts
+              tracemalloc, which slows Python code down noticeably (default is False).
+    """
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Stop recording (the records collected so far are kept)."""
+    global _enabled, _track_memory
+    if _track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+    _track_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def settings():
+    """(enabled, memory) flags, for worker_setup in worker processes."""
+    return _enabled, _track_memory
+
+
+def reset():
+    """Drop all records."""
+    _records.clear()
+
+
+def records():
+    """
+    The recorded stages, in the order they finished.
+
+    Each record is a dict with name, start_s (since import), wall_s, self_s (wall time
+    minus nested stages), cpu_s, rows, memory_mb (None unless memory is tracked),
+    depth, process and thread.
+    """
+    return list(_records)
+
+
+def worker_setup(enabled, memory=False):
+    """
+    Match the parent's recording in a worker process (pass it settings() from the parent).
+
+    Records copied from the parent by a forked worker are dropped, so collect() only
+    hands back the worker's own stages.
+    """
+    reset()
+    if enabled:
+        enable(memory=memory)
+    else:
+        disable()
+
+
+def collect():
+    """
+    Hand over this process's records and drop them, in a worker process: return them
+    with the task's result and pass them to merge() in the parent. Their start times
+    are made absolute (perf_counter is shared by the processes of a machine).
+    """
+    taken = [dict(record, start_s=record['start_s'] + _origin) for record in _records]
+    _records.clear()
+    return taken
+
+
+def merge(records):
+    """Add records collect()-ed in a worker process, so summary() and chrome_trace() include them."""
+    _records.extend(dict(record, start_s=record['start_s'] - _origin) for record in records)
+
+
+def _rows(value):
+    """Number of rows of a DataFrame, Series or array, else None."""
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return shape[0]
+    data = getattr(value, 'data', None)  # e.g. BacktestResult
+    shape = getattr(data, 'shape', None)
+    return shape[0] if shape else None
+
+
+class measure:
+    """
+    Context manager recording one stage when instrumentation is enabled.
+
+    Parameters:
+    - name: Stage name shown in the summary and the trace.
+    - rows: Number of rows the stage processes (can also be set later as .rows).
+    """
+    __slots__ = ('name', 'rows', '_active', '_start', '_cpu', '_memory', '_children')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self._active = False
+
+    def __enter__(self):
+        if not _enabled:
+            return self
+        self._active = True
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self._children = 0.0
+        self._memory = tracemalloc.get_traced_memory()[0] if _track_memory else None
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not self._active:
+            return False
+        wall = time.perf_counter() - self._start
+        cpu = time.process_time() - self._cpu
+        memory = None
+        if self._memory is not None and tracemalloc.is_tracing():
+            memory = (tracemalloc.get_traced_memory()[0] - self._memory) / 2**20
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1]._children += wall
+        _records.append({
+            'name': self.name,
+            'start_s': self._start - _origin,
+            'wall_s': wall,
+            'self_s': wall - self._children,
+            'cpu_s': cpu,
+            'rows': self.rows,
+            'memory_mb': memory,
+            'depth': len(stack),
+            'process': os.getpid(),
+            'thread': threading.get_ident(),
+        })
+        self._active = False
+        return False
+
+
+def stage(name=None):
+    """
+    Decorator recording every call of a pipeline function as a stage.
+
+    The rows processed are taken from the first argument with a shape (e.g. the input
+    DataFrame), or from the result when no argument has one. When instrumentation is
+    disabled the wrapper only checks a flag before calling the function.
+
+    Parameters:
+    - name: Stage name (default is the function's name).
+    """
+    def decorate(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with measure(label) as record:
+                result = function(*args, **kwargs)
+                rows = next((n for n in map(_rows, args) if n is not None), None)
+                record.rows = rows if rows is not None else _rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def summary():
+    """
+    Recorded stages aggregated by name, slowest first.
+
+    Returns:
+    - DataFrame indexed by stage name with calls, total wall, self and CPU seconds,
+      rows, throughput (rows per wall second) and net memory change in MB.
+    """
+    if not _records:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    frame = pd.DataFrame(_records)
+    table = frame.groupby('name', sort=False).agg(
+        calls=('wall_s', 'size'), wall_s=('wall_s', 'sum'), self_s=('self_s', 'sum'), cpu_s=('cpu_s', 'sum'),
+        rows=('rows', 'sum'), memory_mb=('memory_mb', 'sum'))
+    table['rows_per_s'] = table['rows'] / table['wall_s']
+    if frame['memory_mb'].isna().all():
+        table['memory_mb'] = float('nan')
+    return table[SUMMARY_COLUMNS].sort_values('wall_s', ascending=False)
+
+
+def chrome_trace():
+    """
+    The recorded stages as a Chrome trace (open in chrome://tracing or ui.perfetto.dev),
+    with one row per process and thread.
+    """
+    events = []
+    for record in _records:
+        args = {'cpu_ms': record['cpu_s'] * 1000}
+        if record['rows'] is not None:
+            args['rows'] = int(record['rows'])
+        if record['memory_mb'] is not None:
+            args['memory_mb'] = record['memory_mb']
+        events.append({'name': record['name'], 'cat': 'stage', 'ph': 'X', 'pid': record['process'],
+                       'tid': record['thread'], 'ts': record['start_s'] * 1e6, 'dur': record['wall_s'] * 1e6, 'args': args})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_chrome_trace(path):
+    """Write chrome_trace() as JSON to path."""
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(), f)
+
+
+class profile:
+    """
+    Context manager capturing a cProfile of everything run inside it.
+
+    Parameters:
+    - path: File to dump the raw statistics to (for snakeviz, pstats, etc.). When
+            omitted, the top functions by cumulative time are printed instead.
+    - limit: Number of functions printed (default is 25).
+    """
+
+    def __init__(self, path=None, limit=25):
+        self.path = path
+        self.limit = limit
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        if self.path:
+            self.profiler.dump_stats(self.path)
+        else:
+            print(self.report())
+        return False
+
+    def report(self, sort='cumulative'):
+        """The profile's top functions as text."""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(self.limit)
+        return out.getvalue()
@@ -1,4 +1,7 @@
-from preprocessing.indicator import bollinger_bands
+from preprocessing.indicator import fingerprint, rolling_mean, rolling_std
+from preprocessing.streaming import StreamingBollingerBands
+from Strategy.position_engine import state_machine_positions, PositionState
+from Strategy.signals import StrategyColumns, join_signals
 
 '''def bollinger_band_strategy(data):
     """
@@ -63,54 +66,102 @@ from preprocessing.indicator import bollinger_bands
 
 from preprocessing.indicator import bollinger_bands'''
 
-def bollinger_band_strategy(data):
+def bollinger_band_conditions(close, upper, lower):
     """
-    Implements a simple Bollinger Bands trading strategy using a Position column.
-    Adds a 'Position' column where:
+    Entry and exit conditions of the Bollinger Bands strategy, shared by the array and
+    per-bar versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Returns:
+    - long_entry, short_entry, long_exit, short_exit for state_machine_positions or PositionState.
+    """
+    # Enter long if the Close drops below the Lower Band, short if it rises above the Upper Band;
+    # close long once the Close rises above the Upper Band, short once it falls below the Lower Band
+    return close < lower, close > upper, close > upper, close < lower
+
+
+def bollinger_band_signals(columns):
+    """
+    Simple Bollinger Bands signals.
     - 1 indicates holding a long position (price is below the lower band and expected to rise).
     - -1 indicates holding a short position (price is above the upper band and expected to fall).
     - 0 indicates no position (position closed).
 
     Parameters:
-    - data: DataFrame with 'Close' price, pre-calculated 'UpperBand' and 'LowerBand'.
+    - columns: StrategyColumns with 'Close' and optionally pre-calculated 'UpperBand' and 'LowerBand'.
 
     Returns:
-    - DataFrame with an added 'Position' column.
+    - int8 Position array and a dict with the bands when they had to be calculated
+      (20 bars, 2 standard deviations).
     """
+    diagnostics = {}
     # Ensure the necessary columns exist in the data
-    if 'UpperBand' not in data.columns or 'LowerBand' not in data.columns:
-        data = bollinger_bands(data, period=20, num_std=2)
-    
-    # Make a copy of the data to prevent SettingWithCopyWarning
-    data = data.copy()
-    
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
+    if 'UpperBand' not in columns or 'LowerBand' not in columns:
+        close = columns.series('Close')
+        key = fingerprint(close)
+        middle = rolling_mean(close, 20, key=key)
+        std = rolling_std(close, 20, key=key)
+        diagnostics = {'MiddleBand': middle, 'UpperBand': middle + (std * 2), 'LowerBand': middle - (std * 2)}
+        upper, lower = diagnostics['UpperBand'], diagnostics['LowerBand']
+    else:
+        upper = columns['UpperBand']
+        lower = columns['LowerBand']
+    close = columns['Close']
 
-    # Define the conditions for entering and exiting positions
-    for i in range(1, len(data)):
-        # If no position, check for entry signals
-        if data['Position'].iloc[i - 1] == 0:
-            # Enter a long position if the Close crosses below the Lower Band
-            if data['Close'].iloc[i] < data['LowerBand'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 1  # Long position
-            # Enter a short position if the Close crosses above the Upper Band
-            elif data['Close'].iloc[i] > data['UpperBand'].iloc[i]:
-                data.at[data.index[i], 'Position'] = -1  # Short position
+    return state_machine_positions(*bollinger_band_conditions(close, upper, lower)), diagnostics
 
-        # If holding a long position, check if it should be closed
-        elif data['Position'].iloc[i - 1] == 1:
-            # Close long if price rises back above the Lower Band
-            if data['Close'].iloc[i] > data['UpperBand'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0  # Close long position
-            else:
-                data.at[data.index[i], 'Position'] = 1
 
-        # If holding a short position, check if it should be closed
-        elif data['Position'].iloc[i - 1] == -1:
-            # Close short if price falls back below the Upper Band
-            if data['Close'].iloc[i] < data['LowerBand'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0  # Close short position
-            else:
-                data.at[data.index[i], 'Position'] = -1
-    return data
+def bollinger_band_strategy(data):
+    """
+    Implements a simple Bollinger Bands trading strategy using a Position column.
+
+    Parameters:
+    - data: DataFrame with 'Close' price, pre-calculated 'UpperBand' and 'LowerBand'.
+
+    Returns:
+    - New DataFrame with an added 'Position' column (data is not modified).
+    """
+    return join_signals(data, *bollinger_band_signals(StrategyColumns(data)))
+
+
+class StreamingBollingerBandStrategy:
+    """
+    bollinger_band_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held
+    after it. The bar's 'UpperBand' and 'LowerBand' are used when it has them,
+    otherwise 20-bar, 2 standard deviation bands are kept up to date here.
+    """
+    __slots__ = ('state', 'bands')
+
+    def __init__(self):
+        self.state = PositionState()
+        self.bands = StreamingBollingerBands(20, 2)
+
+    def update(self, bar):
+        if 'UpperBand' in bar and 'LowerBand' in bar:
+            upper = bar['UpperBand']
+            lower = bar['LowerBand']
+        else:
+            _, upper, lower = self.bands.update(bar)
+        return self.state.step(*bollinger_band_conditions(bar['Close'], upper, lower))
+
+
+def bollinger_band_panel(panel, period=20, num_std=2):
+    """
+    bollinger_band_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - period, num_std: Band settings (default is the 20-bar, 2 standard deviation bands
+                       bollinger_band_strategy falls back to).
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close'].to_numpy()
+    middle = panel['Close'].rolling(window=period).mean().to_numpy()
+    std = panel['Close'].rolling(window=period).std().to_numpy()
+    upper = middle + (std * num_std)
+    lower = middle - (std * num_std)
+
+    return state_machine_positions(*bollinger_band_conditions(close, upper, lower))
@@ -1,74 +1,122 @@
 import pandas as pd
-import numpy as np
+from preprocessing.streaming import NAN
+from Strategy.position_engine import state_machine_positions, PositionState
+from Strategy.signals import StrategyColumns, join_signals, previous_values
 
-def intraday_gap_strategy(data, target_gap_close=5, stop_loss=1):
+def intraday_gap_conditions(open_, previous_close, market_open, square_off):
     """
-    Implements an intraday gap strategy with a 'Position' column for position tracking.
+    Entry and exit conditions of the intraday gap strategy, shared by the array and
+    per-bar versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Parameters:
+    - open_: Open of the bar.
+    - previous_close: Close of the previous bar (NaN on the first).
+    - market_open, square_off: Whether the bar is the session's opening candle / its 15:15 bar.
+
+    Returns:
+    - long_entry, short_entry, long_exit, short_exit for state_machine_positions or PositionState.
+    """
+    # Calculate the gap from the previous day's close to the current day's open
+    gap = open_ - previous_close
+
+    # Buy on a gap down, sell on a gap up (opens significantly away from previous close)
+    long_entry = (gap < -0.01 * previous_close) & market_open
+    short_entry = (gap > 0.01 * previous_close) & market_open
+
+    # Positions are closed at the target, the stop loss or the end of the session
+    return long_entry, short_entry, square_off, square_off
+
+
+def intraday_gap_signals(columns, target_gap_close=5, stop_loss=1):
+    """
+    Intraday gap signals.
     - 1 indicates holding a long position (buy signal on gap down).
     - -1 indicates holding a short position (sell signal on gap up).
     - 0 indicates no position (position closed).
 
+    Parameters:
+    - columns: StrategyColumns with 'Open' and 'Close' prices.
+    - target_gap_close: The percentage change to consider the gap closed (default is 5%).
+    - stop_loss: Percentage stop loss from the entry price (default is 1%).
+
+    Returns:
+    - int8 Position array and a dict of diagnostic columns (none for this strategy).
+    """
+    close = columns['Close']
+    open_ = columns['Open']
+
+    # Entries are only taken on the opening candle, exits are forced at 15:15
+    index = columns.index
+    market_open = (index.hour == 9) & (index.minute == 15)
+    square_off = (index.hour == 15) & (index.minute == 15)
+
+    conditions = intraday_gap_conditions(open_, previous_values(close), market_open, square_off)
+    position = state_machine_positions(*conditions, price=close, entry_price=open_,
+                                       take_profit=target_gap_close / 100,
+                                       stop_loss=stop_loss / 100)
+    return position, {}
+
+
+def intraday_gap_strategy(data, target_gap_close=5, stop_loss=1):
+    """
+    Implements an intraday gap strategy with a 'Position' column for position tracking.
+
     Parameters:
     - data: DataFrame with 'Open' and 'Close' prices.
-    - target_gap_close: The percentage change to consider the gap closed (default is 1%).
+    - target_gap_close, stop_loss: As in intraday_gap_signals.
 
     Returns:
-    - DataFrame with an added 'Position' column.
+    - New DataFrame with an added 'Position' column (data is not modified).
     """
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
+    return join_signals(data, *intraday_gap_signals(StrategyColumns(data), target_gap_close, stop_loss))
 
-    # Calculate the gap from the previous day's close to the current day's open
-    data['Gap'] = data['Open'] - data['Close'].shift(1)
-    print(data.columns)
-
-    # Loop through each row in the DataFrame
-    for i in range(1, len(data)):
-        # If no position, check for entry signals
-        if data['Position'].iloc[i - 1] == 0:
-            # Buy signal for gap down (opens significantly lower than previous close)
-            if (
-            data['Gap'].iloc[i] < -0.01 * data['Close'].iloc[i - 1] 
-            and data.index[i].hour == 9 
-            and data.index[i].minute == 15
-        ):
-                data.at[data.index[i], 'Position'] = 1  # Long position
-                target_price = data['Open'].iloc[i] * (1 + target_gap_close/100)
-                stop_loss_price = data['Open'].iloc[i] * (1 - stop_loss / 100)
-
-            # Sell signal for gap up (opens significantly higher than previous close)
-            elif (
-            data['Gap'].iloc[i] > 0.01 * data['Close'].iloc[i - 1] 
-            and data.index[i].hour == 9 
-            and data.index[i].minute == 15
-        ):
-                data.at[data.index[i], 'Position'] = -1  # Short position
-                target_price = data['Open'].iloc[i] * (1 - target_gap_close/100)
-                stop_loss_price = data['Open'].iloc[i] * (1 + stop_loss / 100)
-
-        # If holding a long position, check if it should be closed
-        elif data['Position'].iloc[i - 1] == 1:
-            if data['Close'].iloc[i] >= target_price:
-                data.at[data.index[i], 'Position'] = 0  # Close long position
-            elif data['Close'].iloc[i] <= stop_loss_price:
-                data.at[data.index[i], 'Position'] = 0
-            elif data.index[i].hour == 15 and data.index[i].minute == 15:
-                data.at[data.index[i], 'Position'] = 0
-            else:
-                data.at[data.index[i], 'Position'] = 1  # Maintain long position
-
-        # If holding a short position, check if it should be closed
-        elif data['Position'].iloc[i - 1] == -1:
-            if data['Close'].iloc[i] <= target_price:
-                data.at[data.index[i], 'Position'] = 0  # Close short position
-            elif data['Close'].iloc[i] >= stop_loss_price:
-                data.at[data.index[i], 'Position'] = 0
-            elif data.index[i].hour == 15 and data.index[i].minute == 15:
-                data.at[data.index[i], 'Position'] = 0
-            else:
-                data.at[data.index[i], 'Position'] = -1  # Maintain short position
-
-    # Remove temporary 'Gap' column
-    data.drop(columns=['Gap'], inplace=True)
-
-    return data
+
+class StreamingIntradayGapStrategy:
+    """
+    intraday_gap_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Date' (a Timestamp), 'Open' and 'Close'
+    and returns the position held after it.
+    """
+    __slots__ = ('state', 'previous_close')
+
+    def __init__(self, target_gap_close=5, stop_loss=1):
+        self.state = PositionState(take_profit=target_gap_close / 100, stop_loss=stop_loss / 100)
+        self.previous_close = NAN
+
+    def update(self, bar):
+        close = bar['Close']
+        open_ = bar['Open']
+        time = bar['Date']
+        previous_close = self.previous_close
+        self.previous_close = close
+
+        market_open = time.hour == 9 and time.minute == 15
+        square_off = time.hour == 15 and time.minute == 15
+        return self.state.step(*intraday_gap_conditions(open_, previous_close, market_open, square_off),
+                               price=close, entry_price=open_)
+
+
+def intraday_gap_panel(panel, target_gap_close=5, stop_loss=1):
+    """
+    intraday_gap_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Open' and 'Close' are used).
+    - target_gap_close, stop_loss: As in intraday_gap_strategy.
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close'].to_numpy()
+    open_ = panel['Open'].to_numpy()
+
+    # The session times are the same for every symbol, so they are (time x 1) columns
+    index = panel['Close'].index
+    market_open = ((index.hour == 9) & (index.minute == 15))[:, None]
+    square_off = ((index.hour == 15) & (index.minute == 15))[:, None]
+
+    conditions = intraday_gap_conditions(open_, previous_values(close), market_open, square_off)
+    return state_machine_positions(*conditions, price=close, entry_price=open_,
+                                   take_profit=target_gap_close / 100,
+                                   stop_loss=stop_loss / 100)
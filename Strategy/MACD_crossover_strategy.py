@@ -1,40 +1,115 @@
 import pandas as pd
-import numpy as np
+from preprocessing.indicator import ewm_mean, fingerprint
+from preprocessing.streaming import StreamingMACD, NAN
+from Strategy.position_engine import carry_forward, signal_values, SignalState
+from Strategy.signals import StrategyColumns, join_signals, previous_values
 
-def macd_strategy(data, short_window=12, long_window=26, signal_window=9):
+def macd_conditions(macd, signal_line, previous_macd, previous_signal):
     """
-    Implements a MACD crossover strategy using a Position column.
-    - Sets Position to 1 (long) when MACD crosses above the signal line.
-    - Sets Position to -1 (short) when MACD crosses below the signal line.
+    Long and short signals of the MACD crossover, shared by the array and per-bar
+    versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Returns:
+    - long_signal, short_signal for signal_values/carry_forward or SignalState.
+    """
+    # Long (1) when MACD crosses above the Signal Line, short (-1) when it crosses below
+    long_signal = (macd > signal_line) & (previous_macd <= previous_signal)
+    short_signal = (macd < signal_line) & (previous_macd >= previous_signal)
+    return long_signal, short_signal
+
+
+def macd_signals(columns, short_window=12, long_window=26, signal_window=9):
+    """
+    MACD crossover signals.
+    - Position 1 (long) when MACD crosses above the signal line.
+    - Position -1 (short) when MACD crosses below the signal line.
     - Maintains Position based on the previous signal.
 
     Parameters:
-    - data: DataFrame with 'Close' prices.
+    - columns: StrategyColumns with 'Close'.
     - short_window: Short-term EMA period (default is 12).
     - long_window: Long-term EMA period (default is 26).
     - signal_window: Signal line EMA period (default is 9).
 
     Returns:
-    - DataFrame with added 'MACD', 'Signal Line', and 'Position' columns.
+    - int8 Position array and a dict with the 'EMA_short', 'EMA_long', 'MACD' and 'Signal_Line' columns.
     """
     # Calculate short-term and long-term EMAs
-    data['EMA_short'] = data['Close'].ewm(span=short_window, adjust=False).mean()
-    data['EMA_long'] = data['Close'].ewm(span=long_window, adjust=False).mean()
+    close = columns.series('Close')
+    key = fingerprint(close)
+    ema_short = ewm_mean(close, short_window, key=key)
+    ema_long = ewm_mean(close, long_window, key=key)
 
     # Calculate MACD and Signal Line
-    data['MACD'] = data['EMA_short'] - data['EMA_long']
-    data['Signal_Line'] = data['MACD'].ewm(span=signal_window, adjust=False).mean()
+    macd = ema_short - ema_long
+    signal_line = pd.Series(macd).ewm(span=signal_window, adjust=False).mean().to_numpy(dtype=macd.dtype)
 
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
+    # Values of the previous bar (NaN before the first, so the first bar never crosses)
+    previous_macd = previous_values(macd)
+    previous_signal = previous_values(signal_line)
 
-    # Set long position (1) when MACD crosses above the Signal Line
-    data.loc[(data['MACD'] > data['Signal_Line']) & (data['MACD'].shift(1) <= data['Signal_Line'].shift(1)), 'Position'] = 1
-
-    # Set short position (-1) when MACD crosses below the Signal Line
-    data.loc[(data['MACD'] < data['Signal_Line']) & (data['MACD'].shift(1) >= data['Signal_Line'].shift(1)), 'Position'] = -1
+    signal = signal_values(*macd_conditions(macd, signal_line, previous_macd, previous_signal))
 
     # Carry forward the position to the next rows until an opposite signal is generated
-    data['Position'] = data['Position'].replace(to_replace=0, method='ffill').fillna(0)
+    diagnostics = {'EMA_short': ema_short, 'EMA_long': ema_long, 'MACD': macd, 'Signal_Line': signal_line}
+    return carry_forward(signal), diagnostics
+
+
+def macd_strategy(data, short_window=12, long_window=26, signal_window=9):
+    """
+    Implements a MACD crossover strategy using a Position column.
+
+    Parameters:
+    - data: DataFrame with 'Close' prices.
+    - short_window, long_window, signal_window: As in macd_signals.
+
+    Returns:
+    - New DataFrame with added 'EMA_short', 'EMA_long', 'MACD', 'Signal_Line' and
+      'Position' columns (data is not modified).
+    """
+    return join_signals(data, *macd_signals(StrategyColumns(data), short_window, long_window, signal_window))
+
+
+class StreamingMACDStrategy:
+    """
+    macd_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held after it.
+    """
+    __slots__ = ('macd', 'previous_macd', 'previous_signal', 'state')
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.macd = StreamingMACD(short_window, long_window, signal_window)
+        self.previous_macd = NAN
+        self.previous_signal = NAN
+        self.state = SignalState()
+
+    def update(self, bar):
+        macd, signal = self.macd.update(bar)
+        # A crossover sets the position, which is then held until the opposite one
+        conditions = macd_conditions(macd, signal, self.previous_macd, self.previous_signal)
+        self.previous_macd = macd
+        self.previous_signal = signal
+        return self.state.step(*conditions)
+
+
+def macd_panel(panel, short_window=12, long_window=26, signal_window=9):
+    """
+    macd_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - short_window, long_window, signal_window: As in macd_strategy.
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close']
+    macd = close.ewm(span=short_window, adjust=False).mean() - close.ewm(span=long_window, adjust=False).mean()
+    signal = macd.ewm(span=signal_window, adjust=False).mean()
+    macd = macd.to_numpy()
+    signal = signal.to_numpy()
 
-    return data
+    # Carry each signal forward until an opposite signal is generated
+    return carry_forward(signal_values(*macd_conditions(macd, signal, previous_values(macd),
+                                                        previous_values(signal))))
@@ -1,39 +1,106 @@
 import pandas as pd
-import numpy as np
+from preprocessing.indicator import rolling_mean
+from preprocessing.streaming import RollingWindow
+from Strategy.position_engine import carry_forward, signal_values, SignalState
+from Strategy.signals import StrategyColumns, join_signals
+
+def mean_reversion_conditions(deviation, deviation_std):
+    """
+    Long and short signals of the mean reversion strategy, shared by the array and
+    per-bar versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Parameters:
+    - deviation: Close minus its moving average.
+    - deviation_std: Standard deviation of the deviation over the lookback period.
+
+    Returns:
+    - long_signal, short_signal for signal_values/carry_forward or SignalState.
+    """
+    # Long when price is significantly below the moving average, short when above
+    return deviation < -2 * deviation_std, deviation > 2 * deviation_std
+
+
+def mean_reversion_signals(columns, lookback=20):
+    """
+    Mean reversion signals.
+    - Position 1 (long) when price falls significantly below the moving average (oversold condition).
+    - Position -1 (short) when price rises significantly above the moving average (overbought condition).
+    - Each signal is held until the opposite one.
+
+    Parameters:
+    - columns: StrategyColumns with 'Close' prices.
+    - lookback: Lookback period for calculating the moving average.
+
+    Returns:
+    - int8 Position array and a dict with the 'Moving Average' and 'Deviation' columns.
+    """
+    # Calculate the moving average and the deviation from it
+    moving_average = rolling_mean(columns.series('Close'), lookback)
+    deviation = columns['Close'] - moving_average
+
+    # Calculate the standard deviation of the deviation over the lookback period
+    deviation_std = pd.Series(deviation).rolling(window=lookback).std().to_numpy()
+
+    signal = signal_values(*mean_reversion_conditions(deviation, deviation_std))
+
+    # Carry forward the position to the next rows until an opposite signal is generated
+    return carry_forward(signal), {'Moving Average': moving_average, 'Deviation': deviation}
+
 
 def mean_reversion_strategy(data, lookback=20):
     """
     Implements a mean reversion strategy.
-    - Sets Position to 1 (long) when price falls significantly below the moving average (oversold condition).
-    - Sets Position to -1 (short) when price rises significantly above the moving average (overbought condition).
-    - Sets Position to 0 when there are no signals.
 
     Parameters:
     - data: DataFrame with 'Close' prices.
     - lookback: Lookback period for calculating the moving average.
 
     Returns:
-    - DataFrame with added 'Moving Average', 'Deviation', and 'Position' columns.
+    - New DataFrame with added 'Moving Average', 'Deviation', and 'Position' columns
+      (data is not modified).
     """
-    # Calculate the moving average
-    data['Moving Average'] = data['Close'].rolling(window=lookback).mean()
+    return join_signals(data, *mean_reversion_signals(StrategyColumns(data), lookback))
 
-    # Calculate the deviation from the moving average
-    data['Deviation'] = data['Close'] - data['Moving Average']
 
-    # Calculate the standard deviation of the deviation over the lookback period
-    deviation_std = data['Deviation'].rolling(window=lookback).std()
+class StreamingMeanReversionStrategy:
+    """
+    mean_reversion_strategy one bar at a time, for replays and live feeds.
 
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held after it.
+    """
+    __slots__ = ('average', 'deviations', 'state')
 
-    # Set long position (1) when price is significantly below the moving average
-    data.loc[data['Deviation'] < -2 * deviation_std, 'Position'] = 1
+    def __init__(self, lookback=20):
+        self.average = RollingWindow(lookback)
+        self.deviations = RollingWindow(lookback)
+        self.state = SignalState()
 
-    # Set short position (-1) when price is significantly above the moving average
-    data.loc[data['Deviation'] > 2 * deviation_std, 'Position'] = -1
+    def update(self, bar):
+        close = bar['Close']
+        self.average.push(close)
+        # The deviation exists once the average does, and its band once lookback deviations do
+        if not self.average.full:
+            return self.state.position
+        deviation = close - self.average.mean()
+        self.deviations.push(deviation)
+        return self.state.step(*mean_reversion_conditions(deviation, self.deviations.std()))
 
-    # Carry forward the position to the next rows until an opposite signal is generated
-    data['Position'] = data['Position'].replace(to_replace=0, method='ffill').fillna(0)
-    
-    return data
+
+def mean_reversion_panel(panel, lookback=20):
+    """
+    mean_reversion_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - lookback: Lookback period for the moving average and the deviation band.
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close']
+    deviation = close - close.rolling(window=lookback).mean()
+    deviation_std = deviation.rolling(window=lookback).std()
+    signal = signal_values(*mean_reversion_conditions(deviation.to_numpy(), deviation_std.to_numpy()))
+
+    # Carry each signal forward until an opposite signal is generated
+    return carry_forward(signal)
@@ -1,30 +1,85 @@
-from preprocessing.indicator import rsi
+from preprocessing.indicator import rsi_values, compute_rsi
+from preprocessing.streaming import StreamingRSI
+from Strategy.position_engine import signal_values
+from Strategy.signals import StrategyColumns, join_signals
 
-def rsi_strategy(data, rsi_period=14, rsi_overbought=70, rsi_oversold=30):
+def rsi_conditions(rsi, rsi_overbought=70, rsi_oversold=30):
     """
-    Implements a simple RSI-based strategy.
+    Long and short conditions of the RSI strategy, shared by the array and per-bar
+    versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Returns:
+    - long_signal, short_signal for signal_values (the position is the bar's signal, not carried forward).
+    """
+    # Buy RSI is below the oversold threshold, sell when RSI is above the overbought threshold
+    return rsi < rsi_oversold, rsi > rsi_overbought
+
+
+def rsi_signals(columns, rsi_period=14, rsi_overbought=70, rsi_oversold=30):
+    """
+    Simple RSI-based signals.
     - Buy when RSI is below the oversold threshold.
     - Sell when RSI is above the overbought threshold.
 
     Parameters:
-    - data: DataFrame with 'Close' prices.
+    - columns: StrategyColumns with 'Close'.
     - rsi_period: Period for RSI calculation (default is 14).
     - rsi_overbought: RSI level considered as overbought (default is 70).
     - rsi_oversold: RSI level considered as oversold (default is 30).
 
     Returns:
-    - DataFrame with added 'RSI' and 'Buy/Sell' columns.
+    - int8 Position array and a dict with the 'RSI' column.
+    """
+    # Calculate RSI (shared with preprocessing.indicator.rsi)
+    rsi = rsi_values(columns.series('Close'), rsi_period)
+
+    return signal_values(*rsi_conditions(rsi, rsi_overbought, rsi_oversold)), {'RSI': rsi}
+
+
+def rsi_strategy(data, rsi_period=14, rsi_overbought=70, rsi_oversold=30):
+    """
+    Implements a simple RSI-based strategy.
+
+    Parameters:
+    - data: DataFrame with 'Close' prices.
+    - rsi_period, rsi_overbought, rsi_oversold: As in rsi_signals.
+
+    Returns:
+    - New DataFrame with added 'RSI' and 'Position' columns (data is not modified).
+    """
+    return join_signals(data, *rsi_signals(StrategyColumns(data), rsi_period, rsi_overbought, rsi_oversold))
+
+
+class StreamingRSIStrategy:
     """
-    # Calculate RSI
-    data = rsi(data)
+    rsi_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held after it.
+    """
+    __slots__ = ('rsi', 'overbought', 'oversold')
+
+    def __init__(self, rsi_period=14, rsi_overbought=70, rsi_oversold=30):
+        self.rsi = StreamingRSI(rsi_period)
+        self.overbought = rsi_overbought
+        self.oversold = rsi_oversold
+
+    def update(self, bar):
+        long_signal, short_signal = rsi_conditions(self.rsi.update(bar), self.overbought, self.oversold)
+        if short_signal:
+            return -1
+        return 1 if long_signal else 0
 
-    # Initialize 'Buy/Sell' column with zeros
-    data['Position'] = 0
 
-    # Buy RSI is below the oversold threshold
-    data.loc[data['RSI'] < rsi_oversold, 'Position'] = 1
+def rsi_panel(panel, rsi_period=14, rsi_overbought=70, rsi_oversold=30):
+    """
+    rsi_strategy for many symbols at once.
 
-    # Sell when RSI is above the overbought threshold
-    data.loc[data['RSI'] > rsi_overbought, 'Position'] = -1
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - rsi_period, rsi_overbought, rsi_oversold: As in rsi_strategy.
 
-    return data
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    rsi = compute_rsi(panel['Close'], rsi_period).to_numpy()
+    return signal_values(*rsi_conditions(rsi, rsi_overbought, rsi_oversold))
@@ -1,55 +1,106 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+from preprocessing.streaming import NAN
+from Strategy.position_engine import state_machine_positions, PositionState
+from Strategy.signals import StrategyColumns, join_signals
 
-def sma_strategy(data):
+def sma_conditions(close, sma, close_back, sma_back):
     """
-    Implements a simple moving average crossover strategy using a Position column.
-    Adds a 'Position' column where:
+    Entry and exit conditions of the SMA crossover, shared by sma_signals, sma_panel and
+    StreamingSMAStrategy. Works on arrays (1-D or time x symbol) and on single values.
+
+    Parameters:
+    - close, sma: Close and SMA of the bar.
+    - close_back, sma_back: Close and SMA two bars back.
+
+    Returns:
+    - long_entry, short_entry, long_exit, short_exit for state_machine_positions or PositionState.
+    """
+    # Enter long if Close crosses above SMA, short if Close crosses below SMA
+    long_entry = (close > sma) & (close_back <= sma_back)
+    short_entry = (close < sma) & (close_back >= sma_back)
+
+    # Close long if Close falls below SMA, close short if Close rises above SMA
+    return long_entry, short_entry, close < sma, close > sma
+
+
+def sma_signals(columns):
+    """
+    Simple moving average crossover signals.
     - 1 indicates holding a long position (price is above SMA).
     - -1 indicates holding a short position (price is below SMA).
     - 0 indicates no position (position closed).
 
     Parameters:
-    - data: DataFrame with 'Close' price and pre-calculated 'SMA'.
+    - columns: StrategyColumns with 'Close' and pre-calculated 'SMA'.
 
     Returns:
-    - DataFrame with an added 'Position' column.
+    - int8 Position array and a dict of diagnostic columns (none for this strategy).
     """
     # Check if 'SMA' column exists in the DataFrame
-    if 'SMA' not in data.columns:
+    if 'SMA' not in columns:
         raise ValueError("Data must contain an 'SMA' column")
-    
-    # Make a copy of the data to prevent SettingWithCopyWarning
-    data = data.copy()
-
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
-
-    # Define the conditions for entering and exiting positions
-    for i in range(1, len(data)):
-        # Check if previous position was flat (no position)
-        if data['Position'].iloc[i - 1] == 0:
-            # Enter a long position if Close crosses above SMA
-            if data['Close'].iloc[i] > data['SMA'].iloc[i] and data['Close'].iloc[i - 2] <= data['SMA'].iloc[i - 2]:
-                data.at[data.index[i], 'Position'] = 1  # Long position
-            # Enter a short position if Close crosses below SMA
-            elif data['Close'].iloc[i] < data['SMA'].iloc[i] and data['Close'].iloc[i - 2] >= data['SMA'].iloc[i - 2]:
-                data.at[data.index[i], 'Position'] = -1  # Short position
-
-        # If holding a long position, check if it should be closed or reversed
-        elif data['Position'].iloc[i - 1] == 1:
-            # Close long if Close crosses below SMA (exit)
-            if data['Close'].iloc[i] < data['SMA'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0  # Close long position
-            else:
-                data.at[data.index[i], 'Position'] = 1  # Maintain long position
-
-        # If holding a short position, check if it should be closed or reversed
-        elif data['Position'].iloc[i - 1] == -1:
-            # Close short if Close crosses above SMA (exit)
-            if data['Close'].iloc[i] > data['SMA'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0  # Close short position
-            else:
-                data.at[data.index[i], 'Position'] = -1  # Maintain short position
-
-    return data
+
+    close = columns['Close']
+    sma = columns['SMA']
+
+    # Close two bars back; like iloc[i - 2], the second bar wraps around to the last row
+    close_back = np.roll(close, 2)
+    sma_back = np.roll(sma, 2)
+
+    return state_machine_positions(*sma_conditions(close, sma, close_back, sma_back)), {}
+
+
+def sma_strategy(data):
+    """
+    Implements a simple moving average crossover strategy using a Position column.
+
+    Parameters:
+    - data: DataFrame with 'Close' price and pre-calculated 'SMA'.
+
+    Returns:
+    - New DataFrame with an added 'Position' column (data is not modified).
+    """
+    return join_signals(data, *sma_signals(StrategyColumns(data)))
+
+
+class StreamingSMAStrategy:
+    """
+    sma_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and 'SMA' (e.g. from
+    preprocessing.streaming.StreamingSMA) and returns the position held after it.
+    """
+    __slots__ = ('state', 'history')
+
+    def __init__(self):
+        self.state = PositionState()
+        self.history = deque([(NAN, NAN), (NAN, NAN)], maxlen=2)  # (Close, SMA) of the last two bars
+
+    def update(self, bar):
+        close = bar['Close']
+        sma = bar['SMA']
+        close_back, sma_back = self.history[0]
+        self.history.append((close, sma))
+        return self.state.step(*sma_conditions(close, sma, close_back, sma_back))
+
+
+def sma_panel(panel, period=14):
+    """
+    sma_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - period: SMA period (default is 14, like preprocessing.indicator.sma).
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close'].to_numpy()
+    sma = panel['Close'].rolling(window=period).mean().to_numpy()
+
+    close_back = np.roll(close, 2, axis=0)
+    sma_back = np.roll(sma, 2, axis=0)
+
+    return state_machine_positions(*sma_conditions(close, sma, close_back, sma_back))
@@ -1,32 +1,101 @@
-import pandas as pd
-import numpy as np
+from preprocessing.indicator import output_dtype
+from preprocessing.streaming import RollingExtremes
+from Strategy.position_engine import carry_forward, signal_values, SignalState
+from Strategy.signals import StrategyColumns, join_signals, previous_values
 
-def breakout_strategy(data, lookback=20):
+def breakout_conditions(close, previous_highest, previous_lowest):
     """
-    Implements a breakout strategy.
+    Long and short signals of the breakout strategy, shared by the array and per-bar
+    versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Parameters:
+    - close: Close of the bar.
+    - previous_highest, previous_lowest: Highest and lowest Close of the lookback window up to the previous bar.
+
+    Returns:
+    - long_signal, short_signal for signal_values/carry_forward or SignalState.
+    """
+    # Buy on a break above the highest high, sell on a break below the lowest low
+    return close > previous_highest, close < previous_lowest
+
+
+def breakout_signals(columns, lookback=20):
+    """
+    Breakout signals.
     - Buy when price breaks above the highest high over the lookback period.
     - Sell when price breaks below the lowest low over the lookback period.
 
     Parameters:
-    - data: DataFrame with 'Close' prices.
+    - columns: StrategyColumns with 'Close' prices.
     - lookback: Lookback period for identifying breakout levels (default is 20).
 
     Returns:
-    - DataFrame with added 'HHigh', 'LLow', and 'Position' columns.
+    - int8 Position array and a dict with the 'HHigh' and 'LLow' columns.
     """
     # Calculate the highest high and lowest low over the lookback period
-    data['HHigh'] = data['Close'].rolling(window=lookback, min_periods=1).max()
-    data['LLow'] = data['Close'].rolling(window=lookback, min_periods=1).min()
-
-    # Initialize 'Position' column with zeros (no position)
-    data['Position'] = 0
+    close = columns.series('Close')
+    dtype = output_dtype(close)
+    highest = close.rolling(window=lookback, min_periods=1).max().to_numpy(dtype=dtype)
+    lowest = close.rolling(window=lookback, min_periods=1).min().to_numpy(dtype=dtype)
 
-    # Generate buy and sell signals
-    data.loc[data['Close'] > data['HHigh'].shift(1), 'Position'] = 1   # Buy signal
-    data.loc[data['Close'] < data['LLow'].shift(1), 'Position'] = -1   # Sell signal
+    # Generate buy and sell signals against the previous bar's levels
+    signal = signal_values(*breakout_conditions(columns['Close'], previous_values(highest), previous_values(lowest)))
 
     # Forward fill the positions to maintain trades until an opposite signal occurs
-    data['Position'] = data['Position'].replace(0, np.nan).ffill().fillna(0)
+    return carry_forward(signal), {'HHigh': highest, 'LLow': lowest}
+
+
+def breakout_strategy(data, lookback=20):
+    """
+    Implements a breakout strategy.
+
+    Parameters:
+    - data: DataFrame with 'Close' prices.
+    - lookback: Lookback period for identifying breakout levels (default is 20).
+
+    Returns:
+    - New DataFrame with added 'HHigh', 'LLow', and 'Position' columns (data is not modified).
+    """
+    return join_signals(data, *breakout_signals(StrategyColumns(data), lookback))
+
+
+class StreamingBreakoutStrategy:
+    """
+    breakout_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held
+    after it. The highest and lowest Close of the lookback window are kept in
+    monotonic deques, so every bar costs O(1) whatever the lookback.
+    """
+    __slots__ = ('extremes', 'state')
+
+    def __init__(self, lookback=20):
+        self.extremes = RollingExtremes(lookback)
+        self.state = SignalState()
 
+    def update(self, bar):
+        close = bar['Close']
+        # Compare against the levels up to the previous bar, then add this bar
+        conditions = breakout_conditions(close, self.extremes.high(), self.extremes.low())
+        self.extremes.push(close)
+        return self.state.step(*conditions)
 
-    return data
+
+def breakout_panel(panel, lookback=20):
+    """
+    breakout_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - lookback: Lookback period for identifying breakout levels (default is 20).
+
+    Returns:
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close']
+    highest = close.rolling(window=lookback, min_periods=1).max().to_numpy()
+    lowest = close.rolling(window=lookback, min_periods=1).min().to_numpy()
+    signal = signal_values(*breakout_conditions(close.to_numpy(), previous_values(highest), previous_values(lowest)))
+
+    # Forward fill the positions to maintain trades until an opposite signal occurs
+    return carry_forward(signal)
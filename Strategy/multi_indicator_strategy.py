@@ -1,62 +1,133 @@
 import pandas as pd
 import numpy as np
+from Strategy.position_engine import state_machine_positions, PositionState
+from preprocessing.indicator import rolling_mean, rsi_values, fingerprint, compute_rsi
+from preprocessing.streaming import RollingWindow, StreamingRSI, NAN
+from Strategy.signals import StrategyColumns, join_signals
 
-def multi_indicator_strategy(data, fast_window=10, slow_window=50, rsi_period=14, overbought=70, oversold=30):
+def multi_indicator_conditions(fast_ma, slow_ma, previous_fast_ma, previous_slow_ma, rsi, overbought, oversold):
+    """
+    Entry and exit conditions of the multi-indicator strategy, shared by the array and
+    per-bar versions. Works on arrays (1-D or time x symbol) and on single values.
+
+    Parameters:
+    - fast_ma, slow_ma: Fast and slow moving averages of the bar.
+    - previous_fast_ma, previous_slow_ma: The same on the previous bar.
+    - rsi, overbought, oversold: RSI of the bar and the levels that block new entries.
+
+    Returns:
+    - long_entry, short_entry, long_exit, short_exit for state_machine_positions or PositionState.
     """
-    Multi-Indicator Strategy combining Moving Average Crossover and RSI for trend-following and mean-reversion.
-    
+    # Long entry: Fast MA crosses above Slow MA and RSI is below overbought level
+    long_entry = (fast_ma > slow_ma) & (previous_fast_ma <= previous_slow_ma) & (rsi < overbought)
+    # Short entry: Fast MA crosses below Slow MA and RSI is above oversold level
+    short_entry = (fast_ma < slow_ma) & (previous_fast_ma >= previous_slow_ma) & (rsi > oversold)
+
+    # Close long if Fast MA crosses below Slow MA, close short if it crosses above
+    return long_entry, short_entry, fast_ma < slow_ma, fast_ma > slow_ma
+
+
+def multi_indicator_signals(columns, fast_window=10, slow_window=50, rsi_period=14, overbought=70, oversold=30):
+    """
+    Multi-indicator signals combining Moving Average Crossover and RSI for trend-following and mean-reversion.
+
     - Buy when the fast MA crosses above the slow MA and RSI is not overbought.
     - Sell when the fast MA crosses below the slow MA and RSI is not oversold.
-    
+
     Parameters:
-    - data: DataFrame with 'Close' prices.
+    - columns: StrategyColumns with 'Close' prices.
     - fast_window: Fast-moving average period (default is 10).
     - slow_window: Slow-moving average period (default is 50).
     - rsi_period: RSI calculation period (default is 14).
     - overbought: RSI level to avoid entering new long positions (default is 70).
     - oversold: RSI level to avoid entering new short positions (default is 30).
-    
+
+    Returns:
+    - int8 Position array and a dict with the 'Fast_MA', 'Slow_MA' and 'RSI' columns.
+    """
+    # Calculate moving averages and RSI (shared with preprocessing.indicator)
+    close = columns.series('Close')
+    key = fingerprint(close)
+    fast_ma = rolling_mean(close, fast_window, key=key)
+    slow_ma = rolling_mean(close, slow_window, key=key)
+    rsi = rsi_values(close, rsi_period, key=key)
+
+    previous_fast_ma = np.roll(fast_ma, 1)
+    previous_slow_ma = np.roll(slow_ma, 1)
+
+    position = state_machine_positions(*multi_indicator_conditions(fast_ma, slow_ma, previous_fast_ma,
+                                                                   previous_slow_ma, rsi, overbought, oversold))
+    return position, {'Fast_MA': fast_ma, 'Slow_MA': slow_ma, 'RSI': rsi}
+
+
+def multi_indicator_strategy(data, fast_window=10, slow_window=50, rsi_period=14, overbought=70, oversold=30):
+    """
+    Multi-Indicator Strategy combining Moving Average Crossover and RSI.
+
+    Parameters:
+    - data: DataFrame with 'Close' prices.
+    - fast_window, slow_window, rsi_period, overbought, oversold: As in multi_indicator_signals.
+
+    Returns:
+    - New DataFrame with added 'Fast_MA', 'Slow_MA', 'RSI', and 'Position' columns
+      (data is not modified).
+    """
+    columns = StrategyColumns(data)
+    return join_signals(data, *multi_indicator_signals(columns, fast_window, slow_window, rsi_period, overbought,
+                                                       oversold))
+
+
+class StreamingMultiIndicatorStrategy:
+    """
+    multi_indicator_strategy one bar at a time, for replays and live feeds.
+
+    update(bar) takes a mapping with the bar's 'Close' and returns the position held after it.
+    """
+    __slots__ = ('fast', 'slow', 'rsi', 'overbought', 'oversold', 'previous_fast', 'previous_slow', 'state')
+
+    def __init__(self, fast_window=10, slow_window=50, rsi_period=14, overbought=70, oversold=30):
+        self.fast = RollingWindow(fast_window)
+        self.slow = RollingWindow(slow_window)
+        self.rsi = StreamingRSI(rsi_period)
+        self.overbought = overbought
+        self.oversold = oversold
+        self.previous_fast = NAN
+        self.previous_slow = NAN
+        self.state = PositionState()
+
+    def update(self, bar):
+        close = bar['Close']
+        self.fast.push(close)
+        self.slow.push(close)
+        fast = self.fast.mean()
+        slow = self.slow.mean()
+        rsi = self.rsi.update(bar)
+        previous_fast = self.previous_fast
+        previous_slow = self.previous_slow
+        self.previous_fast = fast
+        self.previous_slow = slow
+        return self.state.step(*multi_indicator_conditions(fast, slow, previous_fast, previous_slow, rsi,
+                                                           self.overbought, self.oversold))
+
+
+def multi_indicator_panel(panel, fast_window=10, slow_window=50, rsi_period=14, overbought=70, oversold=30):
+    """
+    multi_indicator_strategy for many symbols at once.
+
+    Parameters:
+    - panel: Dict of field name -> DataFrame with one column per symbol ('Close' is used).
+    - fast_window, slow_window, rsi_period, overbought, oversold: As in multi_indicator_strategy.
+
     Returns:
-    - DataFrame with added 'Fast_MA', 'Slow_MA', 'RSI', and 'Position' columns.
-    """
-    # Calculate moving averages
-    data['Fast_MA'] = data['Close'].rolling(window=fast_window).mean()
-    data['Slow_MA'] = data['Close'].rolling(window=slow_window).mean()
-
-    # Calculate RSI
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-    rs = gain / loss
-    data['RSI'] = 100 - (100 / (1 + rs))
-
-    # Initialize 'Position' column with zeros
-    data['Position'] = 0
-
-    # Define entry and exit conditions
-    for i in range(1, len(data)):
-        # If no position, check for entry signals
-        if data['Position'].iloc[i - 1] == 0:
-            # Long entry: Fast MA crosses above Slow MA and RSI is below overbought level
-            if (data['Fast_MA'].iloc[i] > data['Slow_MA'].iloc[i]) and (data['Fast_MA'].iloc[i - 1] <= data['Slow_MA'].iloc[i - 1]) and (data['RSI'].iloc[i] < overbought):
-                data.at[data.index[i], 'Position'] = 1  # Long position
-            # Short entry: Fast MA crosses below Slow MA and RSI is above oversold level
-            elif (data['Fast_MA'].iloc[i] < data['Slow_MA'].iloc[i]) and (data['Fast_MA'].iloc[i - 1] >= data['Slow_MA'].iloc[i - 1]) and (data['RSI'].iloc[i] > oversold):
-                data.at[data.index[i], 'Position'] = -1  # Short position
-        
-        # Maintain position if already in one
-        elif data['Position'].iloc[i - 1] == 1:
-            # Close long if Fast MA crosses below Slow MA
-            if data['Fast_MA'].iloc[i] < data['Slow_MA'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0
-            else:
-                data.at[data.index[i], 'Position'] = 1  # Maintain long position
-
-        elif data['Position'].iloc[i - 1] == -1:
-            # Close short if Fast MA crosses above Slow MA
-            if data['Fast_MA'].iloc[i] > data['Slow_MA'].iloc[i]:
-                data.at[data.index[i], 'Position'] = 0
-            else:
-                data.at[data.index[i], 'Position'] = -1  # Maintain short position
-
-    return data
+    - (time x symbol) int8 Position array.
+    """
+    close = panel['Close']
+    fast_ma = close.rolling(window=fast_window).mean().to_numpy()
+    slow_ma = close.rolling(window=slow_window).mean().to_numpy()
+    rsi = compute_rsi(close, rsi_period).to_numpy()
+
+    previous_fast_ma = np.roll(fast_ma, 1, axis=0)
+    previous_slow_ma = np.roll(slow_ma, 1, axis=0)
+
+    return state_machine_positions(*multi_indicator_conditions(fast_ma, slow_ma, previous_fast_ma,
+                                                               previous_slow_ma, rsi, overbought, oversold))
@@ -0,0 +1,263 @@
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional, fall back to the plain Python loop
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _position_kernel(long_entry, short_entry, long_exit, short_exit, price, entry_price,
+                     take_profit, stop_loss, position):
+    """
+    Bar-by-bar position state machine shared by the stateful strategies.
+    Works on plain NumPy arrays so it can be JIT-compiled by numba.
+    """
+    target_price = np.nan
+    stop_price = np.nan
+    position[0] = 0
+
+    for i in range(1, len(position)):
+        previous = position[i - 1]
+
+        # If no position, check for entry signals (long takes precedence)
+        if previous == 0:
+            if long_entry[i]:
+                position[i] = 1
+                target_price = entry_price[i] * (1 + take_profit)
+                stop_price = entry_price[i] * (1 - stop_loss)
+            elif short_entry[i]:
+                position[i] = -1
+                target_price = entry_price[i] * (1 - take_profit)
+                stop_price = entry_price[i] * (1 + stop_loss)
+            else:
+                position[i] = 0
+
+        # If holding a long position, close it on the exit signal, target or stop
+        elif previous == 1:
+            if long_exit[i] or price[i] >= target_price or price[i] <= stop_price:
+                position[i] = 0
+            else:
+                position[i] = 1
+
+        # If holding a short position, close it on the exit signal, target or stop
+        else:
+            if short_exit[i] or price[i] <= target_price or price[i] >= stop_price:
+                position[i] = 0
+            else:
+                position[i] = -1
+
+    return position
+
+
+def _panel_position_kernel(long_entry, short_entry, long_exit, short_exit, price, entry_price,
+                           take_profit, stop_loss, position):
+    """
+    The same state machine on (time x symbol) arrays, stepping through time once
+    and updating every symbol of a bar together with NumPy. Used when numba is not
+    installed; with numba every symbol runs through the compiled kernel instead.
+    """
+    # Everything that does not depend on the previous position is worked out up front
+    entry = np.where(long_entry, 1, np.where(short_entry, -1, 0)).astype(position.dtype)
+    has_levels = not (np.isnan(take_profit) and np.isnan(stop_loss))
+    if has_levels:
+        long_target = entry_price * (1 + take_profit)
+        long_stop = entry_price * (1 - stop_loss)
+        short_target = entry_price * (1 - take_profit)
+        short_stop = entry_price * (1 + stop_loss)
+        upper = np.full(position.shape[1], np.nan)  # Long target / short stop
+        lower = np.full(position.shape[1], np.nan)  # Long stop / short target
+    position[0, :] = 0
+
+    for i in range(1, position.shape[0]):
+        previous = position[i - 1]
+        leave = np.where(previous == 1, long_exit[i], short_exit[i])
+        if has_levels:
+            leave |= (price[i] >= upper) | (price[i] <= lower)
+        current = np.where(previous == 0, entry[i], np.where(leave, 0, previous))
+        position[i] = current
+
+        if has_levels:
+            opened = (previous == 0) & (current != 0)
+            if opened.any():
+                is_long = current == 1
+                upper = np.where(opened, np.where(is_long, long_target[i], short_stop[i]), upper)
+                lower = np.where(opened, np.where(is_long, long_stop[i], short_target[i]), lower)
+
+    return position
+
+
+class PositionState:
+    """
+    The position state machine of state_machine_positions, one bar at a time.
+
+    Used by the per-bar (streaming) strategies; feeding it the conditions of every
+    bar (from the same conditions function as the array versions) gives the same
+    positions as state_machine_positions.
+
+    Parameters:
+    - take_profit, stop_loss: As in state_machine_positions (None to disable).
+    """
+    __slots__ = ('position', 'take_profit', 'stop_loss', 'target_price', 'stop_price', 'started')
+
+    def __init__(self, take_profit=None, stop_loss=None):
+        self.position = 0
+        self.take_profit = math.nan if take_profit is None else float(take_profit)
+        self.stop_loss = math.nan if stop_loss is None else float(stop_loss)
+        self.target_price = math.nan
+        self.stop_price = math.nan
+        self.started = False
+
+    def step(self, long_entry, short_entry, long_exit, short_exit, price=math.nan, entry_price=math.nan):
+        """Position held at the end of the bar (the first bar is always flat)."""
+        if not self.started:
+            self.started = True
+            return 0
+
+        previous = self.position
+        if previous == 0:
+            if long_entry:
+                self.position = 1
+                self.target_price = entry_price * (1 + self.take_profit)
+                self.stop_price = entry_price * (1 - self.stop_loss)
+            elif short_entry:
+                self.position = -1
+                self.target_price = entry_price * (1 - self.take_profit)
+                self.stop_price = entry_price * (1 + self.stop_loss)
+        elif previous == 1:
+            if long_exit or price >= self.target_price or price <= self.stop_price:
+                self.position = 0
+        else:
+            if short_exit or price <= self.target_price or price >= self.stop_price:
+                self.position = 0
+        return self.position
+
+
+def carry_forward(signal):
+    """
+    Hold every non-zero signal until the next one (0 before the first), like
+    replacing zeros with the previous non-zero value.
+
+    Parameters:
+    - signal: int8 array of 1 (long), -1 (short) and 0 (no new signal); a
+              (time x symbol) array is carried forward for every symbol.
+
+    Returns:
+    - int8 Position array of the same shape.
+    """
+    signal = np.asarray(signal, dtype=np.int8)
+    steps = np.arange(len(signal)).reshape((-1,) + (1,) * (signal.ndim - 1))
+    last = np.maximum.accumulate(np.where(signal != 0, steps, 0), axis=0)
+    return np.take_along_axis(signal, last, axis=0)
+
+
+def signal_values(long_signal, short_signal):
+    """
+    Signal array of a strategy's long and short conditions: 1 where long_signal is
+    set, -1 where short_signal is (short wins if both are), 0 elsewhere.
+
+    Parameters:
+    - long_signal, short_signal: Boolean arrays, 1-D or (time x symbol).
+
+    Returns:
+    - int8 signal array.
+    """
+    long_signal = np.asarray(long_signal, dtype=np.bool_)
+    short_signal = np.asarray(short_signal, dtype=np.bool_)
+    shape = np.broadcast_shapes(long_signal.shape, short_signal.shape)
+    signal = np.zeros(shape, dtype=np.int8)
+    signal[np.broadcast_to(long_signal, shape)] = 1
+    signal[np.broadcast_to(short_signal, shape)] = -1
+    return signal
+
+
+class SignalState:
+    """
+    carry_forward one bar at a time: the last signal is held until the next one.
+
+    Used by the per-bar (streaming) versions of the signal strategies, fed the same
+    long and short conditions as signal_values.
+    """
+    __slots__ = ('position',)
+
+    def __init__(self):
+        self.position = 0
+
+    def step(self, long_signal, short_signal):
+        """Position held at the end of the bar."""
+        if short_signal:
+            self.position = -1
+        elif long_signal:
+            self.position = 1
+        return self.position
+
+
+def state_machine_positions(long_entry, short_entry, long_exit, short_exit,
+                            price=None, entry_price=None, take_profit=None, stop_loss=None):
+    """
+    Build a Position array (1 long, -1 short, 0 flat) from boolean condition arrays.
+
+    The first bar is always flat. On every later bar the previous position decides
+    which conditions are checked: the entries when flat (long before short) and the
+    matching exit when holding a position.
+
+    Two-dimensional (time x symbol) inputs are run for every symbol in one pass over
+    time and give a (time x symbol) Position array; conditions common to all symbols
+    can be passed as (time x 1) arrays.
+
+    Parameters:
+    - long_entry, short_entry: Boolean arrays, True where a new position may be opened.
+    - long_exit, short_exit: Boolean arrays, True where an open position must be closed.
+    - price: Optional price array checked against the target and stop levels (e.g. Close).
+    - entry_price: Optional price array the levels are set from on entry (default is price).
+    - take_profit: Fractional distance of the target from the entry price (e.g. 0.05 for 5%).
+    - stop_loss: Fractional distance of the stop from the entry price (e.g. 0.01 for 1%).
+
+    Returns:
+    - NumPy int8 array with the position held at the end of every bar.
+    """
+    long_entry = np.asarray(long_entry, dtype=np.bool_)
+    short_entry = np.asarray(short_entry, dtype=np.bool_)
+    long_exit = np.asarray(long_exit, dtype=np.bool_)
+    short_exit = np.asarray(short_exit, dtype=np.bool_)
+    n = len(long_entry)
+
+    shape = np.broadcast_shapes(long_entry.shape, short_entry.shape, long_exit.shape, short_exit.shape)
+    position = np.zeros(shape, dtype=np.int8)
+    if n == 0:
+        return position
+
+    # Missing levels are NaN, and comparisons against NaN never trigger an exit
+    take_profit = np.nan if take_profit is None else float(take_profit)
+    stop_loss = np.nan if stop_loss is None else float(stop_loss)
+    if price is None:
+        price = np.full(shape, np.nan)
+    else:
+        price = np.asarray(price, dtype=np.float64)
+    if entry_price is None:
+        entry_price = price
+    else:
+        entry_price = np.asarray(entry_price, dtype=np.float64)
+
+    if position.ndim == 1:
+        return _position_kernel(long_entry, short_entry, long_exit, short_exit, price, entry_price,
+                                take_profit, stop_loss, position)
+
+    # Conditions shared by all symbols may be given as (time x 1) columns
+    arrays = [np.broadcast_to(values, position.shape)
+              for values in (long_entry, short_entry, long_exit, short_exit, price, entry_price)]
+    if not HAVE_NUMBA:
+        return _panel_position_kernel(*arrays, take_profit, stop_loss, position)
+
+    for s in range(position.shape[1]):
+        position[:, s] = _position_kernel(*(np.ascontiguousarray(values[:, s]) for values in arrays),
+                                          take_profit, stop_loss, np.zeros(len(position), dtype=np.int8))
+    return position
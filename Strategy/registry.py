@@ -0,0 +1,114 @@
+import importlib
+from collections import namedtuple
+
+# A registered strategy: where to import it from, its default parameters, the
+# indicator columns it expects to find in the data (beyond OHLCV) and the names of
+# its multi-symbol (panel), column-view (signals) and per-bar (stream) versions in
+# the same module, if it has them
+StrategySpec = namedtuple('StrategySpec', ['name', 'module', 'function', 'defaults', 'indicators', 'panel',
+                                           'signals', 'stream'])
+
+STRATEGIES = {}
+_loaded = {}
+
+
+def register(name, module, function, defaults=None, indicators=(), panel=None, signals=None, stream=None):
+    """
+    Register a strategy under a short name without importing it.
+
+    Parameters:
+    - name: Name used to select the strategy (e.g., 'sma').
+    - module: Dotted path of the module defining the strategy function.
+    - function: Name of the strategy function inside the module.
+    - defaults: Default keyword parameters of the strategy.
+    - indicators: Indicator columns the data must contain before the strategy runs.
+    - panel: Name of the function in the same module that runs the strategy on
+             (time x symbol) data for portfolio backtests.
+    - signals: Name of the function in the same module that takes read-only column views
+               (Strategy.signals.StrategyColumns) and returns the Position array and a dict
+               of diagnostic columns, without building a frame.
+    - stream: Name of the class in the same module that runs the strategy one bar at a time:
+              it is created with the strategy's parameters, and update(bar) returns the
+              position held after the bar (see Practice.replay).
+    """
+    STRATEGIES[name] = StrategySpec(name, module, function, dict(defaults or {}), tuple(indicators), panel,
+                                    signals, stream)
+    _loaded.pop(name, None)
+    _loaded.pop((name, 'panel'), None)
+    _loaded.pop((name, 'signals'), None)
+    _loaded.pop((name, 'stream'), None)
+
+
+def strategy_names():
+    """Names of all registered strategies, in registration order."""
+    return list(STRATEGIES)
+
+
+def get_spec(name):
+    """Return the StrategySpec registered under name."""
+    if name not in STRATEGIES:
+        raise ValueError(f"Invalid strategy. Choose from {', '.join(repr(n) for n in STRATEGIES)}")
+    return STRATEGIES[name]
+
+
+def get_strategy(name):
+    """Return the strategy function registered under name, importing its module on first use."""
+    if name not in _loaded:
+        spec = get_spec(name)
+        _loaded[name] = getattr(importlib.import_module(spec.module), spec.function)
+    return _loaded[name]
+
+
+def get_panel_strategy(name):
+    """Return the multi-symbol version of the strategy registered under name."""
+    spec = get_spec(name)
+    if spec.panel is None:
+        raise ValueError(f"Strategy {name!r} has no multi-symbol version")
+    if (name, 'panel') not in _loaded:
+        _loaded[(name, 'panel')] = getattr(importlib.import_module(spec.module), spec.panel)
+    return _loaded[(name, 'panel')]
+
+
+def get_signal_strategy(name):
+    """Return the column-view (signals) version of the strategy registered under name, or None."""
+    spec = get_spec(name)
+    if spec.signals is None:
+        return None
+    if (name, 'signals') not in _loaded:
+        _loaded[(name, 'signals')] = getattr(importlib.import_module(spec.module), spec.signals)
+    return _loaded[(name, 'signals')]
+
+
+def get_stream_strategy(name):
+    """Return the per-bar (streaming) class of the strategy registered under name."""
+    spec = get_spec(name)
+    if spec.stream is None:
+        raise ValueError(f"Strategy {name!r} has no per-bar version")
+    if (name, 'stream') not in _loaded:
+        _loaded[(name, 'stream')] = getattr(importlib.import_module(spec.module), spec.stream)
+    return _loaded[(name, 'stream')]
+
+
+register('sma', 'Strategy.SMA_strategy', 'sma_strategy', indicators=['SMA'], panel='sma_panel',
+         signals='sma_signals', stream='StreamingSMAStrategy')
+register('bb', 'Strategy.BB_strategy', 'bollinger_band_strategy', panel='bollinger_band_panel',
+         signals='bollinger_band_signals', stream='StreamingBollingerBandStrategy')
+register('rsi', 'Strategy.RSI_strategy', 'rsi_strategy',
+         defaults={'rsi_period': 14, 'rsi_overbought': 70, 'rsi_oversold': 30}, panel='rsi_panel',
+         signals='rsi_signals', stream='StreamingRSIStrategy')
+register('macd', 'Strategy.MACD_crossover_strategy', 'macd_strategy',
+         defaults={'short_window': 12, 'long_window': 26, 'signal_window': 9}, panel='macd_panel',
+         signals='macd_signals', stream='StreamingMACDStrategy')
+register('idg', 'Strategy.Intraday_gap_strategy', 'intraday_gap_strategy',
+         defaults={'target_gap_close': 5, 'stop_loss': 1}, panel='intraday_gap_panel',
+         signals='intraday_gap_signals', stream='StreamingIntradayGapStrategy')
+register('tfb', 'Strategy.Trend_following_breakout_strategy', 'breakout_strategy',
+         defaults={'lookback': 20}, panel='breakout_panel', signals='breakout_signals',
+         stream='StreamingBreakoutStrategy')
+register('mr', 'Strategy.Mean_reversion_strategy', 'mean_reversion_strategy',
+         defaults={'lookback': 20}, panel='mean_reversion_panel', signals='mean_reversion_signals',
+         stream='StreamingMeanReversionStrategy')
+register('mis', 'Strategy.multi_indicator_strategy', 'multi_indicator_strategy',
+         defaults={'fast_window': 10, 'slow_window': 50, 'rsi_period': 14, 'overbought': 70, 'oversold': 30},
+         panel='multi_indicator_panel', signals='multi_indicator_signals',
+         stream='StreamingMultiIndicatorStrategy')
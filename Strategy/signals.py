@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+class StrategyColumns:
+    """
+    Read-only views of the columns of a frame, handed to strategy signal functions.
+
+    columns['Close'] is a read-only NumPy view of the column, columns.series('Close')
+    the same values as a Series on the frame's index (for rolling windows) and
+    columns.index the datetime index. Columns are looked up on first use and never
+    copied, so any number of strategies can run over the same frame.
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._views = {}
+        self.index = data.index
+
+    def __getitem__(self, name):
+        if name not in self._views:
+            values = self._data[name].to_numpy().view()
+            values.flags.writeable = False
+            self._views[name] = values
+        return self._views[name]
+
+    def __contains__(self, name):
+        return name in self._data.columns
+
+    def __len__(self):
+        return len(self.index)
+
+    def series(self, name):
+        """A column as a Series on the frame's index, sharing the column's memory."""
+        return pd.Series(self[name], index=self.index, name=name, copy=False)
+
+
+def previous_values(values):
+    """Values of the previous bar, like Series.shift(1): NaN on the first bar, same float dtype."""
+    values = np.asarray(values)
+    previous = np.empty(values.shape, dtype=np.result_type(values.dtype, np.float32))
+    previous[:1] = np.nan
+    previous[1:] = values[:-1]
+    return previous
+
+
+def join_signals(data, position, diagnostics=None):
+    """
+    The strategy frame: data with the diagnostic columns and 'Position' added.
+
+    The result is a new frame that shares data's columns and the given arrays;
+    data itself is not modified.
+
+    Parameters:
+    - data: The frame the strategy ran over.
+    - position: int8 Position array, one entry per row.
+    - diagnostics: Optional dict of column name -> array (e.g. {'HHigh': ..., 'LLow': ...}).
+    """
+    columns = {name: pd.Series(values, index=data.index, copy=False) for name, values in (diagnostics or {}).items()}
+    columns['Position'] = pd.Series(position, index=data.index, copy=False)
+    return data.assign(**columns)
@@ -1,36 +1,70 @@
-from preprocessing.data_ingest import data_in_csv
+from preprocessing.data_ingest import load_cleaned_data
 from preprocessing.timeframe import convert_timeframe
-from Charts.candle_chart import interactive_candle_chart
-from preprocessing.cleaning import data_cleaning
-from preprocessing.indicator import sma, ema, rsi, macd, bollinger_bands, atr, garman_klass
+from preprocessing.indicator import sma
 from Evaluation.strategy_performance import strategy_performance
-import pandas as pd
-import numpy as np
+from Evaluation.multi_strategy import compare_strategies
+from Profiling import instrument
+import argparse
+import contextlib
 #from Practice.random import randomdate_data
 #from Practice.plotter import plotter
 #from Practice.performance import performance
 
 
-data = data_in_csv('data/NIFTY50-Minute_data.csv')
-data = data_cleaning(data)
-data = convert_timeframe(data, '5min')
-
-#indicators 
-
-data = sma(data)
-#data = ema(data)
-#data = rsi(data)
-#data = macd(data)
-#data = bollinger_bands(data)
-#data = atr(data)
-#data = garman_klass(data
-print(data.head(5))
-print(data.tail(5))
-print("Available strategies-'sma', 'bb', 'rsi', 'macd', 'idg', 'tfb', 'mr'")
-strategy = input("Enter the strategy you want to implement: ")
-close_capital ,pnl, points = strategy_performance(data, strategy , start_date="2020-12-01", end_date="2020-12-10", initial_capital=100000)
-print(f"Close Capital: {close_capital}")
-print(f"Points Captured: {points}")
-print(f"Profit/Loss: {pnl}")
-
-#fig = interactive_candle_chart(data, show_fig=True)
+def main():
+    parser = argparse.ArgumentParser(description='Backtest a strategy on the NIFTY50 minute data.')
+    parser.add_argument('--all', action='store_true',
+                        help='Backtest every registered strategy in parallel and print a comparison table')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes for --all (default: one per strategy)')
+    parser.add_argument('--timings', action='store_true', help='Print the time spent in every pipeline stage')
+    parser.add_argument('--memory', action='store_true', help='Also record the memory change of every stage (slower)')
+    parser.add_argument('--trace', metavar='FILE', help='Write the stage timings as a Chrome trace JSON file')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='',
+                        help='Run under cProfile; print the top functions, or dump the statistics to FILE')
+    args = parser.parse_args()
+    if args.timings or args.memory or args.trace:
+        instrument.enable(memory=args.memory)
+    profiler = instrument.profile(args.profile or None) if args.profile is not None else contextlib.nullcontext()
+
+    with profiler:
+        start_date = "2020-12-01"
+        end_date = "2020-12-10"
+
+        # Only load the backtest window plus enough history to warm up the indicators
+        data = load_cleaned_data('data/NIFTY50-Minute_data.csv', start_date=start_date, end_date=end_date, warmup='5D')
+        data = convert_timeframe(data, '5min')
+
+        #indicators 
+
+        data = sma(data)
+        #data = ema(data)
+        #data = rsi(data)
+        #data = macd(data)
+        #data = bollinger_bands(data)
+        #data = atr(data)
+        #data = garman_klass(data
+        print(data.head(5))
+        print(data.tail(5))
+        if args.all:
+            comparison = compare_strategies(data, start_date=start_date, end_date=end_date, initial_capital=100000,
+                                            processes=args.processes)
+            print(comparison.to_string(float_format=lambda value: f'{value:,.2f}'))
+        else:
+            print("Available strategies-'sma', 'bb', 'rsi', 'macd', 'idg', 'tfb', 'mr', 'mis'")
+            strategy = input("Enter the strategy you want to implement: ")
+            close_capital ,pnl, points = strategy_performance(data, strategy , start_date=start_date, end_date=end_date, initial_capital=100000)
+            print(f"Close Capital: {close_capital}")
+            print(f"Points Captured: {points}")
+            print(f"Profit/Loss: {pnl}")
+
+    if instrument.is_enabled():
+        print(instrument.summary().to_string(float_format=lambda value: f'{value:,.4f}'))
+    if args.trace:
+        instrument.write_chrome_trace(args.trace)
+        print(f"Trace written to {args.trace}")
+
+    #fig = interactive_candle_chart(data, show_fig=True)
+
+
+if __name__ == '__main__':
+    main()
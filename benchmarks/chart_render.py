@@ -0,0 +1,95 @@
+"""
+Chart rendering benchmark.
+
+Builds the backtest candle chart for a year of 1-minute bars with SMA, RSI and
+Bollinger Band lines and buy/sell markers, and reports how long the figure takes
+to build and to serialize to JSON and how large the payload is, with and without
+the WebGL path and decimation. Browser frame rate is not measured here; open the
+saved HTML files (--html) to compare panning by hand.
+
+Usage:
+    python benchmarks/chart_render.py [--data data/NIFTY50-Minute_data.csv] [--days 250] [--runs 3] [--html out_dir]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Charts.candle_chart import interactive_candle_chart
+from preprocessing.indicator import sma, rsi, bollinger_bands
+
+CASES = [
+    ('svg', dict(webgl=False, max_points=None)),
+    ('webgl', dict(webgl=True, max_points=None)),
+    ('svg, 5000 points', dict(webgl=False, max_points=5000)),
+    ('webgl, 5000 points', dict(webgl=True, max_points=5000)),
+]
+
+
+def synthetic_minutes(days, seed=0):
+    """Random-walk 1-minute bars for the given number of trading days (09:15 to 15:29)."""
+    sessions = pd.bdate_range('2020-01-01', periods=days)
+    minutes = pd.timedelta_range('09:15:00', periods=375, freq='min')
+    index = pd.DatetimeIndex((sessions.values[:, None] + minutes.values[None, :]).ravel(), name='date')
+    rng = np.random.default_rng(seed)
+    close = 12000 + np.cumsum(rng.normal(0, 3, len(index)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 2, len(index)))
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread,
+                         'Low': np.minimum(open_, close) - spread, 'Close': close,
+                         'Volume': rng.integers(0, 1000, len(index))}, index=index)
+
+
+def chart_frame(data):
+    data = bollinger_bands(rsi(sma(data)))
+    # Alternate long and short every 500 bars so both marker traces are populated
+    data['Position'] = np.where(np.arange(len(data)) // 500 % 2 == 0, 1, -1)
+    return data
+
+
+def measure(data, options, runs):
+    builds, dumps = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fig = interactive_candle_chart(data, show_fig=False, **options)
+        built = time.perf_counter()
+        payload = fig.to_json()
+        dumps.append(time.perf_counter() - built)
+        builds.append(built - start)
+    return fig, statistics.median(builds), statistics.median(dumps), len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time building and serializing the candle chart.')
+    parser.add_argument('--data', help='Minute CSV to chart (default: synthetic data)')
+    parser.add_argument('--days', type=int, default=250, help='Trading days of synthetic data')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--html', help='Directory to write one HTML file per case')
+    args = parser.parse_args()
+
+    if args.data:
+        from preprocessing.data_ingest import load_cleaned_data
+        data = load_cleaned_data(args.data).iloc[-args.days * 375:]
+    else:
+        data = synthetic_minutes(args.days)
+    data = chart_frame(data)
+    print(f"rows: {len(data)}")
+    print(f"{'case':<20} {'build':>10} {'to_json':>10} {'payload':>10}")
+
+    for name, options in CASES:
+        fig, build, dump, size = measure(data, options, args.runs)
+        print(f"{name:<20} {build * 1000:>8.0f}ms {dump * 1000:>8.0f}ms {size / 2**20:>8.1f}MB")
+        if args.html:
+            os.makedirs(args.html, exist_ok=True)
+            fig.write_html(os.path.join(args.html, name.replace(', ', '_').replace(' ', '') + '.html'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Memory and accuracy check of the compact dtype schema.
+
+Loads a year of synthetic 1-minute bars twice: through the pipeline (float32 prices,
+int32 volume, int8 Position) and the way the CSV used to be read (pandas' default
+float64 and int64 columns). Both frames get every indicator and a Position column.
+The script reports their memory use and checks that each indicator and each
+strategy's positions match within tolerances. It exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/compact_dtypes.py [--days 250]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from pipeline import synthetic_raw
+from Evaluation.strategy_performance import run_strategy
+from preprocessing.cleaning import data_cleaning
+from preprocessing.data_ingest import data_in_csv
+from preprocessing.indicator import indicator_cache, sma, ema, rsi, bollinger_bands, macd, atr, garman_klass
+from Strategy.registry import strategy_names
+
+# Largest allowed difference between the compact and the float64 pipeline, per indicator:
+# ('rel', x) is relative to the price level, ('abs', x) is in the indicator's own units
+TOLERANCES = {
+    'SMA': ('rel', 1e-6), 'EMA': ('rel', 1e-6), 'MiddleBand': ('rel', 1e-6), 'UpperBand': ('rel', 1e-6),
+    'LowerBand': ('rel', 1e-6), 'MACD': ('abs', 5e-3), 'Signal': ('abs', 5e-3), 'ATR': ('abs', 5e-3),
+    'RSI': ('abs', 0.1), 'GK': ('abs', 1e-6),
+}
+# Share of bars whose position may differ (a crossover decided by a float32 rounding flips a trade)
+POSITION_MISMATCH = 0.001
+# Largest allowed memory of the compact frame relative to the float64 one: the columns must
+# be halved; the whole frame, with its datetime64 index (the same in both), ends up just above half
+COLUMNS_RATIO = 0.5
+FRAME_RATIO = 0.55
+
+
+def legacy_frame(path):
+    """The cleaned frame as the CSV used to be loaded: default read_csv dtypes, inferred dates."""
+    data = pd.read_csv(path)
+    data['date'] = pd.to_datetime(data['date'])
+    data = data.rename(columns={'date': 'Date', 'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close',
+                                'volume': 'Volume'})
+    return data.set_index('Date').dropna().between_time('09:15', '15:30')
+
+
+def add_indicators(data):
+    indicator_cache.clear()
+    data = garman_klass(atr(macd(bollinger_bands(rsi(ema(sma(data.copy())))))))
+    data['Position'] = run_strategy(data, 'sma')['Position']
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the compact dtype pipeline against float64.')
+    parser.add_argument('--days', type=int, default=250, help='Trading days of synthetic data')
+    args = parser.parse_args()
+
+    raw = synthetic_raw(args.days)
+    raw['date'] = raw['date'].str[:19]  # Plain 'yyyy-mm-dd HH:MM:SS' timestamps, as in the NIFTY file
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'minutes.csv')
+        raw.to_csv(path, index=False)
+        compact = data_cleaning(data_in_csv(path))
+        wide = legacy_frame(path)
+
+    compact_full = add_indicators(compact)
+    # Before the compact schema every strategy returned an int64 Position
+    wide_full = add_indicators(wide).astype({'Position': np.int64})
+
+    failures = []
+    compact_mb = compact_full.memory_usage(deep=True).sum() / 2**20
+    wide_mb = wide_full.memory_usage(deep=True).sum() / 2**20
+    frame_ratio = compact_mb / wide_mb
+    columns_ratio = compact_full.memory_usage(index=False).sum() / wide_full.memory_usage(index=False).sum()
+    print(f"rows: {len(compact_full):,}")
+    print(f"memory: float64 {wide_mb:.1f} MB, compact {compact_mb:.1f} MB ({frame_ratio:.0%} with the index, "
+          f"limit {FRAME_RATIO:.0%}; columns alone {columns_ratio:.0%}, limit {COLUMNS_RATIO:.0%})")
+    if frame_ratio > FRAME_RATIO:
+        failures.append(f'the frame uses {frame_ratio:.0%} of the float64 memory')
+    if columns_ratio >= COLUMNS_RATIO:
+        failures.append('columns use half or more of the float64 memory')
+
+    print(f"{'indicator':<12} {'max error':>12} {'tolerance':>12}")
+    scale = np.abs(wide['Close'].to_numpy()).max()
+    for col, (kind, tolerance) in TOLERANCES.items():
+        error = np.nanmax(np.abs(compact_full[col].to_numpy(np.float64) - wide_full[col].to_numpy()))
+        if kind == 'rel':
+            error /= scale
+        failed = not error <= tolerance
+        print(f"{col:<12} {error:>12.2e} {tolerance:>12.0e} {'FAIL' if failed else ''}")
+        if failed:
+            failures.append(f'{col} differs by {error:.2e}')
+
+    print(f"{'strategy':<12} {'mismatch':>12} {'tolerance':>12}")
+    for name in strategy_names():
+        indicator_cache.clear()
+        ours = run_strategy(compact, name)['Position'].to_numpy()
+        theirs = run_strategy(wide.copy(), name)['Position'].to_numpy()
+        mismatch = np.mean(ours != theirs)
+        failed = mismatch > POSITION_MISMATCH
+        print(f"{name:<12} {mismatch:>12.3%} {POSITION_MISMATCH:>12.1%} {'FAIL' if failed else ''}")
+        if failed:
+            failures.append(f'{name} positions differ on {mismatch:.3%} of bars')
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Pipeline benchmark: preprocessing -> indicators -> strategies -> evaluation.
+
+Generates random-walk 1-minute bars for each requested length, then times every
+stage of the pipeline on its own: reading the CSV, data_cleaning, convert_timeframe,
+each indicator, each registered strategy and strategy_performance. Every stage runs
+on a cold indicator cache. Throughput is reported in bars per second (input bars of
+the stage), and peak memory is measured with tracemalloc in a separate run so it
+does not slow down the timed ones.
+
+Results can be saved as a JSON baseline and compared against one: a stage whose
+throughput drops, or whose peak memory grows, by more than the tolerance is
+flagged, and the script exits with status 1.
+
+Usage:
+    python benchmarks/pipeline.py [--days 1,21,250] [--runs 3] [--only sma,rsi]
+                                  [--save baseline.json] [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Evaluation.strategy_performance import strategy_performance
+from preprocessing.cleaning import data_cleaning
+from preprocessing.data_ingest import data_in_csv
+from preprocessing.indicator import (indicator_cache, ensure_indicators, sma, ema, rsi, bollinger_bands, macd, atr,
+                                     garman_klass)
+from preprocessing.timeframe import convert_timeframe
+from Strategy.registry import strategy_names, get_spec, get_strategy
+
+# Named lengths for --days (trading days of 375 one-minute bars)
+PRESETS = {'1D': 1, '1M': 21, '1Y': 250, '10Y': 2500}
+
+INDICATORS = [sma, ema, rsi, bollinger_bands, macd, atr, garman_klass]
+
+
+def synthetic_raw(days, seed=0):
+    """Random-walk 1-minute bars shaped like the raw CSV (lower-case columns, 'date' strings)."""
+    sessions = pd.bdate_range('2015-01-01', periods=days)
+    minutes = pd.timedelta_range('09:15:00', periods=375, freq='min')
+    dates = pd.DatetimeIndex((sessions.values[:, None] + minutes.values[None, :]).ravel()).tz_localize('Asia/Kolkata')
+    rng = np.random.default_rng(seed)
+    close = 12000 + np.cumsum(rng.normal(0, 3, len(dates)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 2, len(dates)))
+    return pd.DataFrame({'date': dates.strftime('%Y-%m-%d %H:%M:%S%z'), 'open': open_.round(2),
+                         'high': (np.maximum(open_, close) + spread).round(2),
+                         'low': (np.minimum(open_, close) - spread).round(2), 'close': close.round(2),
+                         'volume': rng.integers(0, 1000, len(dates))})
+
+
+def pipeline_stages(csv_path, raw, strategy):
+    """
+    The stages to time, as (name, bars, setup, run) tuples.
+
+    setup builds the stage's input outside the measurement; run takes that input.
+    """
+    cleaned = data_cleaning(raw.copy())
+    bars = len(cleaned)
+    stages = [
+        ('data_in_csv', bars, lambda: csv_path, data_in_csv),
+        ('data_cleaning', bars, raw.copy, data_cleaning),
+        ('convert_timeframe 5min', bars, lambda: cleaned, lambda data: convert_timeframe(data, '5min')),
+    ]
+    for function in INDICATORS:
+        stages.append((f'indicator {function.__name__}', bars, lambda: cleaned.copy(deep=False), function))
+    for name in strategy_names():
+        spec = get_spec(name)
+        stages.append((f'strategy {name}', bars,
+                       lambda spec=spec: ensure_indicators(cleaned, spec.indicators),
+                       lambda data, spec=spec: get_strategy(spec.name)(data, **spec.defaults)))
+    stages.append((f'strategy_performance {strategy}', bars, lambda: cleaned,
+                   lambda data: strategy_performance(data, strategy, initial_capital=1e6, mode='headless')))
+    return stages
+
+
+def time_stage(setup, run, runs):
+    """Median wall time of run(setup()) over several runs, then peak traced memory of one more."""
+    seconds = []
+    for _ in range(runs):
+        indicator_cache.clear()
+        value = setup()
+        start = time.perf_counter()
+        run(value)
+        seconds.append(time.perf_counter() - start)
+
+    indicator_cache.clear()
+    value = setup()
+    tracemalloc.start()
+    try:
+        run(value)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(seconds), peak
+
+
+def run_benchmark(lengths, runs, only=None, strategy='sma'):
+    """
+    Time every stage for every data length.
+
+    Returns:
+    - Dict of 'length/stage' -> {'bars', 'seconds', 'bars_per_s', 'peak_mb'} ('error' instead
+      when the stage raised).
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, days in lengths:
+            raw = synthetic_raw(days)
+            csv_path = os.path.join(tmp, f'{label}.csv')
+            raw.to_csv(csv_path, index=False)
+            for name, bars, setup, run in pipeline_stages(csv_path, raw, strategy):
+                if only and not any(part in name for part in only):
+                    continue
+                key = f'{label}/{name}'
+                try:
+                    seconds, peak = time_stage(setup, run, runs)
+                except Exception as error:
+                    results[key] = {'bars': bars, 'error': f'{type(error).__name__}: {error}'}
+                else:
+                    results[key] = {'bars': bars, 'seconds': seconds, 'bars_per_s': bars / seconds,
+                                    'peak_mb': peak / 2**20}
+                print(format_row(key, results[key]), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Stages that got slower, used more memory or started failing compared to a baseline.
+
+    Returns:
+    - List of (key, message) tuples.
+    """
+    regressions = []
+    for key, old in baseline.items():
+        new = results.get(key)
+        if new is None or 'error' in old:
+            continue
+        if 'error' in new:
+            regressions.append((key, f"fails now ({new['error']})"))
+            continue
+        if new['bars_per_s'] < old['bars_per_s'] * (1 - tolerance):
+            regressions.append((key, f"throughput {old['bars_per_s']:,.0f} -> {new['bars_per_s']:,.0f} bars/s"))
+        # Allocations below 1 MB are too small to compare meaningfully
+        if new['peak_mb'] > max(old['peak_mb'] * (1 + tolerance), 1.0):
+            regressions.append((key, f"peak memory {old['peak_mb']:.1f} -> {new['peak_mb']:.1f} MB"))
+    return regressions
+
+
+def format_row(key, result):
+    if 'error' in result:
+        return f"{key:<40} {result['bars']:>9,}  failed: {result['error']}"
+    return (f"{key:<40} {result['bars']:>9,} {result['seconds'] * 1000:>10.1f}ms "
+            f"{result['bars_per_s']:>14,.0f} {result['peak_mb']:>9.1f}MB")
+
+
+def parse_lengths(value):
+    lengths = []
+    for part in value.split(','):
+        part = part.strip()
+        days = PRESETS[part.upper()] if part.upper() in PRESETS else int(part)
+        lengths.append((part.upper() if part.upper() in PRESETS else f'{days}d', days))
+    return lengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time each stage of the backtest pipeline.')
+    parser.add_argument('--days', default='1M,1Y',
+                        help='Comma-separated data lengths: trading days or 1D, 1M, 1Y, 10Y (default: 1M,1Y)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--only', help='Comma-separated substrings; only stages whose name contains one run')
+    parser.add_argument('--strategy', default='sma', help='Strategy used for the strategy_performance stage')
+    parser.add_argument('--save', help='Write the results to this JSON file as a new baseline')
+    parser.add_argument('--baseline', help='Compare against this JSON baseline and flag regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed fractional drop in throughput or growth in peak memory (default: 0.2)')
+    args = parser.parse_args()
+
+    only = args.only.split(',') if args.only else None
+    print(f"{'stage':<40} {'bars':>9} {'time':>12} {'bars/s':>14} {'peak':>11}")
+    results = run_benchmark(parse_lengths(args.days), args.runs, only, args.strategy)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                       'machine': platform.machine(), 'results': results}, f, indent=1)
+        print(f"baseline saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for key, message in regressions:
+            print(f"REGRESSION {key}: {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Latency and parity check of the bar-by-bar replay engine (Practice/replay.py).
+
+Generates random-walk 1-minute bars, then replays them one at a time through
+ReplayEngine for every registered strategy: each bar updates the full streaming
+indicator set, the strategy's per-bar version and the account. The script reports
+the per-bar latency (median, p99 and max) and checks that the replayed positions and
+equity match the vectorized backtest of the same raw frame, which adds only the
+indicators the strategy is registered to need (like backtest.py does). It exits with status 1 if the p99 latency is over the
+budget or the replay disagrees with the backtest.
+
+Usage:
+    python benchmarks/replay.py [--days 21] [--budget-us 1000]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from pipeline import synthetic_raw
+from Evaluation.strategy_performance import strategy_signals
+from Evaluation.trade_ledger import equity_curve
+from Practice.replay import ReplayEngine, frame_bars
+from preprocessing.cleaning import data_cleaning
+from Strategy.registry import strategy_names
+
+# Share of bars whose replayed position may differ from the backtest's
+POSITION_MISMATCH = 0.001
+# Largest allowed difference of the final equity, relative to the initial capital
+EQUITY_TOLERANCE = 1e-9
+INITIAL_CAPITAL = 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay bars through every strategy and check latency and parity.')
+    parser.add_argument('--days', type=int, default=21, help='Trading days of synthetic data')
+    parser.add_argument('--budget-us', type=float, default=1000, help='Allowed p99 latency per bar in microseconds')
+    args = parser.parse_args()
+
+    data = data_cleaning(synthetic_raw(args.days))
+
+    failures = []
+    print(f"{'strategy':<10} {'bars/s':>10} {'p50':>9} {'p99':>9} {'max':>9} {'mismatch':>9} {'equity diff':>12}")
+    for name in strategy_names():
+        _, position, _ = strategy_signals(data, name)
+        equity = equity_curve(data['Close'], position, INITIAL_CAPITAL)
+
+        engine = ReplayEngine(name, INITIAL_CAPITAL)
+        replayed = np.fromiter((engine.on_bar(bar) for bar in frame_bars(data)), dtype=np.int8, count=len(data))
+        latency = engine.latency()
+        mismatch = np.mean(replayed != position)
+        equity_diff = abs(engine.equity - equity[-1]) / INITIAL_CAPITAL
+        bars_per_s = len(data) / (np.sum(engine.latencies) / 1e9)
+
+        failed = []
+        if latency['p99_us'] > args.budget_us:
+            failed.append(f"p99 latency {latency['p99_us']:.1f}us is over {args.budget_us:.0f}us")
+        if mismatch > POSITION_MISMATCH:
+            failed.append(f"positions differ on {mismatch:.3%} of bars")
+        elif mismatch == 0 and equity_diff > EQUITY_TOLERANCE:
+            failed.append(f"final equity differs by {equity_diff:.2e} of the capital")
+        print(f"{name:<10} {bars_per_s:>10,.0f} {latency['p50_us']:>7.1f}us {latency['p99_us']:>7.1f}us "
+              f"{latency['max_us']:>7.1f}us {mismatch:>9.3%} {equity_diff:>12.1e} {'FAIL' if failed else ''}")
+        failures += [f'{name}: {message}' for message in failed]
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Startup benchmark for a single headless backtest.
+
+Each run starts a fresh interpreter, imports the evaluation entry point, runs one
+strategy over a small synthetic frame without charting and reports how long that
+took and whether Plotly or Dash were imported along the way.
+
+Usage:
+    python benchmarks/startup.py [--strategy sma] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_ONCE = '''
+import json, sys, time
+# NumPy and pandas are needed either way, so they are kept out of the measurement
+import numpy as np
+import pandas as pd
+start = time.perf_counter()
+from Evaluation.strategy_performance import run_strategy
+from Evaluation.trade_ledger import trade_ledger
+imported = time.perf_counter()
+
+index = pd.date_range('2020-12-01 09:15', periods=2000, freq='5min')
+close = 13000 + np.cumsum(np.random.default_rng(0).normal(0, 5, len(index)))
+data = pd.DataFrame({'Open': close, 'High': close + 2, 'Low': close - 2, 'Close': close, 'Volume': 0}, index=index)
+trade_ledger(run_strategy(data, STRATEGY), 100000)
+finished = time.perf_counter()
+
+print(json.dumps({
+    'import_s': imported - start,
+    'total_s': finished - start,
+    'plotly_loaded': 'plotly' in sys.modules,
+    'dash_loaded': 'dash' in sys.modules,
+}))
+'''
+
+
+def run_once(strategy):
+    code = RUN_ONCE.replace('STRATEGY', repr(strategy))
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the startup of a single headless backtest.')
+    parser.add_argument('--strategy', default='sma')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_once(args.strategy) for _ in range(args.runs)]
+    print(f"strategy:       {args.strategy}")
+    print(f"import (median): {statistics.median(r['import_s'] for r in results) * 1000:.1f} ms")
+    print(f"total (median):  {statistics.median(r['total_s'] for r in results) * 1000:.1f} ms")
+    print(f"plotly loaded:   {results[-1]['plotly_loaded']}")
+    print(f"dash loaded:     {results[-1]['dash_loaded']}")
+
+
+if __name__ == '__main__':
+    main()
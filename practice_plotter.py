@@ -1,20 +1,23 @@
+from functools import lru_cache
+
 import dash
-from dash import dcc, html
+from dash import dcc, html, ctx, Patch
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
-from preprocessing.data_ingest import data_in_csv  # Assuming the function is inside this module
-from preprocessing.cleaning import data_cleaning  # Assuming the cleaning logic is in this module
+from preprocessing.data_ingest import load_cleaned_data
 from preprocessing.timeframe import convert_timeframe
 from Charts.candle_chart import interactive_candle_chart  # Assuming this function is defined as provided
 from preprocessing.indicator import sma, ema, rsi, macd, bollinger_bands, atr, garman_klass
 from Practice.random import randomdate_data
+from Practice.replay import ReplayEngine, frame_bars
+from Strategy.registry import strategy_names
 
 # Step 2: Initialize Dash App
 app = dash.Dash(__name__)
 
 # Filepath to the dataset
 file_path = 'data/NIFTY50-Minute_data.csv'
-data = data_cleaning(data_in_csv(file_path))
+data = load_cleaned_data(file_path)
 
 
 
@@ -32,6 +35,30 @@ available_timeframes = ['1min', '5min', '15min', '30min', '1h']
 indicators = [col for col in data.columns if col not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Date']]
 newaxis_indicators = ['RSI', 'MACD','ATR','GK']
 
+
+# Each timeframe is resampled and indicated once; "Next" then only moves the slice end
+@lru_cache(maxsize=len(available_timeframes))
+def timeframe_data(timeframe):
+    return convert_timeframe(data, timeframe)
+
+# Initial number of candles to display
+initial_size = 1080 + 45
+
+
+def replay_cursor(timeframe, n_clicks):
+    """Index of the last revealed candle for a timeframe after n_clicks of "Next"."""
+    return min(initial_size + n_clicks, len(timeframe_data(timeframe))) - 1
+
+
+def new_replay_state():
+    return {'position': None, 'entry_price': None, 'realized': 0.0, 'unrealized': 0.0, 'trades': []}
+
+
+# Strategy paper-trading the selected timeframe bar by bar in a background thread
+paper_engine = None
+paper_speeds = [1, 10, 100, 1000]  # Bars per second
+
+
 # Step 3: Define Layout of the Dash App
 app.layout = html.Div([
     html.H1('Interactive Candlestick Chart with Dash'),
@@ -79,32 +106,91 @@ app.layout = html.Div([
     html.Div(id='position-display'),
     html.Div(id='pnl-display'),
 
+    # Paper trading: a strategy fed the bars one at a time, polled by the interval
+    html.H3('Paper Trading'),
+    html.Div([
+        dcc.Dropdown(
+            id='paper-strategy',
+            options=[{'label': name, 'value': name} for name in strategy_names()],
+            value='sma',
+            clearable=False,
+            style={'width': '200px'}
+        ),
+        dcc.Dropdown(
+            id='paper-speed',
+            options=[{'label': f'{speed} bars/s', 'value': speed} for speed in paper_speeds],
+            value=10,
+            clearable=False,
+            style={'width': '200px'}
+        ),
+        html.Button('Start', id='paper-start', n_clicks=0),
+        html.Button('Stop', id='paper-stop', n_clicks=0),
+    ]),
+    html.Div(id='paper-display'),
+    dcc.Interval(id='paper-interval', interval=500, disabled=True),
+
     # Hidden div to store drawings and relayout data
     dcc.Store(id='shapes-store', data=[]),  # Store for shapes
     dcc.Store(id='zoom-store', data={}),    # Store for zoom/pan
-    dcc.Store(id='positions-store', data={'position': None, 'entry_price': None}),  # Store for positions
-    dcc.Store(id='pnl-store', data=0)  # Store for PnL
+    dcc.Store(id='replay-store', data=new_replay_state()),  # Position, PnL and trade log of the replay
+    dcc.Store(id='rendered-store', data={})  # What the figure in the browser currently shows
 ])
 
 # Step 4: Create a single callback for dropdowns and button
+def _json_values(values):
+    # Plain floats for the browser, with NaN sent as null
+    return [None if value != value else value for value in values.tolist()]
+
+
+def append_candles(rows, plotted_indicators, title):
+    """
+    Partial figure update that appends rows to the candlestick and indicator traces.
+    Layout, zoom and drawn shapes are left untouched in the browser.
+    """
+    patch = Patch()
+    x = [timestamp.isoformat() for timestamp in rows.index]
+    patch['data'][0]['x'].extend(x)
+    patch['data'][0]['open'].extend(_json_values(rows['Open']))
+    patch['data'][0]['high'].extend(_json_values(rows['High']))
+    patch['data'][0]['low'].extend(_json_values(rows['Low']))
+    patch['data'][0]['close'].extend(_json_values(rows['Close']))
+    for trace, indicator in enumerate(plotted_indicators, start=1):
+        patch['data'][trace]['x'].extend(x)
+        patch['data'][trace]['y'].extend(_json_values(rows[indicator]))
+    patch['layout']['title']['text'] = title
+    return patch
+
+
 @app.callback(
-    Output('candlestick-chart', 'figure'),
+    [Output('candlestick-chart', 'figure'),
+     Output('rendered-store', 'data')],
     [Input('timeframe-selector', 'value'),
      Input('indicator-selector', 'value'),
      Input('next-button', 'n_clicks')],
     [State('candlestick-chart', 'relayoutData'),
      State('shapes-store', 'data'),
-     State('zoom-store', 'data')]
+     State('zoom-store', 'data'),
+     State('rendered-store', 'data')]
 )
-def update_chart(selected_timeframe, selected_indicators, n_clicks, relayout_data, stored_shapes, stored_zoom):
-    # Initial number of candles to display
-    initial_size = 1080 + 45       
-
+def update_chart(selected_timeframe, selected_indicators, n_clicks, relayout_data, stored_shapes, stored_zoom, rendered):
     # Track how many points to show, starting with initial_size, then adding n_clicks
     total_points = initial_size + n_clicks * 1  # Adjust the increment as needed
 
     # Get the slice of data based on clicks
-    new_data = convert_timeframe(data, selected_timeframe).iloc[:total_points]
+    timeframe_df = timeframe_data(selected_timeframe)
+    new_data = timeframe_df.iloc[:total_points]
+    plotted_indicators = [indicator for indicator in (selected_indicators or []) if indicator in new_data.columns]
+    title = f'Candlestick Chart ({selected_timeframe}) - {total_points} Candles'
+
+    # "Next" on an unchanged chart only sends the new candles to the browser
+    rendered = rendered or {}
+    if (ctx.triggered_id == 'next-button' and rendered.get('timeframe') == selected_timeframe
+            and rendered.get('indicators') == plotted_indicators):
+        shown = rendered['candles']
+        rendered = dict(rendered, candles=len(new_data))
+        return append_candles(new_data.iloc[shown:], plotted_indicators, title), rendered
+
+    rendered = {'timeframe': selected_timeframe, 'indicators': plotted_indicators, 'candles': len(new_data)}
 
 
     # Use the interactive candlestick chart function
@@ -117,14 +203,12 @@ def update_chart(selected_timeframe, selected_indicators, n_clicks, relayout_dat
     fig.data[0].low = new_data['Low']
     fig.data[0].close = new_data['Close']
 
-    if selected_indicators:
-        for indicator in selected_indicators:
-            if indicator in new_data.columns:
-                # Plot RSI on a secondary y-axis
-                if indicator in newaxis_indicators:
-                    fig.add_trace(go.Scatter(x=new_data.index, y=new_data[indicator], mode='lines', name=indicator, yaxis='y2'))
-                else:
-                    fig.add_trace(go.Scatter(x=new_data.index, y=new_data[indicator], mode='lines', name=indicator))
+    for indicator in plotted_indicators:
+        # Plot RSI on a secondary y-axis
+        if indicator in newaxis_indicators:
+            fig.add_trace(go.Scatter(x=new_data.index, y=new_data[indicator], mode='lines', name=indicator, yaxis='y2'))
+        else:
+            fig.add_trace(go.Scatter(x=new_data.index, y=new_data[indicator], mode='lines', name=indicator))
 
 
     fig.update_xaxes(
@@ -156,7 +240,7 @@ def update_chart(selected_timeframe, selected_indicators, n_clicks, relayout_dat
 
     # Preserve the title and axis labels
     fig.update_layout(
-        title=f'Candlestick Chart ({selected_timeframe}) - {total_points} Candles',
+        title=title,
         xaxis_title='Date', yaxis_title='Price'
     )
 
@@ -164,7 +248,7 @@ def update_chart(selected_timeframe, selected_indicators, n_clicks, relayout_dat
                               dict(bounds=['sat', 'mon'])
                               ])
 
-    return fig
+    return fig, rendered
 
 # Step 5: Callback to store shapes and zoom/pan data
 @app.callback(
@@ -192,55 +276,94 @@ def store_shapes_and_zoom(relayout_data, current_shapes, current_zoom):
 
 # Step 6: Execute trades and update PnL
 @app.callback(
-    [Output('positions-store', 'data'),
-     Output('pnl-store', 'data'),
+    [Output('replay-store', 'data'),
      Output('position-display', 'children'),
      Output('pnl-display', 'children')],
     [Input('buy-button', 'n_clicks'),
      Input('sell-button', 'n_clicks'),
      Input('next-button', 'n_clicks')],
-    [State('positions-store', 'data'),
-     State('pnl-store', 'data'),
-     State('candlestick-chart', 'figure')]
+    [State('timeframe-selector', 'value'),
+     State('replay-store', 'data')]
 )
-def execute_trade(buy_clicks, sell_clicks, next_clicks, position_data, pnl, fig):
-    ctx = dash.callback_context
-
-    # Ensure fig and data are valid before accessing
-    last_close = None
-    if fig and 'data' in fig and fig['data']:
-        last_close = fig['data'][0]['close'][-1]
-
-    # Update PnL after pressing "Next"
-    if next_clicks > 0 and last_close is not None:
-        if position_data['position'] == 'buy':
-            pnl = last_close - position_data['entry_price']  # Current PnL for long position
-        elif position_data['position'] == 'sell':
-            pnl = position_data['entry_price'] - last_close  # Current PnL for short position
-
-    if ctx.triggered:
-        if ctx.triggered[0]['prop_id'] == 'buy-button.n_clicks':
-            if position_data['position'] == 'sell':  # Closing short position
-                position_data['position'] = None  # Close position
-                position_data['entry_price'] = None
-            elif position_data['position'] == None and last_close is not None:  # Opening long position
-                position_data['position'] = 'buy'
-                position_data['entry_price'] = last_close
-
-        elif ctx.triggered[0]['prop_id'] == 'sell-button.n_clicks':
-            if position_data['position'] == 'buy':  # Closing long position
-                position_data['position'] = None  # Close position
-                position_data['entry_price'] = None
-            elif position_data['position'] == None and last_close is not None:  # Opening short position
-                position_data['position'] = 'sell'
-                position_data['entry_price'] = last_close
+def execute_trade(buy_clicks, sell_clicks, next_clicks, selected_timeframe, state):
+    # Last revealed close, looked up in the cached frame instead of the figure in the browser
+    cursor = replay_cursor(selected_timeframe, next_clicks)
+    candle_time = timeframe_data(selected_timeframe).index[cursor]
+    last_close = float(timeframe_data(selected_timeframe)['Close'].iloc[cursor])
+
+    def close_position():
+        side = state['position']
+        pnl = last_close - state['entry_price'] if side == 'buy' else state['entry_price'] - last_close
+        state['realized'] += pnl
+        state['trades'].append({'side': side, 'entry_price': state['entry_price'], 'exit_price': last_close,
+                                'exit_time': str(candle_time), 'pnl': pnl})
+        state['position'] = None
+        state['entry_price'] = None
+
+    if ctx.triggered_id == 'buy-button':
+        if state['position'] == 'sell':  # Closing short position
+            close_position()
+        elif state['position'] is None:  # Opening long position
+            state['position'] = 'buy'
+            state['entry_price'] = last_close
+
+    elif ctx.triggered_id == 'sell-button':
+        if state['position'] == 'buy':  # Closing long position
+            close_position()
+        elif state['position'] is None:  # Opening short position
+            state['position'] = 'sell'
+            state['entry_price'] = last_close
+
+    # Mark the open position to the last revealed close
+    if state['position'] == 'buy':
+        state['unrealized'] = last_close - state['entry_price']
+    elif state['position'] == 'sell':
+        state['unrealized'] = state['entry_price'] - last_close
+    else:
+        state['unrealized'] = 0.0
 
     # Display current position and PnL
-    position_display = f"Current Position: {position_data['position'] if position_data['position'] else 'None'}"
-    pnl_display = f"Current PnL: {pnl:.2f}"
+    position_display = f"Current Position: {state['position'] if state['position'] else 'None'}"
+    pnl_display = (f"Current PnL: {state['realized'] + state['unrealized']:.2f} "
+                   f"(realized {state['realized']:.2f}, open {state['unrealized']:.2f}, trades {len(state['trades'])})")
 
-    return position_data, pnl, position_display, pnl_display
+    return state, position_display, pnl_display
 
-# Step 7: Run the app
+# Step 7: Paper trade a strategy on the selected timeframe
+@app.callback(
+    Output('paper-interval', 'disabled'),
+    [Input('paper-start', 'n_clicks'),
+     Input('paper-stop', 'n_clicks')],
+    [State('paper-strategy', 'value'),
+     State('paper-speed', 'value'),
+     State('timeframe-selector', 'value')],
+    prevent_initial_call=True
+)
+def control_paper_trading(start_clicks, stop_clicks, strategy, speed, selected_timeframe):
+    global paper_engine
+    if paper_engine is not None:
+        paper_engine.stop()
+    if ctx.triggered_id == 'paper-stop':
+        return True
+
+    paper_engine = ReplayEngine(strategy, initial_capital=100000)
+    paper_engine.start(frame_bars(timeframe_data(selected_timeframe), delay=1 / speed))
+    return False
+
+
+@app.callback(
+    Output('paper-display', 'children'),
+    Input('paper-interval', 'n_intervals')
+)
+def show_paper_trading(n_intervals):
+    if paper_engine is None:
+        return 'Pick a strategy and press Start'
+    state = paper_engine.snapshot()
+    return (f"{state['strategy']} at {state['time']} ({state['bars']} bars{'' if state['running'] else ', stopped'}): "
+            f"position {state['position']}, equity {state['equity']:,.2f} ({state['pnl_pct']:+.2f}%, "
+            f"realized {state['realized']:,.2f}, open {state['unrealized']:,.2f}, trades {state['trades']}), "
+            f"latency p50 {state['p50_us']:.0f}us p99 {state['p99_us']:.0f}us")
+
+# Step 8: Run the app
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    app.run(debug=True)
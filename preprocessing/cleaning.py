@@ -1,12 +1,65 @@
+import numpy as np
 import pandas as pd
 
+from Profiling.instrument import stage
+
+# Compact schema of a cleaned frame: float32 prices, int32 volume when it fits (else int64)
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+PRICE_DTYPE = np.float32
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_dates(values, date_format=DATE_FORMAT):
+    """
+    Parse date strings with a fixed format, falling back to format inference for other layouts.
+
+    Timestamps that all carry the same UTC offset (e.g. '2020-11-02 09:15:00+05:30')
+    are parsed without the offset, which is then applied once to the whole column.
+    """
+    try:
+        return pd.to_datetime(values, format=date_format)
+    except (ValueError, TypeError):
+        pass
+
+    values = pd.Series(values, copy=False)
+    if pd.api.types.is_string_dtype(values.dtype) and len(values):
+        width = len(pd.Timestamp(0).strftime(date_format))
+        offsets = values.str[width:].unique()
+        if len(offsets) == 1 and offsets[0]:
+            try:
+                tz = pd.Timestamp(pd.Timestamp(0).strftime(date_format) + offsets[0]).tz
+                return pd.to_datetime(values.str[:width], format=date_format).dt.tz_localize(tz)
+            except (ValueError, TypeError):
+                pass
+    return pd.to_datetime(values)
+
+
+def compact_dtypes(data):
+    """
+    Downcast the price and volume columns of a frame to the compact schema.
+
+    Prices become float32. Volume becomes int32 if all its values are whole numbers
+    that fit, otherwise int64. Columns already in the right dtype are not copied.
+    """
+    dtypes = {col: PRICE_DTYPE for col in PRICE_COLUMNS if col in data.columns and data[col].dtype != PRICE_DTYPE}
+    if 'Volume' in data.columns and len(data):
+        volume = data['Volume'].to_numpy()
+        if pd.api.types.is_integer_dtype(volume.dtype) or np.all(np.mod(volume, 1) == 0):
+            limits = np.iinfo(np.int32)
+            dtype = np.int32 if limits.min <= volume.min() and volume.max() <= limits.max else np.int64
+            if volume.dtype != dtype:
+                dtypes['Volume'] = dtype
+    return data.astype(dtypes) if dtypes else data
+
+
+@stage()
 def data_cleaning(data):
     start_time = "09:15"
     end_time = "15:30"
 
     # Convert 'date' column to datetime if not already in DateTime format
     if not pd.api.types.is_datetime64_any_dtype(data['date']):
-        data['date'] = pd.to_datetime(data['date'])
+        data['date'] = parse_dates(data['date'])
 
 
     # Rename columns to match a consistent format
@@ -26,6 +79,9 @@ def data_cleaning(data):
     # Remove any rows with missing data
     data.dropna(inplace=True)
 
+    # Store prices as float32 and volume as int32/int64
+    data = compact_dtypes(data)
+
     # Filter data to only include rows within the trading hours
     filtered_data = data.between_time(start_time, end_time)
 
@@ -1,5 +1,194 @@
+import hashlib
+import json
+import os
+
+import numpy as np
 import pandas as pd
 
-def data_in_csv(data_path):
-    data = pd.read_csv(data_path)
-    return data
\ No newline at end of file
+from preprocessing.cleaning import data_cleaning, parse_dates, PRICE_DTYPE
+from Profiling.instrument import stage
+
+CACHE_VERSION = 2
+
+# Prices are parsed straight into float32 instead of going through float64
+CSV_DTYPES = {'open': PRICE_DTYPE, 'high': PRICE_DTYPE, 'low': PRICE_DTYPE, 'close': PRICE_DTYPE}
+
+
+def _date_bounds(start_date, end_date, warmup, tz=None):
+    """Convert a date range plus warm-up margin into comparable Timestamps (None when open)."""
+    bounds = []
+    for value in (start_date, end_date):
+        if value is not None:
+            value = pd.Timestamp(value)
+            if tz is not None and value.tz is None:
+                value = value.tz_localize(tz)
+        bounds.append(value)
+    start, end = bounds
+    if start is not None and warmup is not None:
+        start = start - pd.Timedelta(warmup)
+    return start, end
+
+
+@stage()
+def data_in_csv(data_path, start_date=None, end_date=None, warmup=None, chunksize=100000):
+    """
+    Read a minute-data CSV, optionally only the rows inside a date range.
+
+    Without a range the whole file is read in one go. With a range the file is read
+    in chunks: chunks that end before the start are discarded and reading stops at
+    the first chunk past the end, so memory scales with the window, not the file.
+    The file must be sorted by its 'date' column.
+
+    Parameters:
+    - data_path: Path to the raw CSV file.
+    - start_date: First timestamp to keep (default is the start of the file).
+    - end_date: Last timestamp to keep, inclusive (default is the end of the file).
+    - warmup: Extra history loaded before start_date for indicator lookback (e.g. '5D').
+    - chunksize: Number of rows parsed per chunk when a range is given.
+
+    Returns:
+    - Raw DataFrame with the CSV's columns, float32 prices and 'date' parsed to datetimes.
+    """
+    if start_date is None and end_date is None:
+        data = pd.read_csv(data_path, dtype=CSV_DTYPES)
+        data['date'] = parse_dates(data['date'])
+        return data
+
+    chunks = []
+    for chunk in pd.read_csv(data_path, dtype=CSV_DTYPES, chunksize=chunksize):
+        chunk['date'] = parse_dates(chunk['date'])
+        start, end = _date_bounds(start_date, end_date, warmup, chunk['date'].dt.tz)
+
+        if start is not None:
+            chunk = chunk[chunk['date'] >= start]
+        if end is not None:
+            past_end = chunk['date'] > end
+            if past_end.any():
+                chunks.append(chunk[~past_end])
+                break
+        chunks.append(chunk)
+
+    data = pd.concat(chunks, ignore_index=True)
+    return data
+
+
+def _file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache_meta(cache_path):
+    try:
+        with open(os.path.join(cache_path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_cache(data, cache_path, meta):
+    """Store each column of the cleaned frame as a typed .npy file."""
+    os.makedirs(cache_path, exist_ok=True)
+
+    # Drop the old metadata first so a half-written cache is never picked up
+    meta_path = os.path.join(cache_path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    index = data.index
+    meta['tz'] = str(index.tz) if index.tz is not None else None
+    meta['index_name'] = index.name
+    # Timestamps are stored as int64 nanoseconds (UTC for timezone-aware indexes)
+    np.save(os.path.join(cache_path, 'index.npy'), index.as_unit('ns').asi8)
+
+    columns = []
+    for i, col in enumerate(data.columns):
+        values = data[col].to_numpy()
+        if pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype(np.float32)
+        elif not pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype(str)
+        np.save(os.path.join(cache_path, f'col{i}.npy'), values)
+        columns.append(col)
+    meta['columns'] = columns
+
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def _read_cache(cache_path, meta, start_date=None, end_date=None, warmup=None):
+    """Load the cached columns as memory-mapped arrays without copying them."""
+    index = np.load(os.path.join(cache_path, 'index.npy'), mmap_mode='r')
+
+    # The timestamps are sorted, so a date range maps to one contiguous slice of every column
+    start, end = _date_bounds(start_date, end_date, warmup, meta['tz'])
+    first = 0 if start is None else np.searchsorted(index, start.as_unit('ns').value, side='left')
+    last = len(index) if end is None else np.searchsorted(index, end.as_unit('ns').value, side='right')
+
+    index = pd.DatetimeIndex(index[first:last].view('datetime64[ns]'), name=meta['index_name'])
+    if meta['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+
+    # One Series per column keeps pandas from consolidating (copying) same-dtype columns
+    columns = {col: pd.Series(np.load(os.path.join(cache_path, f'col{i}.npy'), mmap_mode='r')[first:last],
+                              index=index, copy=False)
+               for i, col in enumerate(meta['columns'])}
+    return pd.DataFrame(columns, copy=False)
+
+
+@stage()
+def load_cleaned_data(data_path, cache_dir=None, start_date=None, end_date=None, warmup=None):
+    """
+    Load a minute-data CSV through data_in_csv and data_cleaning, keeping a columnar cache.
+
+    The cleaned frame is stored next to the CSV as one memory-mappable .npy file per
+    column (float32 prices, int32 or int64 volume, int64 nanosecond timestamps). The
+    cache is keyed on the CSV's content hash: a changed mtime or size triggers a
+    re-hash, and a changed hash rebuilds the cache, so warm starts skip CSV parsing
+    entirely.
+    A date range is resolved with a binary search over the cached timestamps, so
+    only the pages of the requested window are ever read from disk.
+
+    Parameters:
+    - data_path: Path to the raw CSV file.
+    - cache_dir: Directory for the cache (default is a '.cache' folder next to the CSV).
+    - start_date: First timestamp to keep (default is the start of the data).
+    - end_date: Last timestamp to keep, inclusive (default is the end of the data).
+    - warmup: Extra history loaded before start_date for indicator lookback (e.g. '5D').
+
+    Returns:
+    - Cleaned DataFrame with a datetime index, as returned by data_cleaning.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), '.cache')
+    cache_path = os.path.join(cache_dir, os.path.splitext(os.path.basename(data_path))[0])
+
+    stat = os.stat(data_path)
+    meta = _read_cache_meta(cache_path)
+    if meta is not None:
+        # Fast path: the file has not been touched since the cache was built
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return _read_cache(cache_path, meta, start_date, end_date, warmup)
+
+        # The file was touched; only rebuild if its contents actually changed
+        if meta['size'] == stat.st_size and meta['sha256'] == _file_hash(data_path):
+            meta['mtime_ns'] = stat.st_mtime_ns
+            with open(os.path.join(cache_path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            return _read_cache(cache_path, meta, start_date, end_date, warmup)
+
+    data = data_cleaning(data_in_csv(data_path))
+    meta = {
+        'version': CACHE_VERSION,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _file_hash(data_path),
+    }
+    _write_cache(data, cache_path, meta)
+    return _read_cache(cache_path, meta, start_date, end_date, warmup)
@@ -1,56 +1,210 @@
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
+import pandas as pd
+
+from Profiling.instrument import stage
+
+
+class IndicatorCache:
+    """
+    LRU cache of computed indicator arrays.
+
+    Entries are keyed by (name, params, source columns, data fingerprint), so the same
+    rolling window over the same prices is computed once no matter which indicator,
+    strategy or timeframe conversion asks for it.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, compute):
+        """Return the array stored under key, computing and storing it on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        values = np.asarray(compute())
+        values.flags.writeable = False  # Shared between callers, never modified in place
+        self._entries[key] = values
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return values
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+indicator_cache = IndicatorCache()
+
+
+def fingerprint(*series):
+    """Content hash of one or more columns, used to recognise data that was seen before."""
+    digest = hashlib.blake2b(digest_size=16)
+    for values in series:
+        values = np.ascontiguousarray(np.asarray(values))
+        digest.update(values.dtype.str.encode())
+        # Hash the array's own buffer (a byte view) instead of a tobytes() copy
+        digest.update(values.view(np.uint8) if values.ndim else values.tobytes())
+    return digest.hexdigest()
+
+
+def output_dtype(series):
+    """Dtype of an indicator computed from series: its own float dtype (e.g. float32 prices), else float64."""
+    return series.dtype if np.issubdtype(series.dtype, np.floating) else np.dtype(np.float64)
+
+
+# Shared intermediates: each is cached on its own so indicators built on top of them reuse it
+
+def rolling_mean(series, period, source='Close', key=None):
+    """Rolling mean of a column, cached."""
+    key = key or fingerprint(series)
+    return indicator_cache.get(('rolling_mean', period, source, key),
+                               lambda: series.rolling(window=period).mean().to_numpy(dtype=output_dtype(series)))
+
+
+def rolling_std(series, period, source='Close', key=None):
+    """Rolling standard deviation of a column, cached."""
+    key = key or fingerprint(series)
+    return indicator_cache.get(('rolling_std', period, source, key),
+                               lambda: series.rolling(window=period).std().to_numpy(dtype=output_dtype(series)))
+
+
+def ewm_mean(series, span, source='Close', key=None):
+    """Exponential moving average (adjust=False) of a column, cached."""
+    key = key or fingerprint(series)
+    return indicator_cache.get(('ewm_mean', span, source, key),
+                               lambda: series.ewm(span=span, adjust=False).mean().to_numpy(dtype=output_dtype(series)))
 
+
+def compute_rsi(close, period=14):
+    """
+    RSI from rolling means of gains and losses, not cached. close may be a Series or
+    a DataFrame with one column per symbol.
+    """
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def rsi_values(close, period=14, key=None):
+    """RSI from rolling means of gains and losses, cached."""
+    key = key or fingerprint(close)
+    return indicator_cache.get(('rsi', period, 'Close', key),
+                               lambda: compute_rsi(close, period).to_numpy(dtype=output_dtype(close)))
+
+
+def true_range(data, key=None):
+    """True range from High, Low and the previous Close, cached."""
+    key = key or fingerprint(data['High'], data['Low'], data['Close'])
+
+    def compute():
+        ranges = pd.DataFrame({
+            'H-L': data['High'] - data['Low'],
+            'H-PC': np.abs(data['High'] - data['Close'].shift(1)),
+            'L-PC': np.abs(data['Low'] - data['Close'].shift(1)),
+        })
+        return ranges.max(axis=1).to_numpy()
+
+    return indicator_cache.get(('true_range', (), 'High/Low/Close', key), compute)
+
+
+@stage()
 def sma(data, period=14):
     """Simple Moving Average"""
-    data['SMA'] = data['Close'].rolling(window=period).mean()
+    data['SMA'] = rolling_mean(data['Close'], period)
     return data
 
+@stage()
 def ema(data, period=14):
     """Exponential Moving Average"""
-    data['EMA'] = data['Close'].ewm(span=period, adjust=False).mean()
+    data['EMA'] = ewm_mean(data['Close'], period)
     return data
 
+@stage()
 def rsi(data, period=14):
     """Relative Strength Index"""
-    delta = data['Close'].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    data['RSI'] = 100 - (100 / (1 + rs))
+    data['RSI'] = rsi_values(data['Close'], period)
     return data
 
+@stage()
 def bollinger_bands(data, period=20, num_std=1.9):
-    """Bollinger Bands"""
-    data['SMA'] = data['Close'].rolling(window=period).mean()
-    data['STD'] = data['Close'].rolling(window=period).std()
-    data['UpperBand'] = data['SMA'] + (data['STD'] * num_std)
-    data['LowerBand'] = data['SMA'] - (data['STD'] * num_std)
-    data.drop(columns=['STD'], inplace=True)
+    """Bollinger Bands (the middle band is stored as 'MiddleBand', leaving any 'SMA' column alone)"""
+    key = fingerprint(data['Close'])
+    middle = rolling_mean(data['Close'], period, key=key)
+    std = rolling_std(data['Close'], period, key=key)
+    data['MiddleBand'] = middle
+    data['UpperBand'] = middle + (std * num_std)
+    data['LowerBand'] = middle - (std * num_std)
     return data
 
+@stage()
 def macd(data, short_period=12, long_period=26, signal_period=9):
     """Moving Average Convergence Divergence"""
-    short_ema = data['Close'].ewm(span=short_period, adjust=False).mean()
-    long_ema = data['Close'].ewm(span=long_period, adjust=False).mean()
-    data['MACD'] = short_ema - long_ema
-    data['Signal'] = data['MACD'].ewm(span=signal_period, adjust=False).mean()
+    key = fingerprint(data['Close'])
+    macd_line = ewm_mean(data['Close'], short_period, key=key) - ewm_mean(data['Close'], long_period, key=key)
+    data['MACD'] = macd_line
+    data['Signal'] = indicator_cache.get(
+        ('macd_signal', (short_period, long_period, signal_period), 'Close', key),
+        lambda: pd.Series(macd_line).ewm(span=signal_period, adjust=False).mean().to_numpy(dtype=macd_line.dtype))
     return data
 
+@stage()
 def atr(data, period=14):
     """Average True Range"""
-    data['H-L'] = data['High'] - data['Low']
-    data['H-PC'] = np.abs(data['High'] - data['Close'].shift(1))
-    data['L-PC'] = np.abs(data['Low'] - data['Close'].shift(1))
-    data['TR'] = data[['H-L', 'H-PC', 'L-PC']].max(axis=1)
-    data['ATR'] = data['TR'].rolling(window=period).mean()
-    data.drop(columns=['H-L', 'H-PC', 'L-PC', 'TR'], inplace=True)
+    key = fingerprint(data['High'], data['Low'], data['Close'])
+    tr = true_range(data, key=key)
+    data['ATR'] = indicator_cache.get(('atr', period, 'High/Low/Close', key),
+                                      lambda: pd.Series(tr).rolling(window=period).mean().to_numpy(dtype=tr.dtype))
     return data
 
+@stage()
 def garman_klass(data):
     """Garman-Klass Volatility"""
     log_hl = np.log(data['High'] / data['Low']) ** 2
     log_oc = np.log(data['Open'] / data['Close']) ** 2
     data['GK'] = np.sqrt(0.5 * log_hl - (2 * np.log(2) - 1) * log_oc)
     return data
+
+# Indicator function that adds each indicator column
+indicator_columns = {
+    'SMA': sma,
+    'EMA': ema,
+    'RSI': rsi,
+    'MiddleBand': bollinger_bands,
+    'UpperBand': bollinger_bands,
+    'LowerBand': bollinger_bands,
+    'MACD': macd,
+    'Signal': macd,
+    'ATR': atr,
+    'GK': garman_klass,
+}
+
+
+def ensure_indicators(data, columns):
+    """
+    Add any of the given indicator columns that are missing, using default parameters.
+    Columns already present are left untouched and the caller's frame is not modified.
+    """
+    missing = [col for col in columns if col not in data.columns]
+    if missing:
+        data = data.copy(deep=False)
+        for col in missing:
+            if col not in data.columns:
+                data = indicator_columns[col](data)
+    return data
@@ -0,0 +1,225 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer keeping the running sum and sum of squares of its values.
+
+    The sums are updated in O(1) per value and re-added from the buffer once every
+    full turn of the ring, so floating point drift cannot build up over long streams.
+    """
+    __slots__ = ('period', 'values', 'position', 'count', 'anchor', 'total', 'total_sq')
+
+    def __init__(self, period):
+        self.period = period
+        self.values = [0.0] * period
+        self.position = 0
+        self.count = 0
+        self.anchor = None  # Values are summed relative to the first one to keep the variance accurate
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        if self.anchor is None:
+            self.anchor = value
+        shifted = value - self.anchor
+
+        if self.count == self.period:
+            old = self.values[self.position]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+
+        self.values[self.position] = shifted
+        self.total += shifted
+        self.total_sq += shifted * shifted
+        self.position += 1
+
+        if self.position == self.period:
+            self.position = 0
+            self.total = math.fsum(self.values[:self.count])
+            self.total_sq = math.fsum(v * v for v in self.values[:self.count])
+
+    @property
+    def full(self):
+        return self.count == self.period
+
+    def mean(self):
+        if self.count < self.period:
+            return NAN
+        return self.anchor + self.total / self.period
+
+    def std(self):
+        """Sample standard deviation (ddof=1), like pandas rolling().std()."""
+        if self.count < self.period or self.period < 2:
+            return NAN
+        variance = (self.total_sq - self.total * self.total / self.period) / (self.period - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class RollingExtremes:
+    """
+    Highest and lowest of the last period values, updated in amortized O(1) per value.
+
+    Two monotonic deques hold the positions of the values that can still become the
+    window's maximum or minimum, so the oldest entry of each is the current extreme.
+    Like rolling(period, min_periods=1), a window that is not full yet uses the values
+    seen so far.
+    """
+    __slots__ = ('period', 'count', 'highs', 'lows')
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.highs = deque()  # (position, value), values decreasing
+        self.lows = deque()   # (position, value), values increasing
+
+    def push(self, value):
+        position = self.count
+        self.count += 1
+        highs = self.highs
+        lows = self.lows
+        while highs and highs[-1][1] <= value:
+            highs.pop()
+        highs.append((position, value))
+        while lows and lows[-1][1] >= value:
+            lows.pop()
+        lows.append((position, value))
+
+        # Drop the extremes that have left the window
+        oldest = position - self.period
+        if highs[0][0] <= oldest:
+            highs.popleft()
+        if lows[0][0] <= oldest:
+            lows.popleft()
+        return highs[0][1], lows[0][1]
+
+    def high(self):
+        return self.highs[0][1] if self.highs else NAN
+
+    def low(self):
+        return self.lows[0][1] if self.lows else NAN
+
+
+class StreamingSMA:
+    """Simple Moving Average updated one bar at a time (matches indicator.sma)."""
+    __slots__ = ('source', 'window')
+
+    def __init__(self, period=14, source='Close'):
+        self.source = source
+        self.window = RollingWindow(period)
+
+    def update(self, bar):
+        self.window.push(bar[self.source])
+        return self.window.mean()
+
+
+class StreamingEMA:
+    """Exponential Moving Average updated one bar at a time (matches indicator.ema)."""
+    __slots__ = ('source', 'alpha', 'value')
+
+    def __init__(self, period=14, source='Close'):
+        self.source = source
+        self.alpha = 2 / (period + 1)
+        self.value = None
+
+    def update(self, bar):
+        return self.push(bar[self.source])
+
+    def push(self, price):
+        if self.value is None:
+            self.value = price
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * price
+        return self.value
+
+
+class StreamingRSI:
+    """Relative Strength Index updated one bar at a time (matches indicator.rsi)."""
+    __slots__ = ('gains', 'losses', 'previous')
+
+    def __init__(self, period=14):
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.previous = None
+
+    def update(self, bar):
+        price = bar['Close']
+        # The first bar has no change and counts as zero gain and zero loss
+        delta = 0.0 if self.previous is None else price - self.previous
+        self.previous = price
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+
+        if not self.gains.full:
+            return NAN
+        avg_gain = self.gains.mean()
+        avg_loss = self.losses.mean()
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else NAN
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class StreamingBollingerBands:
+    """Bollinger Bands updated one bar at a time; update returns (middle, upper, lower)."""
+    __slots__ = ('window', 'num_std')
+
+    def __init__(self, period=20, num_std=1.9):
+        self.window = RollingWindow(period)
+        self.num_std = num_std
+
+    def update(self, bar):
+        self.window.push(bar['Close'])
+        middle = self.window.mean()
+        spread = self.window.std() * self.num_std
+        return middle, middle + spread, middle - spread
+
+
+class StreamingMACD:
+    """MACD updated one bar at a time; update returns (macd, signal) like indicator.macd."""
+    __slots__ = ('short_ema', 'long_ema', 'signal_ema')
+
+    def __init__(self, short_period=12, long_period=26, signal_period=9):
+        self.short_ema = StreamingEMA(short_period)
+        self.long_ema = StreamingEMA(long_period)
+        self.signal_ema = StreamingEMA(signal_period)
+
+    def update(self, bar):
+        price = bar['Close']
+        macd_value = self.short_ema.push(price) - self.long_ema.push(price)
+        return macd_value, self.signal_ema.push(macd_value)
+
+
+class StreamingATR:
+    """Average True Range updated one bar at a time (matches indicator.atr)."""
+    __slots__ = ('window', 'previous_close')
+
+    def __init__(self, period=14):
+        self.window = RollingWindow(period)
+        self.previous_close = None
+
+    def update(self, bar):
+        high = bar['High']
+        low = bar['Low']
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.previous_close = bar['Close']
+        self.window.push(true_range)
+        return self.window.mean()
+
+
+class StreamingGarmanKlass:
+    """Garman-Klass volatility of each bar (matches indicator.garman_klass)."""
+    __slots__ = ()
+
+    def update(self, bar):
+        log_hl = math.log(bar['High'] / bar['Low']) ** 2
+        log_oc = math.log(bar['Open'] / bar['Close']) ** 2
+        variance = 0.5 * log_hl - (2 * math.log(2) - 1) * log_oc
+        return math.sqrt(variance) if variance >= 0 else NAN
+
@@ -1,23 +1,97 @@
+import numpy as np
+import pandas as pd
+
 from preprocessing.indicator import sma, ema, rsi, macd, bollinger_bands, atr, garman_klass
+from Profiling.instrument import stage
 
-def convert_timeframe(df, timeframe):
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+DAY_NS = 24 * 60 * 60 * 10**9
+
+
+def _timeframe_ns(timeframe):
+    """Length of a fixed timeframe in nanoseconds, or None if it cannot be bucketed arithmetically."""
+    try:
+        length = pd.Timedelta(timeframe).value
+    except (ValueError, TypeError):
+        return None
+    if length <= 0 or length > DAY_NS:
+        return None
+    return length
+
+
+def _reduce_buckets(keys, open_, high, low, close, volume):
+    """Collapse consecutive rows sharing a bucket key into one OHLCV bar each."""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    # Summed volume can outgrow a compact int32 column, so integers are added up as int64
+    total = np.int64 if np.issubdtype(volume.dtype, np.integer) else None
+    return (keys[starts], open_[starts], np.maximum.reduceat(high, starts),
+            np.minimum.reduceat(low, starts), close[ends], np.add.reduceat(volume, starts, dtype=total))
+
+
+def aggregate_ohlcv(df, timeframes):
     """
-    Convert stock price data from 1-minute timeframe to a desired timeframe and reapply indicators.
-    
+    Aggregate 1-minute OHLCV bars into several timeframes in one pass over the data.
+
+    Bars are bucketed arithmetically on their timestamps (buckets start at midnight of
+    the first day, like pandas resample). The finest timeframe is built from the
+    minute data and every coarser timeframe is folded from the finest one already
+    built that divides it (e.g. 1D from 1h from 30min from 15min from 5min), so the
+    minute data is scanned only once. Empty buckets are left out.
+
     Parameters:
-    - df: DataFrame containing stock price data with 'open', 'close', 'high', 'low', 'volume', and datetime index.
-    - timeframe: A string representing the desired timeframe (e.g., '3T' for 3 minutes, '5T' for 5 minutes, 
-                 '15T' for 15 minutes, '1H' for 1 hour, '1D' for 1 day, etc.).
-    
+    - df: DataFrame with 'Open', 'High', 'Low', 'Close', 'Volume' and a sorted datetime index.
+    - timeframes: List of timeframe strings (e.g., ['5min', '15min', '1h', '1D']).
+
     Returns:
-    - A DataFrame resampled to the desired timeframe with updated indicators.
+    - Dict mapping each timeframe to its OHLCV DataFrame. Timeframes that are not fixed
+      lengths of at most a day are resampled with pandas instead.
     """
-    # Fill missing values in the DataFrame by averaging the values of the previous and next rows in the same column
-    for col in df.columns:
-        if df[col].dtype in ['float64', 'int64']:
-            df[col] = df[col].fillna((df[col].shift(1) + df[col].shift(-1)) / 2)
-    
-    # Resample the data to the desired timeframe
+    results = {}
+    fixed = sorted((tf for tf in timeframes if _timeframe_ns(tf) is not None), key=_timeframe_ns)
+    for timeframe in timeframes:
+        if timeframe not in fixed:
+            results[timeframe] = _resample_ohlcv(df, timeframe)
+
+    if not fixed or df.empty:
+        for timeframe in fixed:
+            results[timeframe] = _resample_ohlcv(df, timeframe)
+        return results
+
+    # Bucket on wall-clock time so timezone-aware data splits at local midnight like pandas
+    index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    stamps = index.as_unit('ns').asi8
+    origin = stamps[0] - stamps[0] % DAY_NS
+    offsets = stamps - origin
+
+    columns = [df[col].to_numpy() for col in OHLCV]
+    built = {}  # timeframe length -> (bucket starts relative to origin, open, high, low, close, volume)
+    for timeframe in fixed:
+        length = _timeframe_ns(timeframe)
+        if length in built:
+            bars = built[length]
+        else:
+            # Fold from the coarsest timeframe built so far that divides this one
+            source = max((n for n in built if length % n == 0), default=None)
+            if source is None:
+                keys = offsets // length
+                bars = _reduce_buckets(keys, *columns)
+            else:
+                starts, *values = built[source]
+                bars = _reduce_buckets(starts // length, *values)
+            bars = (bars[0] * length,) + bars[1:]
+            built[length] = bars
+
+        starts, *values = bars
+        bar_index = pd.DatetimeIndex((origin + starts).view('datetime64[ns]'), name=df.index.name)
+        if df.index.tz is not None:
+            bar_index = bar_index.tz_localize(df.index.tz)
+        results[timeframe] = pd.DataFrame(dict(zip(OHLCV, values)), index=bar_index)
+
+    return results
+
+
+def _resample_ohlcv(df, timeframe):
     resampled_df = df.resample(timeframe).agg({
         'Open': 'first',
         'High': 'max',
@@ -25,14 +99,72 @@ def convert_timeframe(df, timeframe):
         'Close': 'last',
         'Volume': 'sum'
     })
-    
-    # Drop rows with missing data
-    resampled_df.dropna(inplace=True)
+    return resampled_df
+
+
+class OHLCVAggregator:
+    """
+    Folds 1-minute bars into partial bars for several timeframes as they arrive.
+
+    Appending a minute only touches the open bucket of each timeframe; update returns
+    the bars that were completed by the new minute.
+    """
+    __slots__ = ('timeframes', 'lengths', 'origin', 'partial')
+
+    def __init__(self, timeframes):
+        self.timeframes = list(timeframes)
+        self.lengths = [_timeframe_ns(tf) for tf in self.timeframes]
+        if None in self.lengths:
+            raise ValueError("OHLCVAggregator only supports fixed timeframes of at most one day")
+        self.origin = None
+        self.partial = [None] * len(self.timeframes)  # [bucket start, open, high, low, close, volume]
+
+    def update(self, timestamp, bar):
+        """
+        Add one minute bar.
+
+        Parameters:
+        - timestamp: Timestamp of the minute bar.
+        - bar: Mapping with 'Open', 'High', 'Low', 'Close' and 'Volume'.
 
-    # Handle Buy/Sell signals: Keep first or last signal in each timeframe
-    if 'Buy/Sell' in df.columns:
-        resampled_df['Buy/Sell'] = df['Buy/Sell'].resample(timeframe).last()  # or .first(), depending on your logic
+        Returns:
+        - List of (timeframe, timestamp, bar dict) for every bar completed by this minute.
+        """
+        stamp = pd.Timestamp(timestamp).tz_localize(None).value
+        if self.origin is None:
+            self.origin = stamp - stamp % DAY_NS
 
+        completed = []
+        for i, length in enumerate(self.lengths):
+            start = self.origin + (stamp - self.origin) // length * length
+            current = self.partial[i]
+            if current is not None and current[0] == start:
+                current[2] = max(current[2], bar['High'])
+                current[3] = min(current[3], bar['Low'])
+                current[4] = bar['Close']
+                current[5] += bar['Volume']
+                continue
+            if current is not None:
+                completed.append((self.timeframes[i], pd.Timestamp(current[0]), dict(zip(OHLCV, current[1:]))))
+            self.partial[i] = [start, bar['Open'], bar['High'], bar['Low'], bar['Close'], bar['Volume']]
+        return completed
+
+    def current(self, timeframe):
+        """The still-open bar of a timeframe as (timestamp, bar dict), or None before any data."""
+        current = self.partial[self.timeframes.index(timeframe)]
+        if current is None:
+            return None
+        return pd.Timestamp(current[0]), dict(zip(OHLCV, current[1:]))
+
+
+def _fill_gaps(df):
+    # Fill missing values by averaging the values of the previous and next rows in the same column
+    numeric = [col for col in df.columns if df[col].dtype in ['float64', 'float32', 'int64']]
+    if numeric and df[numeric].isna().to_numpy().any():
+        df[numeric] = df[numeric].fillna((df[numeric].shift(1) + df[numeric].shift(-1)) / 2)
+
+
+def _reapply_indicators(df, resampled_df):
     # Reapply indicators for the new timeframe
     if 'SMA' in df.columns:
         resampled_df = sma(resampled_df)
@@ -48,5 +180,52 @@ def convert_timeframe(df, timeframe):
         resampled_df = atr(resampled_df)
     if 'GK' in df.columns:
         resampled_df = garman_klass(resampled_df)
-
     return resampled_df
+
+
+@stage()
+def convert_timeframes(df, timeframes):
+    """
+    Convert 1-minute data to several timeframes from a single pass over the data and reapply indicators.
+
+    Parameters:
+    - df: DataFrame containing stock price data with 'Open', 'High', 'Low', 'Close', 'Volume' and datetime index.
+    - timeframes: List of timeframe strings (e.g., ['5min', '15min', '1h']).
+
+    Returns:
+    - Dict mapping each timeframe to its resampled DataFrame with updated indicators.
+    """
+    _fill_gaps(df)
+
+    # Arithmetic bucketing needs sorted, complete prices; anything else goes through pandas
+    if df.index.is_monotonic_increasing and not df[OHLCV].isna().to_numpy().any():
+        bars = aggregate_ohlcv(df, timeframes)
+    else:
+        bars = {timeframe: _resample_ohlcv(df, timeframe) for timeframe in timeframes}
+
+    results = {}
+    for timeframe in timeframes:
+        # Drop rows with missing data
+        resampled_df = bars[timeframe].dropna()
+
+        # Handle Buy/Sell signals: Keep first or last signal in each timeframe
+        if 'Buy/Sell' in df.columns:
+            resampled_df['Buy/Sell'] = df['Buy/Sell'].resample(timeframe).last()  # or .first(), depending on your logic
+
+        results[timeframe] = _reapply_indicators(df, resampled_df)
+    return results
+
+
+def convert_timeframe(df, timeframe):
+    """
+    Convert stock price data from 1-minute timeframe to a desired timeframe and reapply indicators.
+
+    Parameters:
+    - df: DataFrame containing stock price data with 'open', 'close', 'high', 'low', 'volume', and datetime index.
+    - timeframe: A string representing the desired timeframe (e.g., '3min' for 3 minutes, '5min' for 5 minutes,
+                 '15min' for 15 minutes, '1h' for 1 hour, '1D' for 1 day, etc.).
+
+    Returns:
+    - A DataFrame resampled to the desired timeframe with updated indicators.
+    """
+    return convert_timeframes(df, [timeframe])[timeframe]
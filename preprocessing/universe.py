@@ -0,0 +1,114 @@
+import glob
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.data_ingest import load_cleaned_data
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Prices of several symbols on one calendar: values has shape (symbol, time, field)
+Universe = namedtuple('Universe', ['symbols', 'index', 'fields', 'values'])
+
+
+def universe_paths(source):
+    """
+    Map symbol names to CSV paths.
+
+    Parameters:
+    - source: A directory (every *.csv in it), a list of CSV paths, or a dict of symbol -> path.
+              Symbols are named after the file names without extension.
+    """
+    if isinstance(source, dict):
+        return dict(source)
+    if isinstance(source, str):
+        source = sorted(glob.glob(os.path.join(source, '*.csv')))
+    return {os.path.splitext(os.path.basename(path))[0]: path for path in source}
+
+
+def align_universe(frames, fields=OHLCV):
+    """
+    Align several symbols' frames onto one calendar as a (symbol x time x field) array.
+
+    The calendar is the union of all timestamps. A symbol with no bar at a timestamp
+    carries its last Close forward as a flat bar (Open, High and Low equal to that Close,
+    Volume 0); before its first bar every field is NaN.
+
+    Parameters:
+    - frames: Dict of symbol -> DataFrame with the fields as columns and a sorted datetime index.
+    - fields: Columns to keep, in order (default is OHLCV).
+
+    Returns:
+    - Universe(symbols, index, fields, values) with values of shape (symbol, time, field).
+    """
+    symbols = list(frames)
+    fields = list(fields)
+    index = frames[symbols[0]].index
+    for symbol in symbols[1:]:
+        index = index.union(frames[symbol].index)
+
+    values = np.full((len(symbols), len(index), len(fields)), np.nan)
+    stamps = index.as_unit('ns').asi8
+    rows = np.arange(len(index))
+    close = fields.index('Close') if 'Close' in fields else None
+    for s, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        present = np.zeros(len(index), dtype=bool)
+        present[np.searchsorted(stamps, frame.index.as_unit('ns').asi8)] = True
+        values[s, present] = frame[fields].to_numpy(dtype=np.float64)
+        if present.all():
+            continue
+
+        # Last row with a bar of this symbol at or before each timestamp (-1 before the first bar)
+        last = np.maximum.accumulate(np.where(present, rows, -1))
+        missing = ~present & (last >= 0)
+        for f, name in enumerate(fields):
+            if name == 'Volume':
+                values[s, missing, f] = 0
+            elif close is not None:
+                values[s, missing, f] = values[s, last[missing], close]
+            else:
+                values[s, missing, f] = values[s, last[missing], f]
+
+    return Universe(symbols, index, fields, values)
+
+
+def load_universe(source, fields=OHLCV, cache_dir=None, start_date=None, end_date=None, warmup=None):
+    """
+    Load, clean and align the CSVs of several symbols.
+
+    Each file goes through load_cleaned_data (and its cache) and the results are
+    aligned with align_universe.
+
+    Parameters:
+    - source: Directory, list of paths or dict of symbol -> path (see universe_paths).
+    - fields: Columns to keep (default is OHLCV).
+    - cache_dir, start_date, end_date, warmup: As in load_cleaned_data.
+
+    Returns:
+    - Universe(symbols, index, fields, values).
+    """
+    paths = universe_paths(source)
+    if not paths:
+        raise ValueError("No CSV files found for the universe")
+    frames = {symbol: load_cleaned_data(path, cache_dir, start_date, end_date, warmup)
+              for symbol, path in paths.items()}
+    return align_universe(frames, fields)
+
+
+def field_panel(universe, field):
+    """(time x symbol) view of one field of the universe, without copying."""
+    return universe.values[:, :, universe.fields.index(field)].T
+
+
+def universe_frame(universe, field):
+    """One field of the universe as a DataFrame with a column per symbol."""
+    return pd.DataFrame(field_panel(universe, field), index=universe.index, columns=universe.symbols)
+
+
+def symbol_frame(universe, symbol):
+    """The aligned bars of one symbol as an OHLCV DataFrame."""
+    values = universe.values[universe.symbols.index(symbol)]
+    return pd.DataFrame(values, index=universe.index, columns=universe.fields)
@@ -0,0 +1,50 @@
+import argparse
+import ast
+
+from preprocessing.data_ingest import load_cleaned_data
+from preprocessing.timeframe import convert_timeframe
+from preprocessing.indicator import sma
+from Evaluation.parameter_sweep import parameter_sweep
+
+
+def parse_param(text):
+    """Parse 'name=v1,v2,...' into (name, [values]), keeping numbers as numbers."""
+    name, _, values = text.partition('=')
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(ast.literal_eval(value))
+        except (ValueError, SyntaxError):
+            parsed.append(value)
+    return name.strip(), parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep a grid of strategy parameters in parallel.')
+    parser.add_argument('--data', default='data/NIFTY50-Minute_data.csv', help='Minute data CSV')
+    parser.add_argument('--strategy', required=True, help="Strategy name ('sma', 'bb', 'rsi', 'macd', 'idg', 'tfb', 'mr', 'mis')")
+    parser.add_argument('--param', action='append', default=[], type=parse_param,
+                        help='Parameter values to try, e.g. --param lookback=10,20,30 (repeatable)')
+    parser.add_argument('--timeframe', default='5min', help='Timeframe to resample to (default 5min)')
+    parser.add_argument('--start', default=None, help='Backtest start date (yyyy-mm-dd)')
+    parser.add_argument('--end', default=None, help='Backtest end date (yyyy-mm-dd)')
+    parser.add_argument('--capital', type=float, default=100000, help='Initial capital per backtest')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--checkpoint', default=None, help='CSV file to save progress to and resume from')
+    parser.add_argument('--rank-by', default='total_return_pct',
+                        help="Column to rank by, e.g. total_return_pct, sharpe, sortino, calmar")
+    parser.add_argument('--top', type=int, default=20, help='Number of ranked results to print')
+    args = parser.parse_args()
+
+    data = load_cleaned_data(args.data, start_date=args.start, end_date=args.end, warmup='5D')
+    data = convert_timeframe(data, args.timeframe)
+    data = sma(data)
+
+    results = parameter_sweep(data, args.strategy, dict(args.param), start_date=args.start, end_date=args.end,
+                              initial_capital=args.capital, processes=args.processes, checkpoint=args.checkpoint,
+                              rank_by=args.rank_by)
+    print(results.head(args.top).to_string())
+
+
+if __name__ == '__main__':
+    main()